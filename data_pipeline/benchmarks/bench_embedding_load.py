@@ -0,0 +1,82 @@
+"""Load time and peak memory of the ways step 05 can read the embedding matrix.
+
+  chroma-get : previous path, one collection.get for every id + np.array
+  chroma-paged: embedding_store.read_chroma_embeddings (preallocated float32)
+  mmap       : embedding_store.load_embedding_matrix (np.load mmap_mode='r')
+
+Each method runs in a fresh interpreter so peak RSS is not shared.
+
+    python benchmarks/bench_embedding_load.py
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+OUTPUT_DIR = SRC_DIR / "../data/output"
+DATA_FILE = OUTPUT_DIR / "phase_c_embedded.csv"
+CHROMA_DB_PATH = OUTPUT_DIR / "chroma_db"
+EMBEDDINGS_FILE = OUTPUT_DIR / "embeddings.npy"
+EMBEDDING_IDS_FILE = OUTPUT_DIR / "embedding_ids.json"
+COLLECTION_NAME = "plotpoint_movies"
+METHODS = ['chroma-get', 'chroma-paged', 'mmap']
+
+
+def run_method(method):
+    import numpy as np
+    import chromadb
+    from embedding_store import stable_ids, read_chroma_embeddings, load_embedding_matrix
+    from frames import read_frame
+    from instrumentation import peak_rss_mb
+
+    ids = stable_ids(read_frame(DATA_FILE.resolve()))
+    collection = chromadb.PersistentClient(path=str(CHROMA_DB_PATH.resolve())).get_collection(COLLECTION_NAME)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if method == 'chroma-get':
+        embeddings = np.array(collection.get(ids=ids, include=['embeddings'])['embeddings'])
+    elif method == 'chroma-paged':
+        embeddings = read_chroma_embeddings(collection, ids)
+    else:
+        embeddings = load_embedding_matrix(EMBEDDINGS_FILE.resolve(), EMBEDDING_IDS_FILE.resolve(), ids)
+    # Touch every row so lazily mapped pages are counted too
+    checksum = float(embeddings.sum(dtype=np.float64))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "method": method,
+        "shape": list(embeddings.shape),
+        "seconds": elapsed,
+        "rss_before_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+        "checksum": checksum
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--method', choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        run_method(args.method)
+        return
+
+    print(f"{'method':<14} {'rows':>8} {'load (s)':>9} {'peak RSS (MB)':>14} {'delta (MB)':>11}")
+    for method in METHODS:
+        out = subprocess.run([sys.executable, __file__, '--method', method],
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        delta = result['peak_rss_mb'] - result['rss_before_mb']
+        print(f"{method:<14} {result['shape'][0]:>8} {result['seconds']:>9.3f} "
+              f"{result['peak_rss_mb']:>14.0f} {delta:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Sentences/sec of the step 03 CPU encoder for different worker counts.
+
+Uses the embedding inputs of step 02 (phase_b_normalized, CSV or Parquet,
+whichever is newer; repeated if there are fewer rows than requested) and
+compares against a plain single-process model.encode call. Multi-worker timings include worker start-up (model load).
+
+    python benchmarks/bench_encode.py --rows 2000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import encoders
+from frames import latest_frame_path, read_frame
+
+INPUT_FILE = SRC_DIR / "../data/output/phase_b_normalized.csv"
+MODEL_NAME = 'all-mpnet-base-v2'
+BATCH_SIZE = 32
+
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, cpu_count}))
+    args = parser.parse_args()
+
+    if latest_frame_path(INPUT_FILE.resolve()) is None:
+        parser.error(f"{INPUT_FILE.resolve()} not found. Run 02_normalize.py (or plotpoint.py run normalize) first.")
+    texts = read_frame(INPUT_FILE.resolve())['embedding_input'].tolist()
+    sentences = (texts * (args.rows // len(texts) + 1))[:args.rows]
+
+    model = encoders.load_encoder(args.model, device='cpu')
+    model.encode(sentences[:args.batch_size], batch_size=args.batch_size)  # warm-up
+
+    start = time.perf_counter()
+    model.encode(sentences, batch_size=args.batch_size)
+    baseline = len(sentences) / (time.perf_counter() - start)
+    print(f"{'mode':<28} {'sentences/sec':>14}")
+    print(f"{'model.encode (1 process)':<28} {baseline:>14.1f}")
+
+    for workers in args.workers:
+        threads = max(1, cpu_count // workers)
+        start = time.perf_counter()
+        encoders.encode_cpu(args.model, sentences, args.batch_size, workers, threads, model=model)
+        rate = len(sentences) / (time.perf_counter() - start)
+        label = f"{workers} worker(s) x {threads} thread(s)"
+        print(f"{label:<28} {rate:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Time and peak memory of step 05's plotpoint_data_3d.json export: the previous
+iterrows + json.dump(indent=2) loop against the column-wise streaming writer
+(stdlib json and orjson, pretty and minified).
+
+Rows are resampled from phase_c_embedded.csv with random coordinates and
+clusters. Each method runs in a fresh interpreter so peak RSS is not shared.
+
+    python benchmarks/bench_json_export.py --sizes 3000 100000 1000000
+"""
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+SAMPLE_FILE = SRC_DIR / "../data/output/phase_c_embedded.csv"
+SIZES = [3_000, 100_000, 1_000_000]
+METHODS = ['legacy', 'json', 'json-minified', 'orjson', 'orjson-minified']
+RANDOM_SEED = 42
+
+
+# --- Previous implementation, kept verbatim as the baseline ---
+
+def legacy_export_json(df, ids, output_path):
+    import pandas as pd
+    from parsing import parse_list_column
+
+    genres = parse_list_column(df['genres_list'] if 'genres_list' in df.columns else df['genres'])
+
+    export_records = []
+    for idx, row in df.iterrows():
+        record = {
+            "id": ids[idx],
+            "title": row['title'],
+            "x": float(row['x']),
+            "y": float(row['y']),
+            "z": float(row['z']),
+            "cluster": int(row['cluster']),
+            "cluster_confidence": float(row['cluster_confidence']),
+            "popularity": float(row['popularity']) if pd.notna(row['popularity']) else 0,
+            "year": int(row['release_year']) if pd.notna(row['release_year']) else None,
+            "era": row['era'],
+            "genres": genres[idx],
+            "runtime": row['runtime_bucket'],
+            "overview": str(row['overview']) if pd.notna(row['overview']) else "",
+            "poster_path": row.get('poster_path', None),
+            "original_language": str(row['original_language']) if pd.notna(row['original_language']) else "en"
+        }
+        export_records.append(record)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(export_records, f, indent=2)
+
+
+def make_frame(n):
+    import numpy as np
+    from frames import read_frame
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    base = read_frame(SAMPLE_FILE.resolve())
+    df = base.sample(n=n, replace=n > len(base), random_state=RANDOM_SEED).reset_index(drop=True)
+    df['x'], df['y'], df['z'] = (rng.normal(0, 50, n).astype(np.float32) for _ in range(3))
+    df['cluster'] = rng.integers(-1, max(n // 100, 2), n)
+    df['cluster_confidence'] = rng.random(n)
+    return df
+
+
+def run_method(method, n):
+    from instrumentation import peak_rss_mb
+
+    reduce_module = importlib.import_module("05_reduce_and_cluster")
+    if method.startswith('json'):
+        reduce_module.orjson = None
+    elif method.startswith('orjson') and reduce_module.orjson is None:
+        print(json.dumps({"method": method, "skipped": "orjson not installed"}))
+        return
+
+    df = make_frame(n)
+    ids = [str(i) for i in range(n)]
+    baseline = peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = Path(tmp) / "plotpoint_data_3d.json"
+        start = time.perf_counter()
+        if method == 'legacy':
+            legacy_export_json(df, ids, output_path)
+        else:
+            reduce_module.export_json(df, ids, output_path, minify=method.endswith('minified'))
+        elapsed = time.perf_counter() - start
+        size = output_path.stat().st_size
+
+    print(json.dumps({
+        "method": method,
+        "seconds": elapsed,
+        "mb": size / 1e6,
+        "rss_before_mb": baseline,
+        "peak_rss_mb": peak_rss_mb()
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=METHODS)
+    parser.add_argument('--method', choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument('--rows', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        run_method(args.method, args.rows)
+        return
+
+    print(f"{'rows':>8} {'method':<16} {'export (s)':>10} {'file MB':>8} {'peak RSS delta (MB)':>20}")
+    for n in args.sizes:
+        for method in args.methods:
+            proc = subprocess.run([sys.executable, __file__, '--method', method, '--rows', str(n)],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                # e.g. killed by the OOM killer at large sizes
+                print(f"{n:>8} {method:<16} failed (exit code {proc.returncode})")
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            if 'skipped' in result:
+                print(f"{n:>8} {method:<16} skipped ({result['skipped']})")
+                continue
+            delta = result['peak_rss_mb'] - result['rss_before_mb']
+            print(f"{n:>8} {method:<16} {result['seconds']:>10.2f} {result['mb']:>8.1f} {delta:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Time, peak memory and trustworthiness of step 05's full and landmark projections.
+
+Embeddings are synthetic: unit-normalized float32 vectors drawn around
+topic centers (a Gaussian mixture), written once per size to a temporary
+.npy that every run memory-maps. Each run fits in a fresh interpreter so
+peak RSS is not shared:
+
+  full     : fit_projection (UMAP and HDBSCAN on every row), up to --full-max rows
+  landmark : fit_landmark_projection (fit on --landmarks rows, place the rest in batches)
+
+Trustworthiness (sklearn, cosine, k=10) is measured on the same fixed row
+sample for both modes, so the two are directly comparable.
+
+    python benchmarks/bench_landmark_umap.py --sizes 10000 100000 500000
+"""
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+SIZES = [10_000, 100_000, 500_000]
+MODES = ['full', 'landmark']
+FULL_MAX = 100_000
+DIM = 384
+TOPICS = 200
+TRUST_SAMPLE = 2000
+TRUST_K = 10
+RANDOM_SEED = 42
+
+
+def write_embeddings(path, n, dim, chunk=50_000):
+    """Gaussian-mixture unit vectors, generated in chunks straight into a .npy memmap."""
+    rng = np.random.default_rng(RANDOM_SEED)
+    centers = rng.standard_normal((TOPICS, dim)).astype(np.float32)
+    spread = rng.uniform(0.3, 1.2, TOPICS).astype(np.float32)
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n, dim))
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        topic = rng.integers(0, TOPICS, size)
+        vectors = centers[topic] + rng.standard_normal((size, dim), dtype=np.float32) * spread[topic, None]
+        out[start:start + size] = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    out.flush()
+    del out
+
+
+def run_mode(mode, path, landmarks, workers):
+    from sklearn.manifold import trustworthiness
+    from instrumentation import peak_rss_mb
+
+    reduce_module = importlib.import_module("05_reduce_and_cluster")
+    reduce_module.landmark_count = landmarks
+    embeddings = np.load(path, mmap_mode='r')
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if mode == 'full':
+        _, _, _, coords, labels, _ = reduce_module.fit_projection(embeddings)
+    else:
+        _, _, _, coords, labels, _ = reduce_module.fit_landmark_projection(embeddings, workers)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+
+    sample = reduce_module.sample_rows(len(embeddings), TRUST_SAMPLE, RANDOM_SEED)
+    trust = trustworthiness(np.asarray(embeddings[sample]), coords[sample], n_neighbors=TRUST_K, metric='cosine')
+    print(json.dumps({
+        "seconds": elapsed,
+        "rss_before_mb": baseline,
+        "peak_rss_mb": peak,
+        "trust": float(trust),
+        "clusters": int(len(set(labels.tolist()) - {-1})),
+        "noise": float(np.mean(labels == -1))
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--full-max', type=int, default=FULL_MAX,
+                        help="Largest size the full fit is run at (it grows steeply).")
+    parser.add_argument('--landmarks', type=int, default=None,
+                        help="Landmark count (default: landmark_count from step 05).")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Transform workers (default: transform_workers from step 05).")
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    reduce_module = importlib.import_module("05_reduce_and_cluster")
+    landmarks = args.landmarks or reduce_module.landmark_count
+    workers = args.workers or reduce_module.transform_workers
+    if args.mode:
+        run_mode(args.mode, args.path, landmarks, workers)
+        return
+
+    print(f"landmarks {landmarks}, transform workers {workers}\n")
+    print(f"{'rows':>8} {'mode':<9} {'time (s)':>9} {'peak RSS (MB)':>14} {'delta (MB)':>11} "
+          f"{'trust':>7} {'clusters':>9} {'noise':>6}")
+    with tempfile.TemporaryDirectory(prefix="plotpoint_bench_") as tmp:
+        for n in args.sizes:
+            path = Path(tmp) / f"embeddings_{n}.npy"
+            write_embeddings(path, n, DIM)
+            for mode in MODES:
+                if mode == 'full' and n > args.full_max:
+                    print(f"{n:>8} {mode:<9} {'skipped (--full-max)':>25}")
+                    continue
+                command = [sys.executable, __file__, '--mode', mode, '--path', str(path),
+                           '--landmarks', str(landmarks), '--workers', str(workers)]
+                proc = subprocess.run(command, capture_output=True, text=True, cwd=SRC_DIR)
+                if proc.returncode != 0:
+                    print(f"{n:>8} {mode:<9} failed: {proc.stderr.strip().splitlines()[-1:]}")
+                    continue
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                delta = result['peak_rss_mb'] - result['rss_before_mb']
+                print(f"{n:>8} {mode:<9} {result['seconds']:>9.1f} {result['peak_rss_mb']:>14.0f} {delta:>11.0f} "
+                      f"{result['trust']:>7.3f} {result['clusters']:>9} {result['noise']:>6.1%}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
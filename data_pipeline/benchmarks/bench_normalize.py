@@ -0,0 +1,136 @@
+"""Benchmark 02_normalize.py parsing/text assembly against the previous
+per-row ast.literal_eval + df.apply implementation.
+
+Rows are resampled from phase_a_filtered_movies.csv; half of the genre and
+company cells are rewritten in TMDB list-of-dicts form so both the
+comma separated and the stringified-dict paths are exercised.
+
+    python benchmarks/bench_normalize.py --sizes 3000 100000 1000000
+"""
+import argparse
+import ast
+import importlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import parsing
+from frames import read_frame
+
+SAMPLE_FILE = SRC_DIR / "../data/output/phase_a_filtered_movies.csv"
+SIZES = [3_000, 100_000, 1_000_000]
+RANDOM_SEED = 42
+
+
+# --- Previous implementation, kept verbatim as the baseline ---
+
+def legacy_safe_literal_eval(val):
+    try:
+        if pd.isna(val): return []
+        return ast.literal_eval(val)
+    except (ValueError, SyntaxError):
+        if isinstance(val, list): return val
+        return []
+
+def legacy_extract_names(val):
+    if isinstance(val, str):
+        if val.strip().startswith('[') and 'name' in val:
+            data = legacy_safe_literal_eval(val)
+            if isinstance(data, list):
+                return [item['name'] for item in data if isinstance(item, dict) and 'name' in item]
+        elif val.strip().startswith('['):
+            data = legacy_safe_literal_eval(val)
+            if isinstance(data, list):
+                return [str(x) for x in data]
+        elif ',' in val:
+            return [x.strip() for x in val.split(',')]
+    if isinstance(val, list):
+        return val
+    return []
+
+def legacy_get_era(year):
+    if pd.isna(year): return "Unknown"
+    try:
+        y = int(year)
+        if y < 1920: return "Pre-1920s"
+        return f"{(y // 10) * 10}s"
+    except:
+        return "Unknown"
+
+def legacy_get_runtime_bucket(mins):
+    if pd.isna(mins): return "Standard"
+    if mins < 90: return "Short"
+    if mins > 150: return "Long"
+    return "Standard"
+
+def legacy_construct_text(row):
+    genres_str = ", ".join(row['genres_list'][:3])
+    themes_str = ", ".join(row['keywords_list'][:8])
+    overview = str(row['overview']) if pd.notna(row['overview']) else ""
+    return (
+        f"Title: {row['title']}\n"
+        f"Genres: {genres_str}\n"
+        f"Themes: {themes_str}\n"
+        f"Era: {row['era']}\n"
+        f"Language: {row['original_language']}\n"
+        f"Production: {row['top_production']}\n"
+        f"Runtime: {row['runtime_bucket']}\n"
+        f"Summary: {overview}"
+    )
+
+def legacy_normalize(df):
+    df['genres_list'] = df['genres'].apply(legacy_extract_names)
+    df['keywords_list'] = df['keywords'].apply(legacy_extract_names)
+    df['production_list'] = df['production_companies'].apply(legacy_extract_names)
+    df['release_year'] = pd.to_datetime(df['release_date'], errors='coerce').dt.year
+    df['era'] = df['release_year'].apply(legacy_get_era)
+    df['runtime_mean'] = pd.to_numeric(df['runtime'], errors='coerce')
+    df['runtime_bucket'] = df['runtime_mean'].apply(legacy_get_runtime_bucket)
+    df['top_production'] = df['production_list'].apply(lambda x: x[0] if isinstance(x, list) and len(x) > 0 else "Indie/Unknown")
+    df['embedding_input'] = df.apply(legacy_construct_text, axis=1)
+    return df
+
+
+def to_tmdb_dicts(cell):
+    if not isinstance(cell, str):
+        return cell
+    names = [x.strip() for x in cell.split(',') if x.strip()]
+    return repr([{'id': i, 'name': name} for i, name in enumerate(names)])
+
+def make_frame(base, n, rng):
+    df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    dict_rows = rng.random(n) < 0.5
+    for col in ['genres', 'keywords', 'production_companies']:
+        df.loc[dict_rows, col] = df.loc[dict_rows, col].map(to_tmdb_dicts)
+    return df
+
+def timed(fn, df):
+    start = time.perf_counter()
+    fn(df)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    normalize_module = importlib.import_module("02_normalize")
+    base = read_frame(SAMPLE_FILE.resolve())
+    rng = np.random.default_rng(RANDOM_SEED)
+
+    print(f"{'rows':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n in args.sizes:
+        df = make_frame(base, n, rng)
+        parsing.parse_names.cache_clear()
+        legacy = timed(legacy_normalize, df.copy())
+        fast = timed(normalize_module.normalize, df.copy())
+        print(f"{n:>10} {legacy:>12.2f} {fast:>15.2f} {legacy / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""End-to-end scaling benchmark of steps 01-05 on synthetic catalogs, offline.
+
+For every size, a fresh copy of src/ gets its own data/ tree and a synthetic
+TMDB-shaped movies.csv (synthetic_catalog.py). Then `plotpoint.py run reduce`
+runs filter -> normalize -> embed -> reduce in a subprocess. It uses the stub
+encoder backend (encoders.StubEncoder), so nothing is downloaded and
+encoding costs stay small and repeatable. The sample size is the whole
+catalog, so every row that passes step 01 flows through the later stages.
+
+Per stage, the run's metrics report (instrumentation.py) gives wall time,
+CPU time, peak RSS and throughput. A stage's rows are the most rows any of its
+spans handled (step 01: rows read; the other stages: the sample).
+
+    python benchmarks/bench_pipeline.py --sizes 10000 100000 1000000
+    python benchmarks/bench_pipeline.py --sizes 10000 --spans --out results.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from instrumentation import print_spans
+from synthetic_catalog import write_catalog
+
+SIZES = [10_000, 100_000, 1_000_000]
+STAGES = ['filter', 'normalize', 'embed', 'reduce']
+RUN_NAME = 'plotpoint'
+RANDOM_SEED = 42
+
+# Keep the child offline: no model hub lookups, no Chroma telemetry
+OFFLINE_ENV = {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1", "ANONYMIZED_TELEMETRY": "False"}
+
+
+def stage_rows(spans, stage):
+    """Most rows handled by any span of the stage (None when no span counted rows)."""
+    prefix = f"{RUN_NAME}/{stage}/"
+    counts = [s["rows"] for s in spans if s["name"].startswith(prefix) and s.get("rows") is not None]
+    return max(counts) if counts else None
+
+
+def stage_table(report):
+    spans = {s["name"]: s for s in report["spans"]}
+    table = []
+    for stage in STAGES:
+        entry = spans.get(f"{RUN_NAME}/{stage}")
+        if entry is None:
+            continue
+        rows = stage_rows(report["spans"], stage)
+        table.append({
+            "stage": stage,
+            "wall_s": entry["wall_s"],
+            "cpu_s": entry["cpu_s"],
+            "peak_rss_mb": entry["peak_rss_mb"],
+            "rows": rows,
+            "rows_per_s": rows / max(entry["wall_s"], 1e-9) if rows else None
+        })
+    return table
+
+
+def run_size(n, root, args):
+    """Generate the catalog, run the pipeline in a copied tree and return its metrics report."""
+    tree = root / "data_pipeline"
+    src = tree / "src"
+    shutil.copytree(SRC_DIR, src, ignore=shutil.ignore_patterns("__pycache__"))
+    (tree / "data" / "output").mkdir(parents=True)
+    catalog = tree / "data" / "input" / "movies.csv"
+
+    start = time.perf_counter()
+    write_catalog(catalog, n, seed=args.seed)
+    print(f"  generated {n:,} rows ({catalog.stat().st_size / 1e6:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+    command = [sys.executable, "plotpoint.py", "run", "reduce", "--backend", "stub", "--target-size", str(n),
+               "--reduction", args.reduction]
+    if args.stream:
+        command.append("--stream")
+    start = time.perf_counter()
+    log_path = root / "pipeline.log"
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.run(command, cwd=src, stdout=log, stderr=subprocess.STDOUT,
+                              env={**os.environ, **OFFLINE_ENV})
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        tail = log_path.read_text(encoding="utf-8").strip().splitlines()[-5:]
+        print(f"  pipeline failed after {elapsed:.0f}s:\n    " + "\n    ".join(tail))
+        return None
+    reports = sorted((tree / "data" / "output" / "metrics").glob(f"*-{RUN_NAME}.json"))
+    with open(reports[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(n, table):
+    for row in table:
+        rows = f"{row['rows']:>10,}" if row["rows"] is not None else f"{'-':>10}"
+        rate = f"{row['rows_per_s']:>10,.0f}" if row["rows_per_s"] is not None else f"{'-':>10}"
+        print(f"{n:>9,} {row['stage']:<10} {row['wall_s']:>9.1f} {row['cpu_s']:>9.1f} "
+              f"{row['peak_rss_mb']:>14.0f} {rows} {rate}")
+    total = sum(row["wall_s"] for row in table)
+    peak = max((row["peak_rss_mb"] for row in table), default=0)
+    print(f"{n:>9,} {'total':<10} {total:>9.1f} {'':>9} {peak:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    parser.add_argument('--stream', action='store_true', help="Step 01 streaming mode.")
+    parser.add_argument('--reduction', default='auto', help="Step 05 reduction mode (see plotpoint.py).")
+    parser.add_argument('--spans', action='store_true', help="Also print every span of each run.")
+    parser.add_argument('--out', help="Write the per-size stage tables and reports to this JSON file.")
+    parser.add_argument('--keep', help="Keep each size's tree (data and metrics) under this directory.")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        print(f"{n:,} rows")
+        if args.keep:
+            root = Path(args.keep).resolve() / f"catalog_{n}"
+            if root.exists():
+                shutil.rmtree(root)
+            root.mkdir(parents=True)
+            report = run_size(n, root, args)
+        else:
+            with tempfile.TemporaryDirectory(prefix="plotpoint_bench_") as tmp:
+                report = run_size(n, Path(tmp), args)
+        if report is None:
+            continue
+        if args.spans:
+            print_spans(report["spans"])
+        results.append({"rows": n, "stages": stage_table(report), "report": report})
+
+    print(f"\n{'catalog':>9} {'stage':<10} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS (MB)':>14} "
+          f"{'rows':>10} {'rows/s':>10}")
+    for result in results:
+        print_table(result["rows"], result["stages"])
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
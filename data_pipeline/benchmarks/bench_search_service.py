@@ -0,0 +1,185 @@
+"""Latency and throughput of the semantic search service under concurrent load.
+
+Starts src/search_service.py (or targets a running one with --url), then
+keeps --concurrency clients busy sending queries drawn from a bundled list.
+Query popularity is Zipf-like, so repeats exercise the query embedding
+cache the way real traffic would. Reports p50/p95/p99 latency and
+requests/sec per concurrency level, the mean micro-batch size, and the share
+of queries answered without encoding (cache hits and duplicates in a batch).
+
+    python benchmarks/bench_search_service.py --concurrency 1 8 32 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote_plus, urlsplit
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+URL = "http://127.0.0.1:8765"
+CONCURRENCY = [1, 8, 32]
+REQUESTS = 500
+K = 20
+ZIPF_EXPONENT = 1.1
+STARTUP_TIMEOUT = 300
+RANDOM_SEED = 42
+
+QUERIES = [
+    "slow-burn space horror",
+    "heist movie with a twist ending",
+    "coming of age story set in the eighties",
+    "animated film about talking animals on an adventure",
+    "time travel paradox thriller",
+    "courtroom drama about a wrongful conviction",
+    "zombie outbreak survival",
+    "romantic comedy in new york",
+    "war film about soldiers behind enemy lines",
+    "superhero team saves the world",
+    "detective hunts a serial killer in the rain",
+    "feel-good sports underdog story",
+    "haunted house ghost story",
+    "artificial intelligence becomes self-aware",
+    "mafia family crime saga",
+    "samurai revenge epic",
+    "dystopian future rebellion against the government",
+    "road trip with estranged family",
+    "musical about chasing dreams in los angeles",
+    "giant monster attacks a city",
+    "psychological thriller about memory loss",
+    "survival alone on a desert island",
+    "biopic of a famous musician",
+    "martial arts tournament",
+    "pirates searching for treasure",
+    "witches and wizards at a magic school",
+    "astronauts stranded on mars",
+    "political conspiracy and government cover-up",
+    "post-apocalyptic wasteland road movie",
+    "dinosaurs brought back to life",
+    "friendship between a boy and a robot",
+    "spy thriller with gadgets and car chases",
+    "quiet family drama about grief",
+    "found footage horror in the woods",
+    "fairy tale princess animated musical",
+    "hacker uncovers a virtual reality",
+    "boxing champion comeback",
+    "vampire romance",
+    "alien invasion of earth",
+    "prison escape plan"
+]
+
+
+async def fetch(reader, writer, path, host):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return int(status_line.split()[1]), json.loads(body) if body else None
+
+
+async def get_json(url, path):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    try:
+        return await fetch(reader, writer, path, parts.netloc)
+    finally:
+        writer.close()
+
+
+async def client(url, queries, latencies, errors):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    try:
+        for query in queries:
+            start = time.perf_counter()
+            status, _ = await fetch(reader, writer, f"/search?q={quote_plus(query)}&k={K}", parts.netloc)
+            if status == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(url, concurrency, requests, rng):
+    weights = 1.0 / np.arange(1, len(QUERIES) + 1) ** ZIPF_EXPONENT
+    picks = rng.choice(len(QUERIES), requests, p=weights / weights.sum())
+    # Each client also varies its queries a little so not every request is a cache hit
+    stream = [QUERIES[i] if rng.random() < 0.7 else f"{QUERIES[i]} {rng.integers(1000)}" for i in picks]
+    shares = [stream[c::concurrency] for c in range(concurrency)]
+    latencies, errors = [], []
+    _, before = await get_json(url, "/stats")
+    start = time.perf_counter()
+    await asyncio.gather(*(client(url, share, latencies, errors) for share in shares if share))
+    elapsed = time.perf_counter() - start
+    _, after = await get_json(url, "/stats")
+    return np.array(latencies), errors, elapsed, before, after
+
+
+async def wait_for_service(url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise SystemExit(f"search_service.py exited with code {process.returncode}")
+        try:
+            status, _ = await get_json(url, "/health")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.5)
+    raise SystemExit(f"Service at {url} did not come up within {timeout}s")
+
+
+async def bench(args, process):
+    await wait_for_service(args.url, process, STARTUP_TIMEOUT)
+    rng = np.random.default_rng(RANDOM_SEED)
+    print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'batch':>6} {'reused':>7} {'errors':>6}")
+    for concurrency in args.concurrency:
+        latencies, errors, elapsed, before, after = await load(args.url, concurrency, args.requests, rng)
+        queries = after['queries'] - before['queries']
+        batches = after['batches'] - before['batches']
+        encoded = after['encoded'] - before['encoded']
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99]) if len(latencies) else (np.nan,) * 3
+        print(f"{concurrency:>7} {len(latencies) / elapsed:>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} "
+              f"{queries / max(batches, 1):>6.1f} {1 - encoded / max(queries, 1):>7.1%} {len(errors):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=None, help=f"Use a running service (default: start one at {URL}).")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY)
+    parser.add_argument('--requests', type=int, default=REQUESTS, help="Requests per concurrency level.")
+    parser.add_argument('--max-batch', type=int, default=None, help="Passed to the service it starts.")
+    args = parser.parse_args()
+
+    process = None
+    if args.url is None:
+        args.url = URL
+        command = [sys.executable, str(SRC_DIR / "search_service.py"), "--port", str(urlsplit(URL).port)]
+        if args.max_batch:
+            command += ["--max-batch", str(args.max_batch)]
+        process = subprocess.Popen(command, cwd=SRC_DIR)
+    try:
+        asyncio.run(bench(args, process))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Build time, size and determinism of the octree tile export (05 --tiles), plus
+how much a client near the camera fetches compared with the flat payload.
+
+Rows are resampled from phase_c_embedded.csv and placed in a synthetic
+mixture of clusters in the same coordinate range as the real export.
+
+    python benchmarks/bench_tiles.py --rows 100000
+"""
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from frames import read_frame
+from tiles import load_tile_manifest, select_tiles
+
+SAMPLE_FILE = SRC_DIR / "../data/output/phase_c_embedded.csv"
+ROWS = 100_000
+CLUSTERS = 200
+CAMERAS = 50
+POINT_BUDGET = 20_000
+RANDOM_SEED = 42
+
+
+def make_frame(base, n, rng):
+    df = base.sample(n=n, replace=n > len(base), random_state=RANDOM_SEED).reset_index(drop=True)
+    centers = rng.normal(0, 50, (CLUSTERS, 3))
+    labels = rng.integers(0, CLUSTERS, n)
+    coords = centers[labels] + rng.normal(0, 5, (n, 3))
+    df['x'], df['y'], df['z'] = coords.T
+    df['cluster'] = labels
+    df['cluster_confidence'] = rng.random(n)
+    df['popularity'] = rng.pareto(1.5, n) * 5
+    return df
+
+
+def digest(directory):
+    sha = hashlib.sha1()
+    for path in sorted(directory.iterdir()):
+        sha.update(path.name.encode())
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--budget', type=int, default=POINT_BUDGET, help="Points a client keeps loaded.")
+    args = parser.parse_args()
+
+    reduce_module = importlib.import_module("05_reduce_and_cluster")
+    rng = np.random.default_rng(RANDOM_SEED)
+    df = make_frame(read_frame(SAMPLE_FILE.resolve()), args.rows, rng)
+    ids = [str(i) for i in range(args.rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        timings = []
+        for run in ("a", "b"):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                reduce_module.export_tiles(df, ids, out / run)
+            timings.append(time.perf_counter() - start)
+        deterministic = digest(out / "a") == digest(out / "b")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            reduce_module.export_columnar(df, ids, out / "points.bin", out / "points.json", out / "overviews.json")
+        flat_bytes = sum((out / name).stat().st_size for name in ("points.bin", "points.json", "overviews.json"))
+
+        tiles_dir = out / "a"
+        manifest = load_tile_manifest(tiles_dir / reduce_module.TILE_MANIFEST_FILE)
+        nodes = {node["id"]: node for node in manifest["nodes"]}
+        tile_bytes = {node_id: (tiles_dir / f"{node_id}.bin").stat().st_size
+                      + (tiles_dir / f"{node_id}.json").stat().st_size for node_id in nodes}
+        stored = sum(node["points"] for node in nodes.values())
+
+        # Cameras just outside random points, the way the web app frames a selected movie
+        targets = df[['x', 'y', 'z']].to_numpy()[rng.integers(0, args.rows, CAMERAS)]
+        fetched, points = [], []
+        for camera in targets + np.array([20, 15, 20]):
+            selected = select_tiles(manifest, camera, args.budget)
+            fetched.append(sum(tile_bytes[node_id] for node_id in selected))
+            points.append(sum(nodes[node_id]["points"] for node_id in selected))
+
+    print(f"rows                 {args.rows}")
+    print(f"build (s)            {min(timings):.2f} (runs: {', '.join(f'{t:.2f}' for t in timings)})")
+    print(f"deterministic        {deterministic}")
+    print(f"tiles                {len(nodes)} (max depth {max(n['level'] for n in nodes.values())}, "
+          f"rows stored {stored}/{args.rows})")
+    print(f"tile set size (MB)   {sum(tile_bytes.values()) / 1e6:.2f} (root {tile_bytes['r'] / 1e6:.2f})")
+    print(f"flat payload (MB)    {flat_bytes / 1e6:.2f}")
+    print(f"per camera, budget {args.budget}: mean {np.mean(points):.0f} points, "
+          f"{np.mean(fetched) / 1e6:.2f} MB fetched ({np.mean(fetched) / flat_bytes * 100:.1f}% of flat)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Build time, size and lookup latency of the title index (title_index.py) against
+the DataFrame `str.contains` scan it replaces.
+
+Titles are the sampled catalog's plus synthetic ones made from its title
+vocabulary, up to --rows. Queries are exact titles, typed prefixes and
+titles with a typo. Lookups are timed in Python and, when `node` is on PATH,
+with the web app's own index (web_app/src/utils/titleIndex.js).
+
+    python benchmarks/bench_title_index.py --rows 100000
+"""
+import argparse
+import gzip
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from frames import read_frame
+from title_index import TitleIndex
+
+SAMPLE_FILE = SRC_DIR / "../data/output/phase_a_filtered_movies.csv"
+INDEX_JS = SRC_DIR / "../../web_app/src/utils/titleIndex.js"
+ROWS = 100_000
+QUERIES = 1000
+SCAN_QUERIES = 50
+RANDOM_SEED = 42
+
+NODE_SCRIPT = """
+import fs from 'fs'
+import { pathToFileURL } from 'url'
+const [indexPath, dir] = process.argv.slice(1)
+const { TitleIndex } = await import(pathToFileURL(indexPath).href)
+const queries = JSON.parse(fs.readFileSync(dir + '/queries.json', 'utf8'))
+const bin = fs.readFileSync(dir + '/titles.bin')
+let start = performance.now()
+const index = new TitleIndex(JSON.parse(fs.readFileSync(dir + '/titles.json', 'utf8')),
+                             bin.buffer.slice(bin.byteOffset, bin.byteOffset + bin.byteLength))
+const result = { load: (performance.now() - start) / 1000 }
+for (const [op, texts] of Object.entries(queries)) {
+  const times = texts.map(text => { const s = performance.now(); index[op](text); return performance.now() - s })
+  result[op] = times.map(t => t / 1000)
+}
+console.log(JSON.stringify(result))
+"""
+
+
+def make_titles(base, n, rng):
+    titles = base['title'].dropna().astype(str).tolist()
+    words = [w for title in titles for w in title.split()]
+    synthetic = [" ".join(rng.choice(words, rng.integers(1, 6))) for _ in range(max(n - len(titles), 0))]
+    return (titles + synthetic)[:n]
+
+
+def make_queries(titles, rng, count):
+    picks = [titles[i] for i in rng.integers(0, len(titles), count)]
+
+    def typo(title):
+        if len(title) < 4:
+            return title
+        i = int(rng.integers(1, len(title) - 1))
+        return title[:i] + title[i + 1:]
+
+    return {
+        "exact": picks,
+        "prefix": [title[:int(rng.integers(1, min(len(title), 8) + 1))] for title in picks],
+        "fuzzy": [typo(title) for title in picks]
+    }
+
+
+def timings(fn, texts):
+    out = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        out.append(time.perf_counter() - start)
+    return np.array(out)
+
+
+def summary(label, seconds):
+    ms = np.asarray(seconds) * 1000
+    return f"{label:<28} {ms.mean():>9.4f} {np.percentile(ms, 50):>9.4f} {np.percentile(ms, 99):>9.4f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--queries', type=int, default=QUERIES)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    base = read_frame(SAMPLE_FILE.resolve())[['title', 'popularity']]
+    titles = make_titles(base, args.rows, rng)
+    popularity = rng.pareto(1.5, len(titles))
+    queries = make_queries(titles, rng, args.queries)
+
+    start = time.perf_counter()
+    index = TitleIndex.build(titles, popularity)
+    build = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        bin_path, manifest_path = out / "titles.bin", out / "titles.json"
+        index.save(bin_path, manifest_path)
+        raw = sum(p.stat().st_size for p in (bin_path, manifest_path))
+        packed = sum(len(gzip.compress(p.read_bytes(), 6)) for p in (bin_path, manifest_path))
+        start = time.perf_counter()
+        loaded = TitleIndex.load(bin_path, manifest_path)
+        load = time.perf_counter() - start
+
+        node = None
+        if shutil.which('node') is not None:
+            (out / "queries.json").write_text(json.dumps(queries))
+            proc = subprocess.run(['node', '--input-type=module', '-e', NODE_SCRIPT, str(INDEX_JS.resolve()), str(out)],
+                                  capture_output=True, text=True)
+            node = json.loads(proc.stdout) if proc.returncode == 0 else None
+
+    frame = pd.DataFrame({"title": titles})
+    scan = timings(lambda q: frame[frame['title'].str.contains(q, case=False, na=False, regex=False)].index[:6],
+                   queries["exact"][:SCAN_QUERIES])
+
+    print(f"titles               {len(titles)} ({len(loaded.keys)} distinct, {len(loaded.grams)} trigrams)")
+    print(f"build (s)            {build:.2f}")
+    print(f"artifact (MB)        {raw / 1e6:.2f} ({packed / 1e6:.2f} gzip)")
+    print(f"load (s)             python {load:.3f}" + (f", node {node['load']:.3f}" if node else ""))
+    print(f"\n{'lookup':<28} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    print(summary("str.contains scan", scan))
+    for op in ("exact", "prefix", "fuzzy"):
+        print(summary(f"python {op}", timings(getattr(loaded, op), queries[op])))
+    if node:
+        for op in ("exact", "prefix", "fuzzy"):
+            print(summary(f"node {op}", node[op]))
+
+    found = np.mean([bool(loaded.exact(q)) for q in queries["exact"]])
+    typo_hits = np.mean([bool(set(loaded.exact(t)) & {row for row, _ in loaded.fuzzy(q, 5)})
+                         for t, q in zip(queries["exact"][:200], queries["fuzzy"][:200])])
+    print(f"\nexact found {found:.1%}; fuzzy top-5 finds the intended title for {typo_hits:.1%} of typos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Size and parse time of the web payload: legacy plotpoint_data_3d.json vs the
+columnar export (binary points + manifest, overviews in their own shard).
+
+Rows are resampled from phase_c_embedded.csv with random coordinates and
+clusters. Parse time is measured in Python and, when `node` is on PATH, with
+the web app's own decoder (web_app/src/utils/columnar.js) against JSON.parse.
+
+    python benchmarks/bench_web_export.py --sizes 3000 50000 200000
+"""
+import argparse
+import contextlib
+import gzip
+import io
+import importlib
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from columnar import read_columnar
+from frames import read_frame
+
+SAMPLE_FILE = SRC_DIR / "../data/output/phase_c_embedded.csv"
+DECODER_JS = SRC_DIR / "../../web_app/src/utils/columnar.js"
+SIZES = [3_000, 50_000, 200_000]
+RANDOM_SEED = 42
+REPEATS = 3
+
+NODE_SCRIPT = """
+import fs from 'fs'
+import { pathToFileURL } from 'url'
+const [decoderPath, dir] = process.argv.slice(1)
+const { decodeColumnar } = await import(pathToFileURL(decoderPath).href)
+const best = fn => { let t = Infinity; for (let i = 0; i < %d; i++) { const s = performance.now(); fn(); t = Math.min(t, performance.now() - s) } return t / 1000 }
+const json = fs.readFileSync(dir + '/plotpoint_data_3d.json', 'utf8')
+const manifest = fs.readFileSync(dir + '/plotpoint_points.json', 'utf8')
+const bin = fs.readFileSync(dir + '/plotpoint_points.bin')
+const buffer = bin.buffer.slice(bin.byteOffset, bin.byteOffset + bin.byteLength)
+console.log(JSON.stringify({
+  json: best(() => JSON.parse(json)),
+  columnar: best(() => decodeColumnar(JSON.parse(manifest), buffer))
+}))
+""" % REPEATS
+
+
+def make_frame(base, n, rng):
+    df = base.sample(n=n, replace=n > len(base), random_state=RANDOM_SEED).reset_index(drop=True)
+    df['x'], df['y'], df['z'] = (rng.normal(0, 50, n) for _ in range(3))
+    df['cluster'] = rng.integers(-1, max(n // 100, 2), n)
+    df['cluster_confidence'] = rng.random(n)
+    return df
+
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def size_mb(*paths):
+    return sum(p.stat().st_size for p in paths) / 1e6
+
+
+def gzip_mb(*paths):
+    return sum(len(gzip.compress(p.read_bytes(), 6)) for p in paths) / 1e6
+
+
+def node_parse_times(out_dir):
+    if shutil.which('node') is None:
+        return None
+    out = subprocess.run(['node', '--input-type=module', '-e', NODE_SCRIPT, str(DECODER_JS.resolve()), str(out_dir)],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+
+    reduce_module = importlib.import_module("05_reduce_and_cluster")
+    base = read_frame(SAMPLE_FILE.resolve())
+    rng = np.random.default_rng(RANDOM_SEED)
+
+    print(f"{'rows':>8} {'format':<9} {'write (s)':>9} {'MB':>8} {'gzip MB':>8} "
+          f"{'first paint MB':>14} {'py parse (s)':>12} {'js parse (s)':>12}")
+    for n in args.sizes:
+        df = make_frame(base, n, rng)
+        ids = [str(i) for i in range(n)]
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp)
+            json_path = out / "plotpoint_data_3d.json"
+            bin_path, manifest_path = out / "plotpoint_points.bin", out / "plotpoint_points.json"
+            overviews_path = out / "plotpoint_overviews.json"
+
+            json_write = best_of(lambda: reduce_module.export_json(df, ids, json_path))
+            columnar_write = best_of(
+                lambda: reduce_module.export_columnar(df, ids, bin_path, manifest_path, overviews_path))
+
+            json_parse = best_of(lambda: json.loads(json_path.read_text(encoding='utf-8')))
+            columnar_parse = best_of(lambda: read_columnar(bin_path, manifest_path))
+            node = node_parse_times(out) or {}
+
+            rows = [
+                ("json", json_write, (json_path,), (json_path,), json_parse, node.get('json')),
+                ("columnar", columnar_write, (bin_path, manifest_path, overviews_path),
+                 (bin_path, manifest_path), columnar_parse, node.get('columnar')),
+            ]
+            for name, write, files, first_paint, py_parse, js_parse in rows:
+                js = f"{js_parse:>12.3f}" if js_parse is not None else f"{'-':>12}"
+                print(f"{n:>8} {name:<9} {write:>9.2f} {size_mb(*files):>8.2f} {gzip_mb(*files):>8.2f} "
+                      f"{size_mb(*first_paint):>14.2f} {py_parse:>12.3f} {js}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Write a synthetic TMDB-shaped movies.csv of any size.
+
+Rows carry the full TMDB export header. genres, keywords,
+production_companies, production_countries and spoken_languages are
+stringified lists of dicts ("[{'id': 18, 'name': 'Drama'}]"), as in the TMDB
+dumps. Every movie belongs to one of a few topics. A topic sets its genres,
+keyword pool, overview vocabulary, studios and languages, so the catalog has
+real structure for the embeddings and clusters to find. About
+--pass-rate of the rows clear step 01's quality filters; the rest fail one of
+them (low vote count, short runtime, no overview or keywords).
+
+    python benchmarks/synthetic_catalog.py 100000 data/input/movies_100k.csv --seed 7
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['id', 'title', 'vote_average', 'vote_count', 'status', 'release_date', 'revenue', 'runtime', 'adult',
+           'backdrop_path', 'budget', 'homepage', 'imdb_id', 'original_language', 'original_title', 'overview',
+           'popularity', 'poster_path', 'tagline', 'genres', 'production_companies', 'production_countries',
+           'spoken_languages', 'keywords', 'media_type']
+CHUNK_SIZE = 100_000
+PASS_RATE = 0.9
+RANDOM_SEED = 42
+
+GENRES = {
+    28: 'Action', 12: 'Adventure', 16: 'Animation', 35: 'Comedy', 80: 'Crime', 99: 'Documentary',
+    18: 'Drama', 10751: 'Family', 14: 'Fantasy', 36: 'History', 27: 'Horror', 10402: 'Music',
+    9648: 'Mystery', 10749: 'Romance', 878: 'Science Fiction', 53: 'Thriller', 10752: 'War', 37: 'Western'
+}
+LANGUAGES = {
+    'en': ('US', 'United States of America', 'English'), 'fr': ('FR', 'France', 'French'),
+    'hi': ('IN', 'India', 'Hindi'), 'ja': ('JP', 'Japan', 'Japanese'), 'ko': ('KR', 'South Korea', 'Korean'),
+    'es': ('ES', 'Spain', 'Spanish'), 'de': ('DE', 'Germany', 'German'), 'it': ('IT', 'Italy', 'Italian')
+}
+
+# genres, keywords, overview nouns, languages (most common first); every topic has
+# KEYWORDS_PER_TOPIC keywords and NOUNS_PER_TOPIC nouns
+TOPICS = [
+    ([878, 12, 28], ['space', 'alien', 'spaceship', 'time travel', 'artificial intelligence', 'dystopia',
+                     'robot', 'future', 'planet', 'astronaut'],
+     ['crew', 'starship', 'colony', 'signal', 'android', 'galaxy', 'mission'], ['en', 'ja', 'fr']),
+    ([80, 53, 18], ['heist', 'detective', 'murder', 'gangster', 'police', 'revenge', 'drug cartel',
+                    'undercover', 'prison', 'corruption'],
+     ['detective', 'gang', 'witness', 'city', 'crime', 'cop', 'syndicate'], ['en', 'ko', 'hi', 'fr']),
+    ([35, 10749], ['wedding', 'love', 'new york city', 'friendship', 'romantic comedy', 'paris', 'dating',
+                   'roommate', 'holiday', 'office'],
+     ['couple', 'bride', 'neighbor', 'romance', 'date', 'heart', 'family'], ['en', 'fr', 'es', 'it']),
+    ([27, 9648, 53], ['haunted house', 'ghost', 'demon', 'possession', 'serial killer', 'curse', 'cabin',
+                      'witch', 'zombie', 'slasher'],
+     ['house', 'spirit', 'killer', 'curse', 'nightmare', 'town', 'woods'], ['en', 'ja', 'ko', 'es']),
+    ([16, 10751, 14], ['magic', 'talking animal', 'princess', 'dragon', 'friendship', 'adventure', 'fairy tale',
+                       'toy', 'kingdom', 'musical'],
+     ['princess', 'kingdom', 'dragon', 'forest', 'friends', 'wizard', 'village'], ['en', 'ja', 'fr']),
+    ([10752, 36, 18], ['world war ii', 'soldier', 'battle', 'biography', 'resistance', 'nazi', 'veteran',
+                       'empire', 'revolution', 'historical figure'],
+     ['soldier', 'battalion', 'front', 'general', 'empire', 'war', 'nation'], ['en', 'de', 'fr', 'ja']),
+    ([18, 10402], ['coming of age', 'musician', 'band', 'family drama', 'small town', 'grief', 'addiction',
+                   'high school', 'singer', 'father son relationship'],
+     ['family', 'band', 'school', 'mother', 'song', 'dream', 'summer'], ['en', 'hi', 'fr', 'ko']),
+    ([37, 28], ['cowboy', 'frontier', 'gunslinger', 'outlaw', 'bounty hunter', 'desert', 'sheriff', 'train',
+                'gold', 'duel'],
+     ['sheriff', 'outlaw', 'frontier', 'ranch', 'posse', 'town', 'desert'], ['en', 'it', 'es']),
+    ([99], ['nature', 'music documentary', 'politics', 'sports', 'environment', 'true story', 'interview',
+            'ocean', 'history', 'science'],
+     ['planet', 'ocean', 'team', 'archive', 'scientists', 'nation', 'climate'], ['en', 'fr', 'de']),
+    ([28, 53, 80], ['martial arts', 'assassin', 'spy', 'terrorist', 'car chase', 'mercenary', 'bodyguard',
+                    'kidnapping', 'secret agent', 'explosion'],
+     ['agent', 'assassin', 'target', 'mission', 'syndicate', 'hostage', 'city'], ['en', 'hi', 'ko', 'ja']),
+]
+COMMON_KEYWORDS = ['based on novel or book', 'sequel', 'independent film', 'remake', 'woman director',
+                   'based on true story', 'duringcreditsstinger', 'aftercreditsstinger']
+VERBS = ['must stop', 'discovers', 'hunts', 'protects', 'escapes', 'betrays', 'searches for', 'confronts',
+         'falls for', 'uncovers']
+ADJECTIVES = ['Last', 'Dark', 'Silent', 'Broken', 'Golden', 'Lost', 'Hidden', 'Final', 'Wild', 'Burning']
+SUFFIXES = ['', '', '', '', ' II', ' Returns', ' Rising', ': Origins']
+TAGLINES = ['Nothing will ever be the same.', 'Some secrets stay buried.', 'Every story has an end.',
+            'The hunt begins.', 'Love finds a way.', '', '']
+KEYWORDS_PER_TOPIC = 10
+NOUNS_PER_TOPIC = 7
+STUDIOS_PER_TOPIC = 6
+KEYWORD_ID_BASE = 1000
+STUDIO_ID_BASE = 100
+
+
+def dict_list(items):
+    """TMDB's stringified list of dicts: "[{'id': 1, 'name': 'x'}, ...]"."""
+    return '[' + ', '.join(items) + ']'
+
+
+def id_name(item_id, name):
+    return f"{{'id': {item_id}, 'name': {name!r}}}"
+
+
+class Vocabulary:
+    """Pre-rendered dict strings per topic, so rows are joins of cached pieces."""
+
+    def __init__(self):
+        self.genres = {gid: id_name(gid, name) for gid, name in GENRES.items()}
+        keywords = sorted({k for topic in TOPICS for k in topic[1]} | set(COMMON_KEYWORDS))
+        self.keywords = {k: id_name(KEYWORD_ID_BASE + i, k) for i, k in enumerate(keywords)}
+        self.studios = [
+            [id_name(STUDIO_ID_BASE + t * STUDIOS_PER_TOPIC + s, f"{ADJECTIVES[s]} {topic[2][0].title()} Pictures")
+             for s in range(STUDIOS_PER_TOPIC)]
+            for t, topic in enumerate(TOPICS)
+        ]
+        self.countries = {lang: f"{{'iso_3166_1': '{c[0]}', 'name': '{c[1]}'}}" for lang, c in LANGUAGES.items()}
+        self.spoken = {lang: f"{{'english_name': '{c[2]}', 'iso_639_1': '{lang}', 'name': '{c[2]}'}}"
+                       for lang, c in LANGUAGES.items()}
+
+
+def generate_chunk(rng, vocab, start, size, pass_rate=PASS_RATE):
+    """One DataFrame of `size` movies with ids from `start`."""
+    topic = rng.integers(0, len(TOPICS), size)
+    ids = np.arange(start, start + size) + 1
+
+    # Rows that will fail step 01 fail one filter each
+    fails = rng.random(size) >= pass_rate
+    failure = np.where(fails, rng.integers(0, 4, size), -1)
+
+    vote_count = np.round(np.exp(rng.normal(7.5, 1.2, size))).astype(np.int64) + 500
+    vote_count[failure == 0] = rng.integers(0, 500, int((failure == 0).sum()))
+    runtime = np.clip(np.round(rng.normal(108, 18, size)), 60, 240).astype(np.int64)
+    runtime[failure == 1] = rng.integers(5, 60, int((failure == 1).sum()))
+    popularity = np.round(5 + np.exp(rng.normal(2.5, 1.0, size)), 3)
+    year = np.clip(np.round(2024 - rng.exponential(18, size)), 1920, 2024).astype(np.int64)
+    month, day = rng.integers(1, 13, size), rng.integers(1, 29, size)
+    budget = np.where(rng.random(size) < 0.5, 0, np.round(np.exp(rng.normal(16.5, 1.2, size)), -3)).astype(np.int64)
+    revenue = np.where(budget > 0, np.round(budget * rng.lognormal(0.7, 0.8, size), -3), 0).astype(np.int64)
+
+    # Per-row draws up front; the loop below only indexes and joins
+    order = lambda n: np.argsort(rng.random((size, n)), axis=1)
+    noun_order, keyword_order, studio_order, genre_order = (
+        order(NOUNS_PER_TOPIC), order(KEYWORDS_PER_TOPIC), order(STUDIOS_PER_TOPIC), order(3))
+    genre_count, keyword_count = rng.integers(1, 4, size), rng.integers(3, 8, size)
+    studio_count = rng.integers(1, 3, size)
+    language_rank = rng.geometric(0.55, size) - 1
+    adjective, suffix = rng.integers(len(ADJECTIVES), size=size), rng.integers(len(SUFFIXES), size=size)
+    verbs, tagline = rng.integers(len(VERBS), size=(size, 2)), rng.integers(len(TAGLINES), size=size)
+    extra_genre = np.where(rng.random(size) < 0.2, rng.integers(len(GENRES), size=size), -1)
+    common_keyword = np.where(rng.random(size) < 0.3, rng.integers(len(COMMON_KEYWORDS), size=size), -1)
+    genre_ids = list(GENRES)
+
+    titles, overviews, genres, keywords, studios, countries, spoken, languages = ([] for _ in range(8))
+    for i in range(size):
+        t = topic[i]
+        topic_genres, topic_keywords, nouns, topic_languages = TOPICS[t]
+        lang = topic_languages[min(language_rank[i], len(topic_languages) - 1)]
+        a, b, c = (nouns[j] for j in noun_order[i, :3])
+        titles.append(f"{ADJECTIVES[adjective[i]]} {a.title()}{SUFFIXES[suffix[i]]}")
+        overviews.append('' if failure[i] == 2 else
+                         f"The {a} {VERBS[verbs[i, 0]]} the {b} before the {c} {VERBS[verbs[i, 1]]} "
+                         f"everything they know. Set in {year[i]}.")
+        chosen = [topic_genres[j] for j in genre_order[i] if j < len(topic_genres)][:genre_count[i]]
+        if extra_genre[i] >= 0 and genre_ids[extra_genre[i]] not in chosen:
+            chosen.append(genre_ids[extra_genre[i]])
+        genres.append(dict_list([vocab.genres[g] for g in chosen]))
+        words = [] if failure[i] == 3 else [topic_keywords[j] for j in keyword_order[i, :keyword_count[i]]]
+        if words and common_keyword[i] >= 0:
+            words.append(COMMON_KEYWORDS[common_keyword[i]])
+        keywords.append(dict_list([vocab.keywords[k] for k in words]))
+        studios.append(dict_list([vocab.studios[t][j] for j in studio_order[i, :studio_count[i]]]))
+        countries.append(dict_list([vocab.countries[lang]]))
+        spoken.append(dict_list([vocab.spoken[lang]]))
+        languages.append(lang)
+
+    dates = pd.to_datetime({'year': year, 'month': month, 'day': day}).dt.strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        'id': ids,
+        'title': titles,
+        'vote_average': np.round(np.clip(rng.normal(6.6, 0.9, size), 1, 10), 3),
+        'vote_count': vote_count,
+        'status': 'Released',
+        'release_date': dates.to_numpy(),
+        'revenue': revenue,
+        'runtime': runtime,
+        'adult': False,
+        'backdrop_path': [f"/b{i:012x}.jpg" for i in ids],
+        'budget': budget,
+        'homepage': '',
+        'imdb_id': [f"tt{i:08d}" for i in ids],
+        'original_language': languages,
+        'original_title': titles,
+        'overview': overviews,
+        'popularity': popularity,
+        'poster_path': [f"/p{i:012x}.jpg" for i in ids],
+        'tagline': np.asarray(TAGLINES, dtype=object)[tagline],
+        'genres': genres,
+        'production_companies': studios,
+        'production_countries': countries,
+        'spoken_languages': spoken,
+        'keywords': keywords,
+        'media_type': 'movie'
+    }, columns=COLUMNS)
+
+
+def write_catalog(path, rows, seed=RANDOM_SEED, chunk_size=CHUNK_SIZE, pass_rate=PASS_RATE):
+    """Write `rows` synthetic movies to `path` in chunks. Same seed, same file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    vocab = Vocabulary()
+    for start in range(0, rows, chunk_size):
+        chunk = generate_chunk(rng, vocab, start, min(chunk_size, rows - start), pass_rate)
+        chunk.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    parser.add_argument('--pass-rate', type=float, default=PASS_RATE,
+                        help="Share of rows that pass step 01's quality filters.")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    path = write_catalog(args.path, args.rows, args.seed, pass_rate=args.pass_rate)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.rows:,} movies to {path} ({path.stat().st_size / 1e6:.0f} MB) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
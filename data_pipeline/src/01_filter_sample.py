@@ -1,20 +1,53 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
+import time
 from pathlib import Path
 
+from instrumentation import peak_rss_mb, span, instrumented
+from sampling import StratifiedReservoir, STRATUM_BALANCE, summarize_coverage
+
 # Configuration
 INPUT_FILE = "../data/input/movies.csv"  # The user needs to place their dataset here
 OUTPUT_FILE = "../data/output/phase_a_filtered_movies.csv"
+COVERAGE_FILE = "../data/output/sample_coverage.csv"
 TARGET_SIZE = 3000  # Approx target size mentioned in plan (2500-3500)
 RANDOM_SEED = 42
 
-def load_data(filepath):
+# Sampling: stratified by language, era and primary genre, popularity-weighted within
+# each stratum (see sampling.py). 1 = strata in catalog proportion, 0 = equal shares.
+stratum_balance = STRATUM_BALANCE
+
+# Streaming mode
+CHUNK_SIZE = 100_000
+# Only the columns used by later stages are read; the dump's other columns
+# (cast blobs, taglines, homepages, ...) never reach memory.
+PIPELINE_COLUMNS = [
+    'id', 'title', 'overview', 'genres', 'keywords', 'production_companies',
+    'release_date', 'runtime', 'popularity', 'vote_count', 'vote_average',
+    'original_language', 'poster_path'
+]
+PARQUET_SUFFIXES = {'.parquet', '.pq'}
+ARROW_SUFFIXES = {'.arrow', '.feather', '.ipc'}
+
+def load_data(filepath, columns=PIPELINE_COLUMNS):
+    """Read the whole source, pruned to the same columns as the streaming path (iter_chunks)."""
     print(f"Loading dataset from {filepath}...")
     try:
-        # Assuming a standard CSV format, potentially with various separators if needed
-        # We can try reading with low_memory=False to avoid mixed type warnings
-        df = pd.read_csv(filepath, low_memory=False)
+        suffix = Path(filepath).suffix.lower()
+        if suffix in PARQUET_SUFFIXES:
+            import pyarrow.parquet as pq
+            names = pq.ParquetFile(filepath).schema_arrow.names
+            df = pd.read_parquet(filepath, columns=[c for c in columns if c in names])
+        elif suffix in ARROW_SUFFIXES:
+            import pyarrow.dataset as ds
+            dataset = ds.dataset(filepath, format='arrow')
+            df = dataset.to_table(columns=[c for c in columns if c in dataset.schema.names]).to_pandas()
+        else:
+            # We can try reading with low_memory=False to avoid mixed type warnings
+            wanted = set(columns)
+            df = pd.read_csv(filepath, usecols=lambda c: c in wanted, low_memory=False)
         print(f"Initial shape: {df.shape}")
         return df
     except FileNotFoundError:
@@ -22,8 +55,67 @@ def load_data(filepath):
         print("Please place the source dataset (movies.csv) in data_pipeline/data/input/")
         return None
 
-def filter_data(df):
-    print("Applying filters...")
+def iter_chunks(filepath, chunk_size=CHUNK_SIZE, columns=PIPELINE_COLUMNS):
+    """Yield column-pruned DataFrame chunks from a CSV, Parquet or Arrow IPC file."""
+    suffix = Path(filepath).suffix.lower()
+    if suffix in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(filepath)
+        present = [c for c in columns if c in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=present):
+            yield batch.to_pandas()
+    elif suffix in ARROW_SUFFIXES:
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(filepath, format='arrow')
+        present = [c for c in columns if c in dataset.schema.names]
+        for batch in dataset.to_batches(columns=present, batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        wanted = set(columns)
+        reader = pd.read_csv(
+            filepath,
+            usecols=lambda c: c in wanted,
+            chunksize=chunk_size,
+            low_memory=False
+        )
+        for chunk in reader:
+            yield chunk
+
+def load_filtered_streaming(filepath, reservoir, chunk_size=CHUNK_SIZE):
+    """Stream the source in chunks and fold the rows passing filter_data into the sampler.
+
+    Only the sampler's reservoirs stay in memory, so neither the full dump nor
+    the filtered candidate pool is ever materialized. Returns the number of
+    candidates, or None when the file is missing.
+    """
+    print(f"Streaming dataset from {filepath} (chunks of {chunk_size} rows)...")
+    start = time.perf_counter()
+    rows_read = 0
+    candidates = 0
+    try:
+        with span("load") as load:
+            for chunk in iter_chunks(filepath, chunk_size):
+                rows_read += len(chunk)
+                with span("filter", rows=len(chunk)):
+                    filtered = filter_data(chunk, verbose=False)
+                candidates += len(filtered)
+                with span("reservoir", rows=len(filtered)):
+                    reservoir.add(filtered)
+            load.rows = rows_read
+    except FileNotFoundError:
+        print(f"Error: {filepath} not found.")
+        print("Please place the source dataset (movies.csv) in data_pipeline/data/input/")
+        return None
+
+    elapsed = time.perf_counter() - start
+    print(f"Read {rows_read} rows in {elapsed:.1f}s ({rows_read / max(elapsed, 1e-9):,.0f} rows/sec)")
+    print(f"Rows after filtering: {candidates} (Removed {rows_read - candidates})")
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+    return candidates
+
+def filter_data(df, verbose=True):
+    if verbose:
+        print("Applying filters...")
     initial_count = len(df)
     
     # Ensure numeric columns are numeric
@@ -42,71 +134,96 @@ def filter_data(df):
     )
     
     filtered_df = df[mask].copy()
-    print(f"Rows after filtering: {len(filtered_df)} (Removed {initial_count - len(filtered_df)})")
+    if verbose:
+        print(f"Rows after filtering: {len(filtered_df)} (Removed {initial_count - len(filtered_df)})")
     
     # 2. Add media_type (future-proofing)
     filtered_df['media_type'] = 'movie'
     
     return filtered_df
 
-def sample_data(df, target_size):
-    print(f"Sampling down to approx {target_size} rows...")
-    
-    if len(df) <= target_size:
+def sample_data(reservoir):
+    """Draw the stratified sample from the filled reservoir and print its coverage."""
+    print(f"Sampling down to approx {reservoir.target_size} rows "
+          f"(stratified by language/era/genre, seed {reservoir.seed})...")
+    final_df = reservoir.sample()
+    if reservoir.duplicates:
+        print(f"Skipped {reservoir.duplicates} rows with duplicate ids.")
+    if len(final_df) < reservoir.target_size:
         print("Dataset smaller than target size. Keeping all.")
-        return df
-        
-    # Sort by popularity descending
-    df_sorted = df.sort_values(by='popularity', ascending=False).reset_index(drop=True)
-    
-    # Strategy: 
-    # 70% from top-popularity movies
-    # 30% randomly sampled from mid-popularity range
-    
-    top_n_count = int(target_size * 0.70)
-    random_n_count = target_size - top_n_count
-    
-    # Take top 70% chunk
-    top_tier = df_sorted.iloc[:top_n_count]
-    
-    # Take random 30% from the rest (mid-popularity)
-    # We'll define "rest" as everything else. 
-    # Or to be safe, maybe next 2*target_size to ensure quality? 
-    # The plan says "mid-popularity range", implying we shouldn't take the absolute tail.
-    # Let's take from the next portion of the list.
-    
-    remaining = df_sorted.iloc[top_n_count:]
-    
-    if len(remaining) > random_n_count:
-        random_tier = remaining.sample(n=random_n_count, random_state=RANDOM_SEED)
-    else:
-        random_tier = remaining
-        
-    # Combine and shuffle
-    final_df = pd.concat([top_tier, random_tier]).sample(frac=1, random_state=RANDOM_SEED).reset_index(drop=True)
-    
+    print(summarize_coverage(reservoir.coverage()))
     print(f"Final sampled shape: {final_df.shape}")
     return final_df
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Filter and sample the raw movie dump.")
+    parser.add_argument('--input', default=None,
+                        help="Source dataset (.csv, .parquet or .arrow/.feather). Defaults to INPUT_FILE.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read column-pruned chunks and filter each one instead of loading the whole file.")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--target-size', type=int, default=TARGET_SIZE)
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED)
+    return parser.parse_args()
+
+def filter_sample(input_path, stream=False, chunk_size=CHUNK_SIZE, target_size=TARGET_SIZE, seed=RANDOM_SEED,
+                  coverage_path=None):
+    """Load, filter and sample the source dataset. Returns None when nothing is left.
+
+    The per-stratum coverage report (candidates vs sampled rows) is written to
+    coverage_path when given.
+    """
+    reservoir = StratifiedReservoir(target_size, seed, stratum_balance)
+    if stream:
+        if load_filtered_streaming(input_path, reservoir, chunk_size) is None:
+            return None
+    else:
+        start = time.perf_counter()
+        with span("load") as load:
+            df = load_data(input_path)
+            load.rows = 0 if df is None else len(df)
+        if df is None:
+            return None
+        with span("filter", rows=len(df)):
+            filtered = filter_data(df)
+        with span("reservoir", rows=len(filtered)):
+            reservoir.add(filtered)
+        elapsed = time.perf_counter() - start
+        print(f"Processed {len(df)} rows in {elapsed:.1f}s ({len(df) / max(elapsed, 1e-9):,.0f} rows/sec)")
+        print(f"Peak RSS: {peak_rss_mb():.0f} MB")
+        del df
+
+    if reservoir.kept is None:
+        print("No data left after filtering.")
+        return None
+    with span("sample") as sample:
+        final_df = sample_data(reservoir)
+        sample.rows = len(final_df)
+    if coverage_path is not None:
+        Path(coverage_path).parent.mkdir(parents=True, exist_ok=True)
+        reservoir.coverage().to_csv(coverage_path, index=False)
+        print(f"Saved per-stratum coverage to {coverage_path}")
+    return final_df
+
 def main():
+    args = parse_args()
+
     # Resolve paths relative to script
     script_dir = Path(__file__).parent
-    input_path = (script_dir / INPUT_FILE).resolve()
+    input_path = Path(args.input).resolve() if args.input else (script_dir / INPUT_FILE).resolve()
     output_path = (script_dir / OUTPUT_FILE).resolve()
-    
-    df = load_data(input_path)
-    if df is not None:
-        filtered_df = filter_data(df)
-        if not filtered_df.empty:
-            final_df = sample_data(filtered_df, TARGET_SIZE)
-            
+    coverage_path = (script_dir / COVERAGE_FILE).resolve()
+
+    with instrumented("01_filter_sample"):
+        final_df = filter_sample(input_path, args.stream, args.chunk_size, args.target_size, args.seed,
+                                 coverage_path)
+        if final_df is not None:
             # Ensure output directory exists
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            final_df.to_csv(output_path, index=False)
+
+            with span("save", rows=len(final_df)):
+                final_df.to_csv(output_path, index=False)
             print(f"Saved processed dataset to {output_path}")
-        else:
-            print("No data left after filtering.")
 
 if __name__ == "__main__":
     main()
@@ -1,106 +1,390 @@
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import torch
+import argparse
+import queue
+import threading
+import time
 from pathlib import Path
 from tqdm import tqdm
 import chromadb
-from chromadb.utils import embedding_functions
+
+from embedding_cache import EmbeddingCache, content_hash
+from encoders import BACKENDS, cache_key, iter_encode
+from embedding_store import stable_ids, save_embedding_matrix, load_embedding_matrix
+from views import VIEW_FIELDS, view_texts, view_paths, load_weights, row_hashes, combine_views
+from frames import latest_frame_path, read_frame
+from instrumentation import span, instrumented
 
 INPUT_FILE = "../data/output/phase_b_normalized.csv"
 CHROMA_DB_PATH = "../data/output/chroma_db"
 COLLECTION_NAME = "plotpoint_movies"
 OUTPUT_DF_WITH_REF = "../data/output/phase_c_embedded.csv"
+CACHE_FILE = "../data/output/embedding_cache.sqlite"
+EMBEDDINGS_FILE = "../data/output/embeddings.npy"
+EMBEDDING_IDS_FILE = "../data/output/embedding_ids.json"
+VIEWS_DIR = "../data/output/views" # per-field matrices in --views mode
+VIEW_WEIGHTS_FILE = "../data/output/views/weights.json" # written by reweight_views.py
 
 # Model Config
 MODEL_NAME = 'all-mpnet-base-v2' # optimized for semantic search
+ENCODER_BACKEND = 'torch' # see encoders.BACKENDS; check alternatives with check_backend.py first
 BATCH_SIZE = 32
+# CPU throughput mode (ignored on CUDA)
+ENCODE_WORKERS = 1
+THREADS_PER_WORKER = None # default: cpu_count // workers
+# Rows per upsert, capped by the client's max batch size. Upsert throughput is flat
+# from a few hundred rows up, and smaller batches start writing sooner.
+CHROMA_BATCH_SIZE = 1024
+CHROMA_QUEUE_BATCHES = 2 # full batches waiting for the writer before encoding blocks
 
-def main():
-    script_dir = Path(__file__).parent
-    input_path = (script_dir / INPUT_FILE).resolve()
-    chroma_path = (script_dir / CHROMA_DB_PATH).resolve()
-    df_output_path = (script_dir / OUTPUT_DF_WITH_REF).resolve()
-    
-    if not input_path.exists():
-        print("Input file not found. Run 02_normalize.py first.")
-        return
-        
-    df = pd.read_csv(input_path)
-    
-    # Check if we have the text column
-    if 'embedding_input' not in df.columns:
-        print("Error: 'embedding_input' column missing.")
-        return
+def encode_with_cache(sentences, hashes, cache, workers=ENCODE_WORKERS, threads_per_worker=THREADS_PER_WORKER,
+                      backend=ENCODER_BACKEND, on_ready=None):
+    """Return embeddings for all sentences, encoding only cache misses.
+
+    `on_ready(rows, embeddings)` is called as soon as rows hold their final
+    vector: the cache hits first, then each encoded shard.
+    """
+    with span("cache_lookup", rows=len(hashes)):
+        cached = cache.get_many(hashes)
+    # Repeated texts (e.g. the same era label on many movies) are encoded once
+    miss_rows = {}
+    for i, h in enumerate(hashes):
+        if h not in cached:
+            miss_rows.setdefault(h, []).append(i)
+    miss_hashes = list(miss_rows)
+    print(f"Embedding cache: {len(sentences) - sum(map(len, miss_rows.values()))} hits, {len(miss_hashes)} misses")
+
+    embeddings = None
+    if cached:
+        embeddings = np.empty((len(sentences), next(iter(cached.values())).shape[0]), dtype=np.float32)
+        hit_rows = [i for i, h in enumerate(hashes) if h in cached]
+        for i in hit_rows:
+            embeddings[i] = cached[hashes[i]]
+        if on_ready and hit_rows:
+            on_ready(hit_rows, embeddings)
+
+    if miss_hashes:
+        print(f"Generating embeddings for {len(miss_hashes)} items with {cache_key(MODEL_NAME, backend)}...")
+        shards = iter_encode(MODEL_NAME, [sentences[miss_rows[h][0]] for h in miss_hashes], batch_size=BATCH_SIZE,
+                             workers=workers, threads_per_worker=threads_per_worker, backend=backend)
+        with span("encode", rows=len(miss_hashes)), tqdm(total=len(miss_hashes), unit='text') as progress:
+            for positions, vectors in shards:
+                if embeddings is None:
+                    embeddings = np.empty((len(sentences), vectors.shape[1]), dtype=np.float32)
+                shard_hashes = [miss_hashes[p] for p in positions]
+                with span("cache_write", rows=len(shard_hashes)):
+                    cache.put_many(shard_hashes, vectors)
+                rows = []
+                for h, vector in zip(shard_hashes, vectors):
+                    embeddings[miss_rows[h]] = vector
+                    rows.extend(miss_rows[h])
+                if on_ready:
+                    on_ready(rows, embeddings)
+                progress.update(len(positions))
+    return embeddings
+
+def encode_views(df, ids, cache, model_key, views_dir, weights, workers=ENCODE_WORKERS,
+                 threads_per_worker=THREADS_PER_WORKER, backend=ENCODER_BACKEND):
+    """Encode every view field separately (cache first), save the per-field matrices and combine them.
+
+    Returns (row-aligned combined embeddings, per-row content hashes).
+    """
+    views_dir.mkdir(parents=True, exist_ok=True)
+    field_hashes = {}
+    dim = None
+    for field, texts in view_texts(df).items():
+        present = [i for i, text in enumerate(texts) if text]
+        hashes = [content_hash(text) if text else None for text in texts]
+        field_hashes[field] = hashes
+        print(f"View '{field}': {len(present)} movies, {len({hashes[i] for i in present})} distinct texts")
+        if not present:
+            continue
+        with span(field, rows=len(present)):
+            vectors = encode_with_cache([texts[i] for i in present], [hashes[i] for i in present], cache,
+                                        workers, threads_per_worker, backend)
+        dim = vectors.shape[1]
+        matrix = np.zeros((len(texts), dim), dtype=np.float32)
+        matrix[present] = vectors
+        save_embedding_matrix(matrix, ids, *view_paths(views_dir, field), model_key)
+
+    # Fields nobody has are stored as zeros so every view matrix exists and lines up
+    for field in VIEW_FIELDS:
+        if not any(h is not None for h in field_hashes[field]):
+            save_embedding_matrix(np.zeros((len(ids), dim), dtype=np.float32), ids,
+                                  *view_paths(views_dir, field), model_key)
+
+    with span("combine", rows=len(ids)):
+        views = {field: load_embedding_matrix(*view_paths(views_dir, field), ids) for field in VIEW_FIELDS}
+        embeddings = combine_views(views, weights)
+    print(f"Combined views with weights {', '.join(f'{f}={w:g}' for f, w in weights.items())}")
+    return embeddings, row_hashes(field_hashes, weights)
+
+def get_stored_hashes(collection, page_size=5000):
+    """Map every id in the collection to the content hash it was stored with."""
+    stored = {}
+    offset = 0
+    while True:
+        page = collection.get(include=['metadatas'], limit=page_size, offset=offset)
+        if not page['ids']:
+            break
+        for item_id, meta in zip(page['ids'], page['metadatas']):
+            stored[item_id] = (meta or {}).get('content_hash')
+        offset += len(page['ids'])
+    return stored
+
+def open_collection(client, model_key, rebuild=False):
+    """Get the collection, recreating it when asked or when the model changed."""
+    if not rebuild:
+        try:
+            collection = client.get_collection(name=COLLECTION_NAME)
+            if (collection.metadata or {}).get('embedding_model') == model_key:
+                return collection
+            print("Collection was built with a different model. Rebuilding...")
+        except Exception:
+            pass # collection didn't exist
 
-    sentences = df['embedding_input'].tolist()
-    
-    print(f"Loading model {MODEL_NAME}...")
-    # Chroma can handle embedding generation automatically, but for control and batching
-    # consistent with previous steps, we will generate them explicitly or use Chroma's built-in if we prefer.
-    # To keep dependencies simple, let's stick to SentenceTransformer explicit generation or pass the ef to chroma.
-    # We'll generate explicitly to ensure we have the vectors for downstream UMAP easily without querying everything back immediately,
-    # though Chroma is the storage now.
-    
-    device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    print(f"Using device: {device}")
-    
-    model = SentenceTransformer(MODEL_NAME, device=device)
-    
-    print(f"Generating embeddings for {len(sentences)} items...")
-    embeddings = model.encode(sentences, batch_size=BATCH_SIZE, show_progress_bar=True)
-    
-    print(f"Embeddings shape: {embeddings.shape}")
-    
-    # --- CHROMA DB SETUP ---
-    print(f"Initializing ChromaDB at {chroma_path}...")
-    client = chromadb.PersistentClient(path=str(chroma_path))
-    
-    # Reset/Get collection
     try:
         client.delete_collection(name=COLLECTION_NAME)
-    except:
+    except Exception:
         pass # collection didn't exist
-        
-    collection = client.create_collection(
+
+    return client.create_collection(
         name=COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"} # PlotPoint logic uses cosine similarity
+        metadata={
+            "hnsw:space": "cosine", # PlotPoint logic uses cosine similarity
+            "embedding_model": model_key
+        }
     )
-    
-    print("Storing embeddings in ChromaDB...")
-    
-    # Prepare data for Chroma
-    ids = [str(i) for i in range(len(df))]
-    metadatas = []
-    
-    # We only store essential metadata for retrieval/filtering if needed. 
-    # The full data is in the CSV or can be stored here.
-    # Let's store title and genre for basic inspection.
-    for _, row in df.iterrows():
-        metadatas.append({
-            "title": row['title'],
-            "era": str(row['era']),
-            "genres": str(row['genres_list'])
-        })
-        
-    # Add to collection in batches (Chroma handles batching but explicit is safe)
-    batch_size = 500
-    for i in range(0, len(ids), batch_size):
-        end = min(i + batch_size, len(ids))
-        collection.add(
-            embeddings=embeddings[i:end].tolist(),
-            documents=sentences[i:end],
-            metadatas=metadatas[i:end],
-            ids=ids[i:end]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Embed movies and store them in ChromaDB.")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Drop and refill the Chroma collection (the embedding cache is still used).")
+    parser.add_argument('--backend', choices=BACKENDS, default=ENCODER_BACKEND,
+                        help="Encoder backend. int8/onnx backends run on CPU.")
+    parser.add_argument('--workers', type=int, default=ENCODE_WORKERS,
+                        help="Encoder processes for CPU-only nodes.")
+    parser.add_argument('--threads-per-worker', type=int, default=THREADS_PER_WORKER,
+                        help="Torch threads per encoder process.")
+    parser.add_argument('--views', action='store_true',
+                        help="Encode each field separately and combine them with the view weights "
+                             "(see reweight_views.py) instead of encoding one text per movie.")
+    return parser.parse_args()
+
+class ChromaWriter:
+    """Upserts finished rows into the collection from a background thread.
+
+    The encoder hands over rows as they get their vectors (submit); rows are
+    grouped into upserts of `batch_size` and queued, so Chroma writes one
+    batch while the next one encodes. Only rows whose content hash differs
+    from the stored one are written. finish() flushes the rest, waits for the
+    writer, drops removed ids and re-raises a failed upsert.
+    """
+    def __init__(self, collection, df, ids, hashes, changed, removed, batch_size):
+        self.collection = collection
+        self.ids = ids
+        self.hashes = hashes
+        self.changed = changed
+        self.removed = removed
+        self.batch_size = batch_size
+        # Metadata columns, built once from the frame (no per-row df access)
+        self.documents = df['embedding_input'].tolist()
+        self.titles = df['title'].tolist()
+        self.eras = [str(era) for era in df['era']]
+        self.genres = [str(genres) for genres in df['genres_list']]
+        self.pending = []
+        self.embeddings = None # matrix the pending rows belong to
+        self.written = 0
+        self.busy = 0.0
+        self.error = None
+        self.queue = queue.Queue(maxsize=CHROMA_QUEUE_BATCHES)
+        self.thread = threading.Thread(target=self._run, name="chroma-writer", daemon=True)
+        self.thread.start()
+
+    def _upsert(self, rows, vectors):
+        self.collection.upsert(
+            ids=[self.ids[i] for i in rows],
+            embeddings=vectors,
+            documents=[self.documents[i] for i in rows],
+            metadatas=[
+                {"title": self.titles[i], "era": self.eras[i], "genres": self.genres[i],
+                 "content_hash": self.hashes[i]}
+                for i in rows
+            ]
         )
-        
-    print(f"Successfully stored {len(ids)} items in collection '{COLLECTION_NAME}'.")
-
-    # Save a reference DF that confirms these embeddings align with this data version?
-    # We still need the main DF for the UMAP step unless we pull everything from Chroma.
-    # For the pipeline flow, we'll keep the CSV as the master metadata record.
-    df.to_csv(df_output_path, index=False)
-    print(f"Saved reference dataframe to {df_output_path}")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue # keep draining so submit never blocks on a dead writer
+            start = time.perf_counter()
+            try:
+                self._upsert(*item)
+                self.written += len(item[0])
+            except Exception as e:
+                self.error = e
+            self.busy += time.perf_counter() - start
+
+    def _put(self, rows, embeddings):
+        if self.error is not None:
+            raise self.error
+        # Vectors are copied out so the caller's matrix can be written to or dropped meanwhile
+        self.queue.put((rows, embeddings[rows]))
+
+    def submit(self, rows, embeddings):
+        """Queue rows of the row-aligned `embeddings` that hold their final vector."""
+        self.pending.extend(i for i in rows if self.changed[i])
+        while len(self.pending) >= self.batch_size:
+            batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            self._put(batch, embeddings)
+        self.embeddings = embeddings
+
+    def finish(self):
+        """Write what is left and wait for the writer. Returns the number of rows written."""
+        if self.pending:
+            self._put(self.pending, self.embeddings)
+            self.pending = []
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        for start in range(0, len(self.removed), self.batch_size):
+            self.collection.delete(ids=self.removed[start:start + self.batch_size])
+        return self.written
+
+    def cancel(self):
+        """Stop the writer without flushing (the caller failed)."""
+        self.error = self.error or RuntimeError("cancelled")
+        self.queue.put(None)
+        self.thread.join()
+
+def start_sync(df, ids, hashes, model_key, chroma_path, rebuild=False):
+    """Open the collection, find new/changed rows (by content hash) and removed ids, and start a writer."""
+    print(f"Initializing ChromaDB at {chroma_path}...")
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    collection = open_collection(client, model_key, rebuild=rebuild)
+
+    # IDs are stable TMDB ids so rows keep their key when the sample changes; each
+    # row's content hash is stored alongside so only new or changed rows are rewritten.
+    with span("chroma_read"):
+        stored = get_stored_hashes(collection)
+    changed = [stored.get(item_id) != h for item_id, h in zip(ids, hashes)]
+    removed = sorted(set(stored) - set(ids))
+    batch_size = min(CHROMA_BATCH_SIZE, client.get_max_batch_size())
+    print(f"Storing embeddings in ChromaDB ({sum(changed)} new/changed, {len(removed)} removed, "
+          f"upserts of up to {batch_size} rows)...")
+    return ChromaWriter(collection, df, ids, hashes, changed, removed, batch_size)
+
+def finish_sync(writer, total):
+    """Wait for the writer and report; the span covers only what did not overlap with encoding."""
+    with span("chroma_write") as write:
+        written = writer.finish()
+        write.rows = written + len(writer.removed)
+    print(f"Collection '{COLLECTION_NAME}' holds {writer.collection.count()} items "
+          f"({written} written in {writer.busy:.1f}s of upserts, {total - sum(writer.changed)} unchanged).")
+
+def sync_collection(df, ids, embeddings, hashes, model_key, chroma_path, rebuild=False):
+    """Upsert new/changed rows (by content hash) into the Chroma collection and drop removed ids."""
+    writer = start_sync(df, ids, hashes, model_key, chroma_path, rebuild)
+    try:
+        writer.submit(range(len(ids)), embeddings)
+    except BaseException:
+        writer.cancel()
+        raise
+    finish_sync(writer, len(ids))
+
+def embed(df, rebuild=False, backend=ENCODER_BACKEND, workers=ENCODE_WORKERS, threads_per_worker=THREADS_PER_WORKER,
+          views=False):
+    """Encode df['embedding_input'] (cache first), write the matrix export and sync Chroma.
+
+    Chroma upserts run while encoding goes on (ChromaWriter). With `views`,
+    each field is encoded separately and the fields are combined with the
+    view weights instead (see views.py); Chroma is synced after combining.
+    Returns the row-aligned embedding matrix (0 x 0 for an empty frame), or
+    None when the text column is missing.
+    """
+    script_dir = Path(__file__).parent
+    chroma_path = (script_dir / CHROMA_DB_PATH).resolve()
+    cache_path = (script_dir / CACHE_FILE).resolve()
+    embeddings_path = (script_dir / EMBEDDINGS_FILE).resolve()
+    embedding_ids_path = (script_dir / EMBEDDING_IDS_FILE).resolve()
+    views_dir = (script_dir / VIEWS_DIR).resolve()
+    weights_path = (script_dir / VIEW_WEIGHTS_FILE).resolve()
+
+    # Check if we have the text column
+    if 'embedding_input' not in df.columns:
+        print("Error: 'embedding_input' column missing.")
+        return None
+
+    ids = stable_ids(df)
+
+    # Embeddings are generated explicitly (rather than through a Chroma embedding function)
+    # so unchanged rows can be served from the content-hash cache.
+    # Each backend produces slightly different vectors, so it gets its own cache/collection key
+    model_key = cache_key(MODEL_NAME, backend)
+    cache = EmbeddingCache(cache_path, model_key)
+    writer = None
+    try:
+        try:
+            if df.empty:
+                # Nothing to encode; the sync below still drops the ids of removed movies
+                embeddings, hashes = np.empty((0, 0), dtype=np.float32), []
+            elif views:
+                embeddings, hashes = encode_views(df, ids, cache, model_key, views_dir, load_weights(weights_path),
+                                                  workers, threads_per_worker, backend)
+            else:
+                sentences = df['embedding_input'].tolist()
+                hashes = [content_hash(s) for s in sentences]
+                # Chroma is opened first so upserts start with the first encoded shard
+                writer = start_sync(df, ids, hashes, model_key, chroma_path, rebuild)
+                embeddings = encode_with_cache(sentences, hashes, cache, workers, threads_per_worker, backend,
+                                               on_ready=writer.submit)
+        finally:
+            cache.close()
+
+        print(f"Embeddings shape: {embeddings.shape}")
+
+        # Row-aligned float32 matrix for 04/05 to memory-map instead of reading Chroma
+        with span("export_matrix", rows=len(ids)):
+            save_embedding_matrix(embeddings, ids, embeddings_path, embedding_ids_path, model_key)
+        print(f"Saved embedding matrix to {embeddings_path}")
+    except BaseException:
+        if writer is not None:
+            writer.cancel()
+        raise
+
+    if writer is not None:
+        finish_sync(writer, len(ids))
+    else:
+        sync_collection(df, ids, embeddings, hashes, model_key, chroma_path, rebuild)
+    return embeddings
+
+def main():
+    args = parse_args()
+    script_dir = Path(__file__).parent
+    input_path = (script_dir / INPUT_FILE).resolve()
+    df_output_path = (script_dir / OUTPUT_DF_WITH_REF).resolve()
+
+    if latest_frame_path(input_path) is None:
+        print("Input file not found. Run 02_normalize.py first.")
+        return
+
+    with instrumented("03_generate_embeddings"):
+        with span("load") as load:
+            df = read_frame(input_path)
+            load.rows = len(df)
+        if embed(df, args.rebuild, args.backend, args.workers, args.threads_per_worker, args.views) is None:
+            return
+
+        # Save a reference DF that confirms these embeddings align with this data version?
+        # We still need the main DF for the UMAP step unless we pull everything from Chroma.
+        # For the pipeline flow, we'll keep the CSV as the master metadata record.
+        with span("save", rows=len(df)):
+            df.to_csv(df_output_path, index=False)
+        print(f"Saved reference dataframe to {df_output_path}")
 
 if __name__ == "__main__":
     main()
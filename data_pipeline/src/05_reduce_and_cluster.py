@@ -4,140 +4,654 @@ import umap
 import hdbscan
 from sklearn.decomposition import PCA
 from pathlib import Path
+import argparse
 import json
+import os
+import shutil
+import time
 import joblib
-import chromadb
+
+try:
+    import orjson
+except ImportError: # optional, faster JSON encoding
+    orjson = None
+
+from parsing import parse_list_column
+from embedding_store import stable_ids, load_embeddings
+from frames import latest_frame_path, read_frame
+from neighbors import (approximate_knn_graph, knn_graph, patch_knn_graph, read_neighbor_table, row_digests,
+                       write_neighbor_table)
+from columnar import write_columnar, read_columnar, take_rows
+from tiles import build_octree, write_tile_manifest
+from title_index import TitleIndex
+from clusters import cluster_summary, write_cluster_summary
+from delta import record_digests, records_from_columns, write_version
+from landmarks import select_landmarks, place_points
+from instrumentation import span, instrumented
 
 DATA_FILE = "../data/output/phase_c_embedded.csv"
 CHROMA_DB_PATH = "../data/output/chroma_db"
 COLLECTION_NAME = "plotpoint_movies"
+EMBEDDINGS_FILE = "../data/output/embeddings.npy"
+EMBEDDING_IDS_FILE = "../data/output/embedding_ids.json"
 OUTPUT_JSON = "../data/output/plotpoint_data_3d.json"
+OUTPUT_NEIGHBORS = "../data/output/plotpoint_neighbors.bin"
+OUTPUT_POINTS = "../data/output/plotpoint_points.bin"
+OUTPUT_POINTS_MANIFEST = "../data/output/plotpoint_points.json"
+OUTPUT_OVERVIEWS = "../data/output/plotpoint_overviews.json"
+OUTPUT_TITLES = "../data/output/plotpoint_titles.bin"
+OUTPUT_TITLES_MANIFEST = "../data/output/plotpoint_titles.json"
+OUTPUT_CLUSTERS = "../data/output/plotpoint_clusters.json"
+OUTPUT_MANIFEST = "../data/output/plotpoint_manifest.json"
+OUTPUT_DELTAS_DIR = "../data/output/deltas"
+RECORDS_STATE_FILE = "../data/output/versions/records.npz" # record hashes of the current export version
+NEIGHBOR_STATE_FILE = "../data/output/versions/neighbors.npz" # ids and vector digests behind the neighbor table
+OUTPUT_TILES_DIR = "../data/output/tiles"
+TILE_MANIFEST_FILE = "manifest.json" # inside OUTPUT_TILES_DIR
+EXPORT_FORMATS = ['json', 'columnar', 'both']
+REDUCTION_MODES = ['auto', 'full', 'landmark']
 MODEL_DIR = "../data/output/models"
+PROJECTION_STATE_FILE = "projection_state.json" # inside MODEL_DIR
 
 # Config
 pca_components = 50
 umap_neighbors = 15
 umap_min_dist = 0.1
 umap_metric = 'cosine'
+hdbscan_min_cluster_size = 15
+hdbscan_min_samples = 5
 coordinate_scale = 50
+neighbor_k = 10 # neighbors per movie in the exported table (original embedding space)
+neighbor_exact_max = 50_000 # above this many movies the table comes from an approximate NN-descent graph
 
-def main():
-    script_dir = Path(__file__).parent
-    data_path = (script_dir / DATA_FILE).resolve()
-    chroma_path = (script_dir / CHROMA_DB_PATH).resolve()
-    output_path = (script_dir / OUTPUT_JSON).resolve()
-    model_dir = (script_dir / MODEL_DIR).resolve()
-    model_dir.mkdir(parents=True, exist_ok=True)
+json_chunk_size = 10_000 # records encoded per write in the JSON export
+cluster_top_genres = 3 # per cluster in the cluster summary, by TF-IDF against the whole catalog
+cluster_top_keywords = 8
+cluster_exemplars = 5
+delta_history = 10 # versions a returning client can catch up on with deltas
 
-    if not data_path.exists() or not chroma_path.exists():
-        print("Data or ChromaDB missing.")
-        return
-        
-    df = pd.read_csv(data_path)
-    
-    # Load embeddings from ChromaDB
-    print("Loading embeddings from ChromaDB...")
-    client = chromadb.PersistentClient(path=str(chroma_path))
-    collection = client.get_collection(name=COLLECTION_NAME)
-    
-    # Get all embeddings in order
-    all_ids = [str(i) for i in range(len(df))]
-    result = collection.get(ids=all_ids, include=['embeddings'])
-    embeddings = np.array(result['embeddings'])
-    
-    # 1. PCA
-    print(f"Running PCA (reduce to {pca_components}D)...")
-    pca = PCA(n_components=min(pca_components, embeddings.shape[1], embeddings.shape[0]))
-    pca_result = pca.fit_transform(embeddings)
-    
-    # 2. UMAP
-    print("Running UMAP (reduce to 3D)...")
-    reducer = umap.UMAP(
+# Landmark mode (--reduction landmark, or auto above landmark_threshold movies): PCA is fit
+# on a sample, UMAP/HDBSCAN on landmarks stratified over k-means cells of the PCA space,
+# and the remaining movies are placed with transform() in parallel batches.
+landmark_threshold = 50_000
+landmark_count = 20_000
+landmark_cells = 256
+pca_fit_rows = 50_000 # PCA fit sample in landmark mode (also the drift baseline sample)
+transform_batch_size = 10_000
+transform_workers = max(1, (os.cpu_count() or 1) // 2)
+
+# Octree tiles (--tiles): movies per non-leaf tile, cells at or below leaf size are not split
+tile_lod_size = 1000
+tile_leaf_size = 2000
+tile_max_depth = 8
+
+# Append mode: refit instead when new movies look unlike the fitted catalog
+# (PCA reconstruction error ratio) or too much has been appended since the last fit.
+drift_threshold = 1.5
+max_append_fraction = 0.25
+
+def make_reducer(approximate=False):
+    # approximate: always build the NN-descent index. Below 4096 rows UMAP otherwise uses exact
+    # distances, and transform() then falls back to a slow pairwise computation.
+    return umap.UMAP(
         n_neighbors=umap_neighbors,
         min_dist=umap_min_dist,
         n_components=3,
         metric=umap_metric,
-        random_state=42
+        random_state=42,
+        force_approximation_algorithm=approximate
     )
-    umap_result = reducer.fit_transform(pca_result)
-    
-    # 3. Normalize coordinates for better 3D UX
-    print("Normalizing coordinates...")
-    coords = umap_result.copy()
-    coords = (coords - coords.mean(axis=0)) / coords.std(axis=0)
-    coords = coords * coordinate_scale
-    
-    df['x'] = coords[:, 0]
-    df['y'] = coords[:, 1]
-    df['z'] = coords[:, 2]
-    
-    # 4. Clustering (HDBSCAN on PCA space, NOT UMAP)
-    print("Running HDBSCAN clustering on PCA space...")
-    clusterer = hdbscan.HDBSCAN(
-        min_cluster_size=15, 
-        min_samples=5,
+
+def make_clusterer():
+    return hdbscan.HDBSCAN(
+        min_cluster_size=hdbscan_min_cluster_size,
+        min_samples=hdbscan_min_samples,
         prediction_data=True
     )
-    clusterer.fit(pca_result)
-    df['cluster'] = clusterer.labels_
-    df['cluster_confidence'] = clusterer.probabilities_
-    
+
+def fit_projection(embeddings):
+    """Full fit: PCA -> UMAP (3D) and HDBSCAN on the PCA space.
+
+    Returns the models, the UMAP coordinates and the cluster labels/strengths of every row.
+    """
+    # 1. PCA
+    print(f"Running PCA (reduce to {pca_components}D)...")
+    pca = PCA(n_components=min(pca_components, embeddings.shape[1], embeddings.shape[0]))
+    with span("pca", rows=len(embeddings)):
+        pca_result = pca.fit_transform(np.asarray(embeddings, dtype=np.float32))
+
+    # 2. UMAP
+    print("Running UMAP (reduce to 3D)...")
+    reducer = make_reducer()
+    with span("umap", rows=len(pca_result)):
+        umap_result = reducer.fit_transform(pca_result)
+
+    # 3. Clustering (HDBSCAN on PCA space, NOT UMAP)
+    print("Running HDBSCAN clustering on PCA space...")
+    clusterer = make_clusterer()
+    with span("hdbscan", rows=len(pca_result)):
+        clusterer.fit(pca_result)
+
     print(f"Found {len(set(clusterer.labels_)) - (1 if -1 in clusterer.labels_ else 0)} clusters.")
-    
-    # 5. Persist models for future use
+    return pca, reducer, clusterer, umap_result, clusterer.labels_, clusterer.probabilities_
+
+def sample_rows(n, size, seed=42):
+    """Sorted random row indices (all rows when n <= size)."""
+    if n <= size:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(seed).choice(n, size, replace=False))
+
+def pca_transform(pca, embeddings, batch_size=transform_batch_size):
+    """PCA projection in row batches, so only one float32 batch of the input is in memory at a time."""
+    result = np.empty((len(embeddings), pca.n_components_), dtype=np.float32)
+    for start in range(0, len(embeddings), batch_size):
+        batch = np.asarray(embeddings[start:start + batch_size], dtype=np.float32)
+        result[start:start + batch_size] = pca.transform(batch)
+    return result
+
+def fit_landmark_projection(embeddings, workers=transform_workers):
+    """Landmark fit for large catalogs; same return values as fit_projection.
+
+    PCA is fit on `pca_fit_rows` sampled rows and applied in batches. UMAP and
+    HDBSCAN are fit on `landmark_count` landmarks (landmarks.select_landmarks).
+    Every other movie is then placed with the fitted models, the same way
+    append mode places new movies.
+    """
+    n = len(embeddings)
+    print(f"Running PCA (reduce to {pca_components}D, fit on {min(n, pca_fit_rows)} rows)...")
+    pca = PCA(n_components=min(pca_components, embeddings.shape[1], n), svd_solver='randomized', random_state=42)
+    with span("pca", rows=n):
+        pca.fit(np.asarray(embeddings[sample_rows(n, pca_fit_rows)], dtype=np.float32))
+        pca_result = pca_transform(pca, embeddings)
+
+    with span("landmarks", rows=n):
+        landmarks = select_landmarks(pca_result, landmark_count, landmark_cells, seed=42)
+    rest = np.setdiff1d(np.arange(n), landmarks, assume_unique=True)
+    print(f"Running UMAP and HDBSCAN on {len(landmarks)} landmarks...")
+    reducer = make_reducer(approximate=True)
+    with span("umap", rows=len(landmarks)):
+        landmark_coords = reducer.fit_transform(pca_result[landmarks])
+    clusterer = make_clusterer()
+    with span("hdbscan", rows=len(landmarks)):
+        clusterer.fit(pca_result[landmarks])
+
+    umap_result = np.empty((n, 3), dtype=np.float32)
+    labels = np.empty(n, dtype=np.int64)
+    strengths = np.empty(n, dtype=np.float32)
+    umap_result[landmarks] = landmark_coords
+    labels[landmarks] = clusterer.labels_
+    strengths[landmarks] = clusterer.probabilities_
+    if len(rest):
+        print(f"Placing {len(rest)} movies in batches of {transform_batch_size} ({workers} worker(s))...")
+        with span("place", rows=len(rest)):
+            umap_result[rest], labels[rest], strengths[rest] = place_points(
+                reducer, clusterer, pca_result[rest], transform_batch_size, workers)
+
+    print(f"Found {len(set(labels)) - (1 if -1 in labels else 0)} clusters.")
+    return pca, reducer, clusterer, umap_result, labels, strengths
+
+def reconstruction_error(pca, embeddings):
+    """Mean relative squared PCA reconstruction error; a cheap drift signal."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    restored = pca.inverse_transform(pca.transform(embeddings))
+    residual = ((embeddings - restored) ** 2).sum(axis=1)
+    return float((residual / np.maximum((embeddings ** 2).sum(axis=1), 1e-12)).mean())
+
+def normalize_coordinates(umap_result, mean, std):
+    # Normalize coordinates for better 3D UX
+    return (umap_result - mean) / std * coordinate_scale
+
+def save_models(model_dir, pca, reducer, clusterer, state):
     print("Saving models...")
     joblib.dump(pca, model_dir / "pca_model.joblib")
     joblib.dump(reducer, model_dir / "umap_model.joblib")
     joblib.dump(clusterer, model_dir / "hdbscan_model.joblib")
+    save_state(model_dir, state)
     print(f"Models saved to {model_dir}")
-    
-    # 6. Export for Web App
-    # Select columns needed for UI
-    
-    # Helper to parse stringified lists safely for JSON export
-    import ast
-    def parse_list(x):
-        if pd.isna(x) or x == '':
-            return []
-        try:
-            # Try literal_eval first (for stringified lists)
-            return ast.literal_eval(x)
-        except (ValueError, SyntaxError):
-            # Fall back to simple split if it's already comma-separated
-            if isinstance(x, str):
-                return [item.strip() for item in x.split(',') if item.strip()]
-            return []
-
-    export_records = []
-    print("Preparing JSON export...")
-    
-    for idx, row in df.iterrows():
-        # Use stable ID - prefer id column from dataset, fallback to index
-        stable_id = str(row.get('id', idx))
-        
-        record = {
-            "id": stable_id,
-            "title": row['title'],
-            "x": float(row['x']),
-            "y": float(row['y']),
-            "z": float(row['z']),
-            "cluster": int(row['cluster']),
-            "cluster_confidence": float(row['cluster_confidence']),
-            "popularity": float(row['popularity']) if pd.notna(row['popularity']) else 0,
-            "year": int(row['release_year']) if pd.notna(row['release_year']) else None,
-            "era": row['era'],
-            "genres": parse_list(row.get('genres_list', row.get('genres', ''))),
-            "runtime": row['runtime_bucket'],
-            "overview": str(row['overview']) if pd.notna(row['overview']) else "",
-            "poster_path": row.get('poster_path', None),
-            "original_language": str(row['original_language']) if pd.notna(row['original_language']) else "en"
+
+def save_state(model_dir, state):
+    with open(model_dir / PROJECTION_STATE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+
+def load_projection(model_dir):
+    """Saved models and normalization state, or None if anything is missing."""
+    paths = [model_dir / name for name in
+             ("pca_model.joblib", "umap_model.joblib", "hdbscan_model.joblib", PROJECTION_STATE_FILE)]
+    if not all(p.exists() for p in paths):
+        return None
+    with open(paths[3], encoding='utf-8') as f:
+        state = json.load(f)
+    return joblib.load(paths[0]), joblib.load(paths[1]), joblib.load(paths[2]), state
+
+def use_landmarks(reduction, n):
+    return reduction == 'landmark' or (reduction == 'auto' and n > landmark_threshold)
+
+def run_full(df, embeddings, model_dir, reduction='auto', workers=transform_workers):
+    landmark = use_landmarks(reduction, len(df))
+    if landmark:
+        pca, reducer, clusterer, umap_result, labels, strengths = fit_landmark_projection(embeddings, workers)
+    else:
+        pca, reducer, clusterer, umap_result, labels, strengths = fit_projection(embeddings)
+
+    print("Normalizing coordinates...")
+    mean, std = umap_result.mean(axis=0), umap_result.std(axis=0)
+    coords = normalize_coordinates(umap_result, mean, std)
+
+    df['x'] = coords[:, 0]
+    df['y'] = coords[:, 1]
+    df['z'] = coords[:, 2]
+    df['cluster'] = labels
+    df['cluster_confidence'] = strengths
+
+    # Persist models (plus what append mode needs to place new points consistently)
+    state = {
+        "coordinate_mean": mean.tolist(),
+        "coordinate_std": std.tolist(),
+        "coordinate_scale": coordinate_scale,
+        "fitted_count": int(len(df)),
+        "appended_since_fit": 0,
+        "reconstruction_error": reconstruction_error(pca, embeddings[sample_rows(len(df), pca_fit_rows)]),
+        "reduction": "landmark" if landmark else "full",
+        "fitted_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    save_models(model_dir, pca, reducer, clusterer, state)
+    return df
+
+def load_placements(json_path, bin_path, manifest_path):
+    """Coordinates/clusters of the current export by id, from the newest format written."""
+    has_columnar = bin_path.exists() and manifest_path.exists()
+    if json_path.exists() and (not has_columnar or json_path.stat().st_mtime >= manifest_path.stat().st_mtime):
+        with open(json_path, encoding='utf-8') as f:
+            return {record['id']: record for record in json.load(f)}
+    if has_columnar:
+        table = read_columnar(bin_path, manifest_path)
+        fields = ('x', 'y', 'z', 'cluster', 'cluster_confidence')
+        return {
+            item_id: {field: table[field][i].item() for field in fields}
+            for i, item_id in enumerate(table['id'])
         }
-        export_records.append(record)
-        
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(export_records, f, indent=2)
-        
+    return None
+
+def run_append(df, ids, embeddings, model_dir, existing, workers=transform_workers):
+    """Place movies missing from the current export with the saved models.
+
+    `existing` maps id -> placed record (see load_placements). Returns the
+    frame with coordinates/clusters filled, or None when a full refit is
+    needed (no saved models/export, or drift above threshold).
+    """
+    projection = load_projection(model_dir)
+    if projection is None or existing is None:
+        print("Append mode: no saved models or export found.")
+        return None
+    pca, reducer, clusterer, state = projection
+
+    new_rows = np.array([item_id not in existing for item_id in ids], dtype=bool)
+    n_new = int(new_rows.sum())
+    print(f"Append mode: {len(ids) - n_new} placed movies, {n_new} new, "
+          f"{len(set(existing) - set(ids))} removed.")
+
+    appended = state.get('appended_since_fit', 0) + n_new
+    append_fraction = appended / max(state['fitted_count'], 1)
+    if append_fraction > max_append_fraction:
+        print(f"Appended fraction {append_fraction:.2f} > {max_append_fraction}; refitting.")
+        return None
+
+    for col in ('x', 'y', 'z', 'cluster_confidence'):
+        df[col] = [existing[i][col] if i in existing else np.nan for i in ids]
+    df['cluster'] = [existing[i]['cluster'] if i in existing else -1 for i in ids]
+
+    if n_new:
+        new_embeddings = np.asarray(embeddings[new_rows], dtype=np.float32)
+        drift = reconstruction_error(pca, new_embeddings) / max(state['reconstruction_error'], 1e-12)
+        print(f"Drift (PCA reconstruction error ratio): {drift:.2f}")
+        if drift > drift_threshold:
+            print(f"Drift above {drift_threshold}; refitting.")
+            return None
+
+        with span("place", rows=n_new):
+            umap_new, labels, strengths = place_points(reducer, clusterer, pca_transform(pca, new_embeddings),
+                                                       transform_batch_size, workers)
+        coords = normalize_coordinates(
+            umap_new,
+            np.array(state['coordinate_mean']),
+            np.array(state['coordinate_std'])
+        )
+
+        df.loc[new_rows, 'x'] = coords[:, 0]
+        df.loc[new_rows, 'y'] = coords[:, 1]
+        df.loc[new_rows, 'z'] = coords[:, 2]
+        df.loc[new_rows, 'cluster'] = labels
+        df.loc[new_rows, 'cluster_confidence'] = strengths
+
+    state['appended_since_fit'] = appended
+    save_state(model_dir, state)
+    return df
+
+def _nullable(values):
+    """Column as a Python list with missing values as None (JSON null)."""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+def json_columns(df, ids):
+    """Web app record fields as whole Python lists, in record key order."""
+    # Genres are parsed once for the whole column (shared parser with 02_normalize.py)
+    genres = parse_list_column(df['genres_list'] if 'genres_list' in df.columns else df['genres'])
+    poster_paths = df['poster_path'] if 'poster_path' in df.columns else pd.Series([None] * len(df))
+    return {
+        # Stable ID - TMDB id from the dataset, fallback to index (same ids as Chroma)
+        "id": list(ids),
+        "title": _nullable(df['title']),
+        "x": df['x'].astype(float).tolist(),
+        "y": df['y'].astype(float).tolist(),
+        "z": df['z'].astype(float).tolist(),
+        "cluster": df['cluster'].astype(int).tolist(),
+        "cluster_confidence": df['cluster_confidence'].astype(float).tolist(),
+        "popularity": df['popularity'].fillna(0).astype(float).tolist(),
+        "year": _nullable(pd.to_numeric(df['release_year'], errors='coerce').astype('Int64')),
+        "era": _nullable(df['era']),
+        "genres": genres,
+        "runtime": _nullable(df['runtime_bucket']),
+        "overview": df['overview'].fillna("").astype(str).tolist(),
+        "poster_path": _nullable(poster_paths),
+        "original_language": df['original_language'].fillna("en").astype(str).tolist()
+    }
+
+def record_encoder(minify):
+    """record dict -> UTF-8 bytes of one array element (orjson when installed)."""
+    if orjson is not None:
+        if minify:
+            return orjson.dumps
+        # Indent by one more level so records nest inside the top-level array
+        return lambda record: orjson.dumps(record, option=orjson.OPT_INDENT_2).replace(b"\n", b"\n  ")
+    if minify:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    return lambda record: encoder.encode(record).replace("\n", "\n  ").encode('utf-8')
+
+def export_json(df, ids, output_path, minify=False):
+    # Export for Web App: each chunk of rows is cast column-wise, encoded and
+    # streamed to disk, so neither the full record list nor full Python columns exist
+    print(f"Preparing JSON export ({'orjson' if orjson is not None else 'json'}"
+          f"{', minified' if minify else ''})...")
+    encode = record_encoder(minify)
+    open_bracket, separator, close_bracket = (b"[", b",", b"]") if minify else (b"[\n  ", b",\n  ", b"\n]")
+
+    with open(output_path, 'wb') as f:
+        f.write(open_bracket if len(df) else b"[")
+        for start in range(0, len(df), json_chunk_size):
+            end = start + json_chunk_size
+            columns = json_columns(df.iloc[start:end], ids[start:end])
+            keys = list(columns)
+            encoded = [encode(dict(zip(keys, row))) for row in zip(*columns.values())]
+            if start:
+                f.write(separator)
+            f.write(separator.join(encoded))
+        f.write(close_bracket if len(df) else b"]")
+
     print(f"Saved 3D data for web app to {output_path}")
 
+def web_table(df, ids):
+    """Web app fields as write_columnar keyword arguments, one array per field."""
+    genres = parse_list_column(df['genres_list'] if 'genres_list' in df.columns else df['genres'])
+    cluster = df['cluster'].to_numpy()
+    cluster_dtype = np.int16 if len(cluster) == 0 or cluster.max() <= np.iinfo(np.int16).max else np.int32
+    genre_cells = np.empty(len(df), dtype=object)
+    genre_cells[:] = genres
+    poster_paths = df['poster_path'] if 'poster_path' in df.columns else pd.Series([None] * len(df))
+
+    return {
+        "columns": {
+            "x": df['x'].to_numpy(np.float32),
+            "y": df['y'].to_numpy(np.float32),
+            "z": df['z'].to_numpy(np.float32),
+            "cluster": cluster.astype(cluster_dtype),
+            "cluster_confidence": df['cluster_confidence'].to_numpy(np.float32),
+            "popularity": df['popularity'].fillna(0).to_numpy(np.float32),
+            "year": pd.to_numeric(df['release_year'], errors='coerce').fillna(0).to_numpy(np.int16)
+        },
+        "categories": {
+            "era": df['era'].to_numpy(object),
+            "runtime": df['runtime_bucket'].to_numpy(object),
+            "original_language": df['original_language'].fillna("en").to_numpy(object)
+        },
+        "lists": {"genres": genre_cells},
+        "strings": {
+            "id": np.asarray(ids, dtype=object),
+            "title": df['title'].to_numpy(object),
+            "poster_path": poster_paths.to_numpy(object)
+        },
+        "nulls": {"year": 0}
+    }
+
+def export_columnar(df, ids, bin_path, manifest_path, overviews_path):
+    # Compact web payload: typed arrays for everything numeric, dictionary ids for
+    # genres/eras/runtime/language, and overviews in a separate shard the client
+    # loads after the points are on screen
+    print("Preparing columnar export...")
+    write_columnar(bin_path, manifest_path, len(df), **web_table(df, ids))
+
+    with open(overviews_path, 'w', encoding='utf-8') as f:
+        json.dump(df['overview'].fillna("").astype(str).tolist(), f, ensure_ascii=False, separators=(',', ':'))
+
+    print(f"Saved columnar export to {bin_path}, {manifest_path} and {overviews_path}")
+
+def export_tiles(df, ids, tiles_dir):
+    # Octree tile set with popularity-ranked LOD subsets, so a client can stream
+    # the tiles near the camera instead of the whole universe. Each tile is a
+    # columnar table (overviews included) plus a `row` column into the flat export.
+    print(f"Building octree tiles (lod {tile_lod_size}, leaf {tile_leaf_size}, depth {tile_max_depth})...")
+    coords = df[['x', 'y', 'z']].to_numpy(np.float64)
+    nodes = build_octree(coords, df['popularity'].fillna(0).to_numpy(), tile_lod_size, tile_leaf_size, tile_max_depth)
+
+    # Rewrite the whole set so tiles from a previous, differently shaped tree never linger
+    if tiles_dir.exists():
+        shutil.rmtree(tiles_dir)
+    tiles_dir.mkdir(parents=True)
+
+    table = web_table(df, ids)
+    table["columns"]["row"] = np.arange(len(df), dtype=np.int32)
+    table["strings"]["overview"] = df['overview'].fillna("").astype(str).to_numpy(object)
+    for node in nodes:
+        rows = node["rows"]
+        write_columnar(tiles_dir / f"{node['id']}.bin", tiles_dir / f"{node['id']}.json", len(rows),
+                       **take_rows(table, rows))
+    write_tile_manifest(tiles_dir / TILE_MANIFEST_FILE, nodes, len(df), tile_lod_size, tile_leaf_size, tile_max_depth)
+    print(f"Saved {len(nodes)} tiles (depth {max(node['level'] for node in nodes)}) to {tiles_dir}")
+
+def export_title_index(df, bin_path, manifest_path):
+    # Rows follow the JSON/columnar export order, so lookups index straight into either
+    index = TitleIndex.build(df['title'].fillna('').tolist(), df['popularity'])
+    index.save(bin_path, manifest_path)
+    print(f"Saved title index ({len(index.keys)} titles, {len(index.grams)} trigrams) to {bin_path}")
+
+def export_cluster_summary(df, ids, output_path):
+    # Small per-cluster table (centroid, bounds, size, distinctive genres/keywords,
+    # exemplars) so the client and 06_check_clusters.py need not scan every point
+    genres = parse_list_column(df['genres_list'] if 'genres_list' in df.columns else df['genres'])
+    keywords = parse_list_column(df['keywords_list'] if 'keywords_list' in df.columns else df['keywords'])
+    summary = cluster_summary(df, ids, genres, keywords, cluster_top_genres, cluster_top_keywords, cluster_exemplars)
+    write_cluster_summary(output_path, summary)
+    print(f"Saved cluster summary ({len(summary['clusters'])} clusters) to {output_path}")
+
+def export_version(df, ids, manifest_path, deltas_dir, records_path, files):
+    # Versioned manifest plus a record-level delta against the previous export, so
+    # returning clients fetch only added/removed/changed/moved records
+    chunks = (json_columns(df.iloc[start:start + json_chunk_size], ids[start:start + json_chunk_size])
+              for start in range(0, len(df), json_chunk_size))
+    content, placement = record_digests(chunks)
+    records_at = lambda rows: records_from_columns(json_columns(df.iloc[rows], [ids[i] for i in rows]))
+    manifest = write_version(manifest_path, deltas_dir, records_path, ids, content, placement, records_at,
+                             files, delta_history)
+    print(f"Saved manifest (export version {manifest['version']}, {len(manifest['deltas'])} deltas) "
+          f"to {manifest_path}")
+
+def load_neighbor_state(state_path, table_path):
+    """(ids, vector digests, indices) behind the current neighbor table, or None when they do not line up."""
+    if not state_path.exists() or not table_path.exists():
+        return None
+    with np.load(state_path, allow_pickle=False) as state:
+        ids, digests = state["ids"].tolist(), state["digests"]
+    indices, _ = read_neighbor_table(table_path)
+    return (ids, digests, indices) if len(indices) == len(ids) == len(digests) else None
+
+def save_neighbor_state(state_path, ids, digests):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix('.tmp.npz')
+    np.savez(tmp, ids=np.asarray(ids, dtype=str), digests=digests)
+    os.replace(tmp, state_path)
+
+def export_neighbors(embeddings, ids, output_path, state_path, patch=False):
+    # Nearest neighbors in the original embedding space (UMAP distorts local distances),
+    # so the client does one table lookup instead of a KD-tree search over 3D coordinates.
+    # With `patch` (append mode without a refit) the previous table is patched for added,
+    # removed and re-embedded movies (found by vector digest) instead of searched again.
+    digests = row_digests(embeddings)
+    patched = None
+    previous = load_neighbor_state(state_path, output_path) if patch else None
+    if previous is not None:
+        previous_ids, previous_digests, previous_indices = previous
+        old_rows = pd.Index(ids).get_indexer(previous_ids)
+        kept = old_rows >= 0
+        changed = old_rows[kept][digests[old_rows[kept]] != previous_digests[kept]]
+        added = len(ids) - int(kept.sum())
+        # Past half the catalog new or re-embedded, a full search is as cheap
+        if previous_indices.shape[1] >= min(neighbor_k, len(ids) - 1) and added + len(changed) <= len(ids) // 2:
+            print(f"Patching top-{neighbor_k} neighbor graph ({added} added, {len(changed)} re-embedded, "
+                  f"{int((~kept).sum())} removed)...")
+            patched = patch_knn_graph(embeddings, neighbor_k, previous_indices, old_rows, changed)
+    elif patch:
+        print("No neighbor state matching the previous table, rebuilding it.")
+
+    if patched is not None:
+        indices, distances = patched
+    elif len(ids) > neighbor_exact_max:
+        print(f"Computing approximate top-{neighbor_k} neighbor graph in embedding space...")
+        indices, distances = approximate_knn_graph(embeddings, neighbor_k)
+    else:
+        print(f"Computing top-{neighbor_k} neighbor graph in embedding space...")
+        indices, distances = knn_graph(embeddings, neighbor_k)
+    write_neighbor_table(output_path, indices, distances)
+    save_neighbor_state(state_path, ids, digests)
+    print(f"Saved neighbor table ({indices.shape[0]}x{indices.shape[1]}) to {output_path}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reduce embeddings to 3D, cluster and export for the web app.")
+    parser.add_argument('--append', action='store_true',
+                        help="Place only new movies with the saved PCA/UMAP/HDBSCAN models; "
+                             "falls back to a full refit when drift crosses the threshold.")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='both',
+                        help="Web payload: legacy JSON, columnar binary + manifest + overview shard, or both.")
+    parser.add_argument('--minify', action='store_true',
+                        help="Write plotpoint_data_3d.json without indentation.")
+    parser.add_argument('--tiles', action='store_true',
+                        help="Also write an octree tile set with level-of-detail subsets for streaming clients.")
+    parser.add_argument('--reduction', choices=REDUCTION_MODES, default='auto',
+                        help=f"full: fit UMAP/HDBSCAN on every movie; landmark: fit on landmarks and place the rest "
+                             f"in batches; auto: landmark above {landmark_threshold} movies.")
+    parser.add_argument('--transform-workers', type=int, default=transform_workers,
+                        help="Processes placing non-landmark movies in landmark mode.")
+    parser.add_argument('--no-neighbors', dest='neighbors', action='store_false',
+                        help="Skip the neighbor table; the web app falls back to a KD-tree over 3D positions.")
+    return parser.parse_args()
+
+def reduce_and_export(df, embeddings=None, append=False, export_format='both', minify=False, tiles=False,
+                      reduction='auto', workers=transform_workers, neighbors=True):
+    """Project/cluster df (fit or append) and write the web app exports.
+
+    `embeddings` are the row-aligned vectors of df; loaded from the step 03
+    export (or Chroma) when not given. Returns the frame with x/y/z/cluster.
+    """
+    script_dir = Path(__file__).parent
+    chroma_path = (script_dir / CHROMA_DB_PATH).resolve()
+    output_path = (script_dir / OUTPUT_JSON).resolve()
+    neighbors_path = (script_dir / OUTPUT_NEIGHBORS).resolve()
+    neighbor_state_path = (script_dir / NEIGHBOR_STATE_FILE).resolve()
+    points_path = (script_dir / OUTPUT_POINTS).resolve()
+    points_manifest_path = (script_dir / OUTPUT_POINTS_MANIFEST).resolve()
+    overviews_path = (script_dir / OUTPUT_OVERVIEWS).resolve()
+    titles_path = (script_dir / OUTPUT_TITLES).resolve()
+    titles_manifest_path = (script_dir / OUTPUT_TITLES_MANIFEST).resolve()
+    clusters_path = (script_dir / OUTPUT_CLUSTERS).resolve()
+    manifest_path = (script_dir / OUTPUT_MANIFEST).resolve()
+    deltas_dir = (script_dir / OUTPUT_DELTAS_DIR).resolve()
+    records_path = (script_dir / RECORDS_STATE_FILE).resolve()
+    tiles_dir = (script_dir / OUTPUT_TILES_DIR).resolve()
+    model_dir = (script_dir / MODEL_DIR).resolve()
+    embeddings_path = (script_dir / EMBEDDINGS_FILE).resolve()
+    embedding_ids_path = (script_dir / EMBEDDING_IDS_FILE).resolve()
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    ids = stable_ids(df)
+
+    # Load embeddings in row order: memory-mapped export from step 03, paged Chroma fallback
+    if embeddings is None:
+        with span("load_embeddings", rows=len(ids)):
+            embeddings = load_embeddings(ids, embeddings_path, embedding_ids_path, chroma_path, COLLECTION_NAME)
+
+    placed = None
+    if append:
+        with span("append", rows=len(ids)):
+            existing = load_placements(output_path, points_path, points_manifest_path)
+            placed = run_append(df, ids, embeddings, model_dir, existing, workers)
+    if placed is None:
+        if append:
+            print("Running full refit...")
+        with span("fit", rows=len(ids)):
+            df = run_full(df, embeddings, model_dir, reduction, workers)
+    else:
+        df = placed
+
+    if export_format in ('json', 'both'):
+        with span("export_json", rows=len(df)):
+            export_json(df, ids, output_path, minify=minify)
+    if export_format in ('columnar', 'both'):
+        with span("export_columnar", rows=len(df)):
+            export_columnar(df, ids, points_path, points_manifest_path, overviews_path)
+    if tiles:
+        with span("export_tiles", rows=len(df)):
+            export_tiles(df, ids, tiles_dir)
+    with span("export_titles", rows=len(df)):
+        export_title_index(df, titles_path, titles_manifest_path)
+    with span("export_clusters", rows=len(df)):
+        export_cluster_summary(df, ids, clusters_path)
+    if neighbors:
+        with span("export_neighbors", rows=len(df)):
+            # A refit may follow a model or content change, so only placed appends patch the table
+            export_neighbors(embeddings, ids, neighbors_path, neighbor_state_path, patch=placed is not None)
+    else:
+        # A stale table would no longer match the export order
+        neighbors_path.unlink(missing_ok=True)
+        neighbor_state_path.unlink(missing_ok=True)
+        print("Skipped neighbor table (--no-neighbors).")
+    with span("export_version", rows=len(df)):
+        files = [titles_path, titles_manifest_path, clusters_path]
+        if neighbors:
+            files.append(neighbors_path)
+        if export_format in ('json', 'both'):
+            files.append(output_path)
+        if export_format in ('columnar', 'both'):
+            files += [points_path, points_manifest_path, overviews_path]
+        export_version(df, ids, manifest_path, deltas_dir, records_path, files)
+    return df
+
+def main():
+    args = parse_args()
+    script_dir = Path(__file__).parent
+    data_path = (script_dir / DATA_FILE).resolve()
+    chroma_path = (script_dir / CHROMA_DB_PATH).resolve()
+    embeddings_path = (script_dir / EMBEDDINGS_FILE).resolve()
+
+    if latest_frame_path(data_path) is None or not (embeddings_path.exists() or chroma_path.exists()):
+        print("Data or embeddings missing.")
+        return
+
+    with instrumented("05_reduce_and_cluster"):
+        with span("load") as load:
+            df = read_frame(data_path)
+            load.rows = len(df)
+        reduce_and_export(df, append=args.append, export_format=args.format,
+                          minify=args.minify, tiles=args.tiles, reduction=args.reduction,
+                          workers=args.transform_workers, neighbors=args.neighbors)
+
 if __name__ == "__main__":
     main()
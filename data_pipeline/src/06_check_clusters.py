@@ -1,22 +1,46 @@
-import json
-from collections import Counter
-
-with open('data_pipeline/data/output/plotpoint_data_3d.json') as f:
-    data = json.load(f)
-
-clusters = [d['cluster'] for d in data]
-counts = Counter(clusters)
-
-print(f'Total movies: {len(data)}')
-print('\nCluster distribution:')
-for c, count in sorted(counts.items()):
-    pct = count/len(data)*100
-    if c == -1:
-        print(f'  Noise (cluster -1): {count} movies ({pct:.1f}%)')
-    else:
-        print(f'  Cluster {c}: {count} movies ({pct:.1f}%)')
-
-noise_count = counts.get(-1, 0)
-clustered_count = len(data) - noise_count
-print(f'\nClustered: {clustered_count} ({clustered_count/len(data)*100:.1f}%)')
-print(f'Noise: {noise_count} ({noise_count/len(data)*100:.1f}%)')
+from pathlib import Path
+
+from clusters import read_cluster_summary
+from instrumentation import span, instrumented
+
+CLUSTERS_FILE = "../data/output/plotpoint_clusters.json"
+
+def report_clusters(summary):
+    """Print the size and top terms of every HDBSCAN cluster and the noise share."""
+    total = summary['movies']
+
+    print(f'Total movies: {total}')
+    if not total:
+        print('No movies; nothing to report.')
+        return
+    print('\nCluster distribution:')
+    noise_count = summary['noise']
+    if noise_count:
+        print(f'  Noise (cluster -1): {noise_count} movies ({noise_count/total*100:.1f}%)')
+    for cluster in summary['clusters']:
+        count = cluster['size']
+        genres = ", ".join(term['term'] for term in cluster['genres'])
+        keywords = ", ".join(term['term'] for term in cluster['keywords'][:4])
+        print(f"  Cluster {cluster['cluster']}: {count} movies ({count/total*100:.1f}%)"
+              f"  [{genres or '-'} | {keywords or '-'}]")
+
+    clustered_count = total - noise_count
+    print(f'\nClustered: {clustered_count} ({clustered_count/total*100:.1f}%)')
+    print(f'Noise: {noise_count} ({noise_count/total*100:.1f}%)')
+
+def main():
+    summary_path = (Path(__file__).parent / CLUSTERS_FILE).resolve()
+    if not summary_path.exists():
+        print(f"{summary_path.name} missing; run 05_reduce_and_cluster.py first.")
+        return
+
+    with instrumented("06_check_clusters"):
+        with span("load") as load:
+            summary = read_cluster_summary(summary_path)
+            load.rows = len(summary['clusters'])
+
+        with span("report", rows=len(summary['clusters'])):
+            report_clusters(summary)
+
+if __name__ == "__main__":
+    main()
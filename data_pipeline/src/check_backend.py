@@ -0,0 +1,107 @@
+"""Check an alternative encoder backend against float32 PyTorch embeddings.
+
+Encodes a sample of embedding inputs with both backends and reports:
+  - per-row cosine agreement between the two embeddings
+  - overlap of each movie's top-k neighbors in the two spaces
+  - the 04_validate.py test titles' neighbor lists side by side
+  - throughput of both backends
+
+Only adopt a faster backend when this passes:
+
+    python src/check_backend.py --backend onnx-int8
+"""
+import argparse
+import importlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from encoders import BACKENDS, load_encoder
+from neighbors import knn_graph
+from title_index import TitleIndex
+from frames import latest_frame_path, read_frame
+
+INPUT_FILE = "../data/output/phase_b_normalized.csv"
+MODEL_NAME = 'all-mpnet-base-v2'
+BATCH_SIZE = 32
+SAMPLE_SIZE = 1000
+RANDOM_SEED = 42
+TOP_K = 10
+
+# Acceptance thresholds
+MIN_MEAN_COSINE = 0.99
+MIN_NEIGHBOR_OVERLAP = 0.90
+
+def timed_encode(model, sentences):
+    start = time.perf_counter()
+    vectors = model.encode(sentences, batch_size=BATCH_SIZE, convert_to_numpy=True)
+    return vectors.astype(np.float32), len(sentences) / (time.perf_counter() - start)
+
+def select_sample(df, sample_size, titles):
+    """Random sample that always contains the validation titles."""
+    index = TitleIndex.build(df['title'].fillna('').tolist(), df.get('popularity'))
+    keep = {df.index[rows[0]] for rows in map(index.exact, titles) if rows}
+    if sample_size and sample_size < len(df):
+        keep |= set(df.sample(n=sample_size, random_state=RANDOM_SEED).index)
+    else:
+        keep = set(df.index)
+    return df.loc[sorted(keep)].reset_index(drop=True)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare an encoder backend against float32 torch.")
+    parser.add_argument('--backend', choices=[b for b in BACKENDS if b not in ('torch', 'stub')], default='onnx-int8')
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--sample', type=int, default=SAMPLE_SIZE, help="Rows to encode (0 = all).")
+    parser.add_argument('--k', type=int, default=TOP_K)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    script_dir = Path(__file__).parent
+    input_path = (script_dir / INPUT_FILE).resolve()
+    if latest_frame_path(input_path) is None:
+        print("Input file not found. Run 02_normalize.py first.")
+        return 1
+
+    test_titles = importlib.import_module("04_validate").TEST_TITLES
+    df = select_sample(read_frame(input_path), args.sample, test_titles)
+    sentences = df['embedding_input'].tolist()
+    print(f"Encoding {len(sentences)} inputs with torch float32 and {args.backend}...")
+
+    reference, reference_rate = timed_encode(load_encoder(args.model, device='cpu'), sentences)
+    candidate, candidate_rate = timed_encode(load_encoder(args.model, backend=args.backend), sentences)
+
+    ref_unit = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cand_unit = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = (ref_unit * cand_unit).sum(axis=1)
+
+    ref_nn, _ = knn_graph(reference, args.k)
+    cand_nn, _ = knn_graph(candidate, args.k)
+    overlap = np.array([len(set(a) & set(b)) / args.k for a, b in zip(ref_nn, cand_nn)])
+
+    print(f"\nThroughput: torch {reference_rate:.1f} sent/s, {args.backend} {candidate_rate:.1f} sent/s "
+          f"({candidate_rate / reference_rate:.2f}x)")
+    print(f"Cosine agreement: mean {cosine.mean():.4f}, p1 {np.percentile(cosine, 1):.4f}, min {cosine.min():.4f}")
+    print(f"Top-{args.k} neighbor overlap: mean {overlap.mean():.3f}, "
+          f"rows with full overlap {np.mean(overlap == 1.0) * 100:.1f}%")
+
+    titles = df['title'].tolist()
+    index = TitleIndex.build(titles, df.get('popularity'))
+    for title_query in test_titles:
+        matches = index.exact(title_query)
+        if not matches:
+            continue
+        idx = matches[0]
+        print(f"\nNeighbors for '{titles[idx]}' (overlap {overlap[idx]:.2f}):")
+        for a, b in zip(ref_nn[idx][:5], cand_nn[idx][:5]):
+            print(f"  torch: {titles[a]:<40} {args.backend}: {titles[b]}")
+
+    passed = cosine.mean() >= MIN_MEAN_COSINE and overlap.mean() >= MIN_NEIGHBOR_OVERLAP
+    print(f"\n{'PASS' if passed else 'FAIL'}: mean cosine >= {MIN_MEAN_COSINE} and "
+          f"mean neighbor overlap >= {MIN_NEIGHBOR_OVERLAP}")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
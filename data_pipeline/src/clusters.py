@@ -0,0 +1,155 @@
+import json
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# Cluster summary table written next to the web exports by step 05. One entry
+# per HDBSCAN cluster: size, 3D centroid and bounding box, mean membership
+# strength, the genres/keywords that set it apart from the whole catalog
+# (TF-IDF: share of the cluster's movies carrying a term, weighted by the
+# term's inverse document frequency over all movies) and exemplar movies.
+# Everything is computed with groupby over whole columns, and the file is small
+# enough for the client to load up front (cluster labels, zoom-to-cluster).
+SUMMARY_VERSION = 1
+NOISE_LABEL = -1
+
+
+def _sorted_unique(keys):
+    """Distinct values of an int64 array and their counts (sort-based, like np.unique)."""
+    keys = np.sort(keys)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.diff(np.r_[starts, len(keys)])
+
+
+def term_scores(labels, lists, top, min_movies=2):
+    """Top `top` terms per cluster by TF-IDF against the global distribution.
+
+    `lists` holds one list of terms per movie (genres or keywords), row-aligned
+    with `labels`. A term counts once per movie. Terms carried by fewer than
+    `min_movies` movies of a cluster are skipped, so a single oddly tagged
+    movie does not label its cluster. Returns {label: [{term, movies, share,
+    score}, ...]}, best first; noise is left out.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    n = len(labels)
+    lengths = np.fromiter((len(terms) for terms in lists), dtype=np.int64, count=n)
+    codes, vocabulary = pd.factorize(pd.Series(list(chain.from_iterable(lists)), dtype=object).astype(str))
+    rows = np.repeat(np.arange(n), lengths)
+    keep = codes >= 0
+    if len(vocabulary) and (vocabulary == "").any():
+        keep &= codes != vocabulary.get_loc("")
+    if not keep.any():
+        return {}
+
+    # (movie, term) pairs, each counted once, then (cluster, term) counts via one sort
+    vocab_size = len(vocabulary)
+    pairs, _ = _sorted_unique(rows[keep] * vocab_size + codes[keep])
+    rows, codes = pairs // vocab_size, pairs % vocab_size
+    doc_freq = np.bincount(codes, minlength=vocab_size)
+    offset = labels.min()
+    keys, movies = _sorted_unique((labels[rows] - offset) * vocab_size + codes)
+    cluster, term = keys // vocab_size + offset, keys % vocab_size
+    mask = (cluster != NOISE_LABEL) & (movies >= min_movies)
+    cluster, term, movies = cluster[mask], term[mask], movies[mask]
+
+    label_values, sizes = _sorted_unique(labels)
+    share = movies / sizes[np.searchsorted(label_values, cluster)]
+    score = share * np.log(n / doc_freq[term])
+
+    # Best first within each cluster, then the first `top` of every cluster
+    order = np.lexsort((term, -score, cluster))
+    cluster, term, movies, share, score = cluster[order], term[order], movies[order], share[order], score[order]
+    starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+    rank = np.arange(len(cluster)) - np.repeat(starts, np.diff(np.r_[starts, len(cluster)]))
+    best = rank < top
+
+    result = {}
+    for label, t, m, sh, sc in zip(cluster[best], term[best], movies[best], share[best], score[best]):
+        result.setdefault(int(label), []).append(
+            {"term": vocabulary[t], "movies": int(m), "share": round(float(sh), 4), "score": round(float(sc), 4)}
+        )
+    return result
+
+
+def exemplar_rows(labels, strengths, popularity, count):
+    """Up to `count` rows per cluster with the highest membership strength, ties broken by popularity.
+
+    HDBSCAN's own exemplars are the members that persist longest in the
+    cluster tree, i.e. strength 1.0. This picks from the same top of each
+    cluster using the per-movie strengths, so placed (landmark or appended)
+    movies qualify too. Returns {label: [row, ...]}; noise is left out.
+    """
+    frame = pd.DataFrame({
+        "cluster": np.asarray(labels),
+        "strength": np.asarray(strengths, dtype=np.float64),
+        "popularity": np.asarray(popularity, dtype=np.float64),
+        "row": np.arange(len(labels))
+    })
+    frame = frame[frame["cluster"] != NOISE_LABEL]
+    best = (frame.sort_values(["cluster", "strength", "popularity", "row"], ascending=[True, False, False, True])
+                 .groupby("cluster", sort=False).head(count))
+    return {int(label): group["row"].tolist() for label, group in best.groupby("cluster", sort=True)}
+
+
+def cluster_summary(df, ids, genres, keywords, top_genres, top_keywords, exemplars):
+    """Summary of the placed frame (x/y/z/cluster/cluster_confidence/popularity/title).
+
+    `genres` and `keywords` are row-aligned list columns. Exemplar `row`s index
+    the flat web exports (JSON records, columnar rows).
+    """
+    labels = df['cluster'].to_numpy()
+    stats = pd.DataFrame({
+        "cluster": labels,
+        "x": df['x'].to_numpy(np.float64),
+        "y": df['y'].to_numpy(np.float64),
+        "z": df['z'].to_numpy(np.float64),
+        "confidence": df['cluster_confidence'].to_numpy(np.float64)
+    }).groupby("cluster", sort=True).agg(
+        size=("x", "size"),
+        cx=("x", "mean"), cy=("y", "mean"), cz=("z", "mean"),
+        min_x=("x", "min"), min_y=("y", "min"), min_z=("z", "min"),
+        max_x=("x", "max"), max_y=("y", "max"), max_z=("z", "max"),
+        mean_confidence=("confidence", "mean")
+    )
+
+    genre_terms = term_scores(labels, genres, top_genres)
+    keyword_terms = term_scores(labels, keywords, top_keywords)
+    exemplars = exemplar_rows(labels, df['cluster_confidence'], df['popularity'].fillna(0), exemplars)
+    titles = df['title'].fillna("").astype(str).to_numpy()
+
+    def point(a, b, c):
+        return [round(float(a), 4), round(float(b), 4), round(float(c), 4)]
+
+    clusters = []
+    for label, row in stats.iterrows():
+        if label == NOISE_LABEL:
+            continue
+        clusters.append({
+            "cluster": int(label),
+            "size": int(row["size"]),
+            "centroid": point(row["cx"], row["cy"], row["cz"]),
+            "bbox": {"min": point(row["min_x"], row["min_y"], row["min_z"]),
+                     "max": point(row["max_x"], row["max_y"], row["max_z"])},
+            "mean_confidence": round(float(row["mean_confidence"]), 4),
+            "genres": genre_terms.get(int(label), []),
+            "keywords": keyword_terms.get(int(label), []),
+            "exemplars": [{"row": r, "id": ids[r], "title": titles[r]} for r in exemplars.get(int(label), [])]
+        })
+
+    return {
+        "version": SUMMARY_VERSION,
+        "movies": int(len(df)),
+        "noise": int(stats["size"].get(NOISE_LABEL, 0)),
+        "clusters": clusters
+    }
+
+
+def write_cluster_summary(path, summary):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def read_cluster_summary(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,123 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+# Columnar web payload: one little-endian binary blob of typed arrays plus a JSON
+# manifest describing each column (dtype, byte offset, length) and holding the
+# dictionaries and plain string columns. Offsets are aligned so the client can
+# wrap each column in a TypedArray without copying.
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+
+def dictionary_dtype(size):
+    return np.dtype('<u1') if size <= 0xff else np.dtype('<u2') if size <= 0xffff else np.dtype('<u4')
+
+
+def _clean(value):
+    """JSON-safe scalar: NaN/None -> None, numpy scalars -> Python."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def dictionary_encode(values):
+    """(codes, dictionary) with missing values kept as a null dictionary entry."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    dictionary = [_clean(v) for v in uniques]
+    return codes.astype(dictionary_dtype(len(dictionary))), dictionary
+
+
+def encode_lists(lists):
+    """Flatten list cells into (offsets uint32 [n + 1], codes, dictionary)."""
+    lengths = np.fromiter((len(cell) for cell in lists), dtype=np.int64, count=len(lists))
+    offsets = np.zeros(len(lists) + 1, dtype='<u4')
+    np.cumsum(lengths, out=offsets[1:])
+    flat = [value for cell in lists for value in cell]
+    codes, dictionary = dictionary_encode(flat) if flat else (np.zeros(0, dtype='<u1'), [])
+    return offsets, codes, dictionary
+
+
+def write_columnar(bin_path, manifest_path, count, columns=None, categories=None, lists=None,
+                   strings=None, nulls=None):
+    """Write a columnar table.
+
+    columns    : name -> numeric array (stored with its dtype, little-endian)
+    categories : name -> values, dictionary-encoded to uint8/uint16 codes
+    lists      : name -> list cells, dictionary-encoded values plus uint32 offsets
+    strings    : name -> values, stored in the manifest as a JSON array
+    nulls      : name -> sentinel value the client should read as null
+    """
+    specs, blobs = {}, []
+    position = 0
+
+    def add(array):
+        nonlocal position
+        array = np.ascontiguousarray(array)
+        array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+        padding = -position % ALIGNMENT
+        blobs.append(b'\0' * padding)
+        position += padding
+        spec = {"dtype": array.dtype.name, "offset": position, "length": int(array.size)}
+        blobs.append(array.tobytes())
+        position += array.nbytes
+        return spec
+
+    for name, values in (columns or {}).items():
+        specs[name] = add(np.asarray(values))
+    for name, values in (categories or {}).items():
+        codes, dictionary = dictionary_encode(values)
+        specs[name] = {**add(codes), "dictionary": dictionary}
+    for name, cells in (lists or {}).items():
+        offsets, codes, dictionary = encode_lists(cells)
+        specs[name] = {**add(codes), "offsets": add(offsets), "dictionary": dictionary}
+    for name, value in (nulls or {}).items():
+        specs[name]["null"] = value
+
+    with open(bin_path, 'wb') as f:
+        for blob in blobs:
+            f.write(blob)
+
+    manifest = {
+        "version": FORMAT_VERSION,
+        "count": int(count),
+        "byte_length": position,
+        "columns": specs,
+        "strings": {name: [_clean(v) for v in values] for name, values in (strings or {}).items()}
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def take_rows(table, rows):
+    """Subset of a write_columnar keyword table (columns/categories/lists/strings) by row index."""
+    return {
+        section: {name: values[rows] for name, values in content.items()} if section != 'nulls' else content
+        for section, content in table.items()
+    }
+
+
+def read_columnar(bin_path, manifest_path):
+    """Decode a columnar table back into {name: array or list} (for checks and benchmarks)."""
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    data = np.fromfile(bin_path, dtype=np.uint8)
+
+    def view(spec):
+        dtype = np.dtype(spec['dtype']).newbyteorder('<')
+        return np.frombuffer(data, dtype=dtype, count=spec['length'], offset=spec['offset'])
+
+    table = dict(manifest['strings'])
+    for name, spec in manifest['columns'].items():
+        values = view(spec)
+        if 'offsets' in spec:
+            offsets = view(spec['offsets'])
+            words = [spec['dictionary'][code] for code in values]
+            table[name] = [words[offsets[i]:offsets[i + 1]] for i in range(manifest['count'])]
+        elif 'dictionary' in spec:
+            table[name] = [spec['dictionary'][code] for code in values]
+        else:
+            table[name] = values
+    return table
@@ -0,0 +1,302 @@
+"""Versioned web export manifest and record-level deltas between exports.
+
+Step 05 hashes every exported record twice: once over its placement
+(x/y/z/cluster/cluster_confidence) and once over everything else. The hashes
+are kept in data/output/versions/records.npz. When a run's records differ from
+the previous version's, it bumps the version and writes a delta:
+  - removed: ids that left the catalog
+  - added:   full records of new ids
+  - updated: full records whose content changed
+  - moved:   id plus placement fields, for records where only the placement changed
+  - order:   the new row order as [start, length] runs over the previous rows
+             followed by the added records, so row-indexed side files
+             (neighbor table, title index) line up after applying
+plotpoint_manifest.json names the version, the dataset hash, the exported files
+(size and sha1) and the chain of recent deltas. A client holding version v
+fetches the deltas from v up to the current one, instead of the full export.
+
+    python src/delta.py apply OLD.json deltas/delta_3_4.json --expect plotpoint_data_3d.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+PLACEMENT_FIELDS = ['x', 'y', 'z', 'cluster', 'cluster_confidence']
+FLOAT_PLACEMENT_FIELDS = ['x', 'y', 'z', 'cluster_confidence']
+
+
+def _as_text(values):
+    """Column of JSON values as strings; list cells (genres) through their JSON text."""
+    if any(isinstance(v, list) for v in values):
+        values = [json.dumps(v, ensure_ascii=False) for v in values]
+    return pd.Series(values, dtype=object).astype(str)
+
+
+def digest_columns(columns):
+    """(content, placement) uint64 hashes of every record in a json_columns chunk.
+
+    Placement floats are hashed as float32, the precision of the columnar
+    export, so reloading positions from either export never counts as a move.
+    """
+    placement = pd.DataFrame({
+        field: np.asarray(columns[field], dtype=np.float32 if field in FLOAT_PLACEMENT_FIELDS else np.int64)
+        for field in PLACEMENT_FIELDS
+    })
+    content = pd.DataFrame({
+        field: _as_text(values) for field, values in columns.items() if field not in PLACEMENT_FIELDS
+    })
+    return (pd.util.hash_pandas_object(content, index=False).to_numpy(np.uint64),
+            pd.util.hash_pandas_object(placement, index=False).to_numpy(np.uint64))
+
+
+def record_digests(chunks):
+    """Concatenated digest_columns over an iterable of json_columns chunks."""
+    content, placement = [], []
+    for columns in chunks:
+        c, p = digest_columns(columns)
+        content.append(c)
+        placement.append(p)
+    if not content:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64)
+    return np.concatenate(content), np.concatenate(placement)
+
+
+def records_from_columns(columns):
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+def columns_from_records(records):
+    keys = list(records[0]) if records else []
+    return {key: [record[key] for record in records] for key in keys}
+
+
+def dataset_hash(ids, content, placement):
+    digest = hashlib.sha1()
+    digest.update("\n".join(ids).encode('utf-8'))
+    digest.update(np.ascontiguousarray(content).tobytes())
+    digest.update(np.ascontiguousarray(placement).tobytes())
+    return digest.hexdigest()
+
+
+def order_runs(codes):
+    """[start, length] runs of consecutive integers covering `codes` in order."""
+    codes = np.asarray(codes, dtype=np.int64)
+    if not len(codes):
+        return []
+    breaks = np.flatnonzero(np.diff(codes) != 1) + 1
+    starts = np.r_[0, breaks]
+    lengths = np.diff(np.r_[starts, len(codes)])
+    return [[int(codes[s]), int(n)] for s, n in zip(starts, lengths)]
+
+
+def diff_records(old_ids, old_content, old_placement, new_ids, new_content, new_placement):
+    """Row-level differences between two versions.
+
+    Returns {"removed": ids, "added": new rows, "updated": new rows, "moved":
+    new rows, "order": runs}; rows index the new version.
+    """
+    old_pos = pd.Index(old_ids).get_indexer(pd.Index(new_ids))
+    kept = old_pos >= 0
+    new_rows = np.arange(len(new_ids))
+    added = new_rows[~kept]
+    kept_rows, kept_old = new_rows[kept], old_pos[kept]
+    content_changed = new_content[kept_rows] != old_content[kept_old]
+    placement_changed = new_placement[kept_rows] != old_placement[kept_old]
+
+    still_present = np.zeros(len(old_ids), dtype=bool)
+    still_present[kept_old] = True
+    codes = old_pos.copy()
+    codes[added] = len(old_ids) + np.arange(len(added))
+    return {
+        "removed": [old_ids[i] for i in np.flatnonzero(~still_present)],
+        "added": added.tolist(),
+        "updated": kept_rows[content_changed].tolist(),
+        "moved": kept_rows[~content_changed & placement_changed].tolist(),
+        "order": order_runs(codes)
+    }
+
+
+def file_entry(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"bytes": Path(path).stat().st_size, "sha1": digest.hexdigest()}
+
+
+def load_records_state(path):
+    if not Path(path).exists():
+        return None
+    with np.load(path, allow_pickle=False) as state:
+        return {
+            "version": int(state["version"]),
+            "ids": state["ids"].tolist(),
+            "content": state["content"],
+            "placement": state["placement"]
+        }
+
+
+def save_records_state(path, version, ids, content, placement):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp.npz')
+    np.savez(tmp, version=np.int64(version), ids=np.asarray(ids, dtype=str), content=content, placement=placement)
+    os.replace(tmp, path)
+
+
+def load_manifest(path):
+    if not Path(path).exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_version(manifest_path, deltas_dir, records_path, ids, content, placement, records_at, files,
+                  history=10):
+    """Bump the export version when the records changed and write its delta and manifest.
+
+    `records_at(rows)` returns the export records of the given rows (only
+    called for added/updated rows). `files` lists the exported files to
+    describe in the manifest. Keeps the deltas of the last `history` versions.
+    Returns the manifest.
+    """
+    manifest_path, deltas_dir = Path(manifest_path), Path(deltas_dir)
+    ids = list(ids)
+    new_hash = dataset_hash(ids, content, placement)
+    state = load_records_state(records_path)
+    manifest = load_manifest(manifest_path) or {}
+    old_hash = dataset_hash(state["ids"], state["content"], state["placement"]) if state is not None else None
+    deltas = manifest.get("deltas", []) if state is not None else []
+
+    if old_hash == new_hash:
+        version = state["version"]
+    elif state is None:
+        # No record hashes to diff against: start a new chain, still counting up
+        version = manifest.get("version", 0) + 1
+    else:
+        version = state["version"] + 1
+        diff = diff_records(state["ids"], state["content"], state["placement"], ids, content, placement)
+        full_rows = diff["added"] + diff["updated"]
+        full = dict(zip(full_rows, records_at(full_rows))) if full_rows else {}
+        moved = records_at(diff["moved"]) if diff["moved"] else []
+        delta = {
+            "format": FORMAT_VERSION,
+            "from": state["version"],
+            "to": version,
+            "from_hash": old_hash,
+            "to_hash": new_hash,
+            "from_count": len(state["ids"]),
+            "count": len(ids),
+            "removed": diff["removed"],
+            "added": [full[row] for row in diff["added"]],
+            "updated": [full[row] for row in diff["updated"]],
+            "moved": [{"id": record["id"], **{f: record[f] for f in PLACEMENT_FIELDS}} for record in moved],
+            "order": diff["order"]
+        }
+        deltas_dir.mkdir(parents=True, exist_ok=True)
+        delta_path = deltas_dir / f"delta_{delta['from']}_{delta['to']}.json"
+        with open(delta_path, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, ensure_ascii=False, separators=(',', ':'))
+        deltas.append({
+            "from": delta["from"],
+            "to": version,
+            "file": f"{deltas_dir.name}/{delta_path.name}",
+            "bytes": delta_path.stat().st_size,
+            **{key: len(delta[key]) for key in ("added", "removed", "updated", "moved")}
+        })
+        print(f"Export version {version}: {len(delta['added'])} added, {len(delta['removed'])} removed, "
+              f"{len(delta['updated'])} updated, {len(delta['moved'])} moved "
+              f"({delta_path.stat().st_size / 1e3:.0f} kB delta)")
+
+    # Older deltas leave the chain (and the disk); clients that far behind reload the full export
+    for old in deltas[:-history] if history else deltas:
+        (manifest_path.parent / old["file"]).unlink(missing_ok=True)
+    deltas = deltas[-history:] if history else []
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "hash": new_hash,
+        "count": len(ids),
+        "created": manifest.get("created") if old_hash == new_hash and manifest.get("created")
+                   else time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": {Path(path).name: file_entry(path) for path in files if Path(path).exists()},
+        "deltas": deltas
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    save_records_state(records_path, version, ids, content, placement)
+    return manifest
+
+
+def apply_delta(records, delta):
+    """Records of version delta['to'] from the records of version delta['from']."""
+    if len(records) != delta["from_count"]:
+        raise ValueError(f"Delta {delta['from']}->{delta['to']} expects {delta['from_count']} records, "
+                         f"got {len(records)}")
+    base = list(records)
+    position = {record["id"]: i for i, record in enumerate(base)}
+    for record in delta["updated"]:
+        base[position[record["id"]]] = record
+    for change in delta["moved"]:
+        i = position[change["id"]]
+        base[i] = {**base[i], **change}
+    pool = base + delta["added"]
+    result = [pool[code] for start, length in delta["order"] for code in range(start, start + length)]
+    if len(result) != delta["count"]:
+        raise ValueError(f"Delta {delta['from']}->{delta['to']} produced {len(result)} records, "
+                         f"expected {delta['count']}")
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Apply export deltas to a plotpoint_data_3d.json.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    apply = commands.add_parser('apply', help="Apply one or more deltas in order.")
+    apply.add_argument('base', help="Export JSON of the version the first delta starts from.")
+    apply.add_argument('deltas', nargs='+', help="Delta files, oldest first.")
+    apply.add_argument('--out', help="Write the resulting records here.")
+    apply.add_argument('--expect', help="Export JSON the result must equal (exit 1 otherwise).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.base, encoding='utf-8') as f:
+        records = json.load(f)
+    for path in args.deltas:
+        with open(path, encoding='utf-8') as f:
+            delta = json.load(f)
+        start = time.perf_counter()
+        records = apply_delta(records, delta)
+        print(f"Applied {Path(path).name} (v{delta['from']} -> v{delta['to']}): {len(records)} records "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(records, f, ensure_ascii=False, separators=(',', ':'))
+    if args.expect:
+        with open(args.expect, encoding='utf-8') as f:
+            expected = json.load(f)
+        # Compared the way step 05 compares versions: ids plus content/placement digests
+        result_ids, expected_ids = [r["id"] for r in records], [r["id"] for r in expected]
+        result_digests = digest_columns(columns_from_records(records)) if records else None
+        expected_digests = digest_columns(columns_from_records(expected)) if expected else None
+        if result_ids != expected_ids or (records and any(
+                (a != b).any() for a, b in zip(result_digests, expected_digests))):
+            print(f"Result differs from {args.expect}.")
+            return 1
+        print(f"Result matches {args.expect}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import hashlib
+import sqlite3
+
+import numpy as np
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK = 900
+
+
+def content_hash(text):
+    """Stable hash of an embedding input string."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent float32 embedding store keyed by (model name, content hash).
+
+    Backed by a single SQLite file so it survives between runs and needs no
+    extra dependency. Vectors are stored as raw float32 bytes.
+    """
+
+    def __init__(self, path, model_name):
+        self.model_name = model_name
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, content_hash))"
+        )
+        self.conn.commit()
+
+    def get_many(self, hashes):
+        """Return {content_hash: vector} for every hash present in the cache."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), LOOKUP_CHUNK):
+            chunk = unique[start:start + LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT content_hash, vector FROM embeddings"
+                f" WHERE model = ? AND content_hash IN ({placeholders})",
+                [self.model_name, *chunk]
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, hashes, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, content_hash, dim, vector) VALUES (?, ?, ?, ?)",
+            [(self.model_name, key, vec.shape[0], vec.tobytes()) for key, vec in zip(hashes, vectors)]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,96 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import peak_rss_mb
+
+
+def stable_ids(df):
+    """Chroma ids for a frame: the TMDB id when present, else the row position.
+
+    Repeated ids get a "#n" suffix so every row keeps a unique key.
+    """
+    if 'id' in df.columns:
+        ids = df['id'].astype(str).reset_index(drop=True)
+    else:
+        ids = pd.Series(range(len(df))).astype(str)
+    repeat = ids.groupby(ids).cumcount()
+    ids = ids.where(repeat == 0, ids + "#" + repeat.astype(str))
+    return ids.tolist()
+
+
+def save_embedding_matrix(embeddings, ids, matrix_path, ids_path, model_key=None):
+    """Write embeddings as a float32 .npy (row i = ids[i]) plus a JSON id index."""
+    matrix_path, ids_path = Path(matrix_path), Path(ids_path)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    # Write to temp files first so a crash never leaves a matrix/index mismatch
+    tmp_matrix = matrix_path.with_suffix('.tmp.npy')
+    np.save(tmp_matrix, matrix)
+    tmp_ids = ids_path.with_suffix('.tmp')
+    with open(tmp_ids, 'w', encoding='utf-8') as f:
+        json.dump({"model": model_key, "dim": int(matrix.shape[1]), "ids": list(ids)}, f)
+    os.replace(tmp_matrix, matrix_path)
+    os.replace(tmp_ids, ids_path)
+
+
+def load_embedding_matrix(matrix_path, ids_path, ids):
+    """Memory-map the exported matrix in `ids` order.
+
+    Returns a zero-copy read-only view when the stored order matches, a
+    gathered copy when only the order differs, and None when the export is
+    missing or does not cover every id.
+    """
+    matrix_path, ids_path = Path(matrix_path), Path(ids_path)
+    if not matrix_path.exists() or not ids_path.exists():
+        return None
+
+    with open(ids_path, encoding='utf-8') as f:
+        stored_ids = json.load(f)['ids']
+    matrix = np.load(matrix_path, mmap_mode='r')
+    if len(stored_ids) != matrix.shape[0]:
+        return None
+    if stored_ids == list(ids):
+        return matrix
+
+    position = {item_id: pos for pos, item_id in enumerate(stored_ids)}
+    if any(item_id not in position for item_id in ids):
+        return None
+    return matrix[[position[item_id] for item_id in ids]]
+
+
+def read_chroma_embeddings(collection, ids, page_size=1000):
+    """Paged Chroma reader that fills a preallocated float32 array in `ids` order."""
+    position = {item_id: pos for pos, item_id in enumerate(ids)}
+    embeddings = None
+    filled = 0
+    for start in range(0, len(ids), page_size):
+        page = collection.get(ids=ids[start:start + page_size], include=['embeddings'])
+        vectors = np.asarray(page['embeddings'], dtype=np.float32)
+        if embeddings is None:
+            embeddings = np.empty((len(ids), vectors.shape[1]), dtype=np.float32)
+        embeddings[[position[item_id] for item_id in page['ids']]] = vectors
+        filled += len(page['ids'])
+    if filled != len(ids):
+        raise ValueError(f"Chroma returned {filled} of {len(ids)} requested embeddings")
+    return embeddings
+
+
+def load_embeddings(ids, matrix_path, ids_path, chroma_path, collection_name):
+    """Embeddings for `ids`, from the memory-mapped export or (fallback) Chroma."""
+    start = time.perf_counter()
+    embeddings = load_embedding_matrix(matrix_path, ids_path, ids)
+    source = f"memory-mapped {Path(matrix_path).name}"
+    if embeddings is None:
+        import chromadb
+        client = chromadb.PersistentClient(path=str(chroma_path))
+        collection = client.get_collection(name=collection_name)
+        embeddings = read_chroma_embeddings(collection, ids)
+        source = "ChromaDB (paged)"
+    print(f"Loaded {embeddings.shape[0]}x{embeddings.shape[1]} embeddings from {source} "
+          f"in {time.perf_counter() - start:.2f}s (peak RSS {peak_rss_mb():.0f} MB)")
+    return embeddings
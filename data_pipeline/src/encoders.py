@@ -0,0 +1,236 @@
+import multiprocessing as mp
+import os
+import platform
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+# torch: float32 PyTorch (CUDA when available)
+# int8: PyTorch with dynamic int8 quantization of every Linear layer (CPU)
+# onnx / onnx-int8: ONNX Runtime export, float32 or dynamically quantized (CPU)
+# stub: no model at all, deterministic hashed-word vectors (offline tests and benchmarks)
+BACKENDS = ('torch', 'int8', 'onnx', 'onnx-int8', 'stub')
+EXPORT_DIR = Path(__file__).resolve().parent / "../data/output/encoders"
+
+# Stub encoder: hashed word counts projected to the dimension of step 03's model (all-mpnet-base-v2)
+STUB_DIM = 768
+STUB_FEATURES = 2 ** 14
+STUB_SEED = 0
+STUB_CHUNK = 20_000
+
+# Batches handed to a worker at a time; shards are contiguous runs of the
+# length-sorted input so every batch inside a shard pads to a similar length.
+BATCHES_PER_SHARD = 8
+
+_worker_model = None
+
+
+def get_device():
+    import torch
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+def cache_key(model_name, backend='torch'):
+    """Name under which a model/backend pair's embeddings are cached and stored."""
+    return model_name if backend == 'torch' else f"{model_name}@{backend}"
+
+
+class StubEncoder:
+    """Offline stand-in for a SentenceTransformer, for benchmarks without network.
+
+    Each text is a bag of hashed words pushed through a fixed random
+    projection and L2-normalized, so vectors are deterministic and texts that
+    share words still land near each other. The model name is ignored.
+    """
+
+    def __init__(self, dim=STUB_DIM, features=STUB_FEATURES, seed=STUB_SEED):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.vectorizer = HashingVectorizer(n_features=features, alternate_sign=False, norm=None,
+                                            dtype=np.float32)
+        rng = np.random.default_rng(seed)
+        self.projection = rng.standard_normal((features, dim), dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return self.projection.shape[1]
+
+    def encode(self, sentences, batch_size=None, convert_to_numpy=True, **kwargs):
+        if isinstance(sentences, str):
+            return self.encode([sentences])[0]
+        out = np.empty((len(sentences), self.projection.shape[1]), dtype=np.float32)
+        for start in range(0, len(sentences), STUB_CHUNK):
+            vectors = self.vectorizer.transform(sentences[start:start + STUB_CHUNK]) @ self.projection
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            out[start:start + len(vectors)] = vectors / np.maximum(norms, 1e-12)
+        return out
+
+
+def _onnx_session_kwargs(threads):
+    if not threads:
+        return {}
+    import onnxruntime as ort
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    return {'session_options': options}
+
+
+def _load_onnx(model_name, quantized, threads=None, export_dir=None):
+    """Load the ONNX export of a model, exporting (and quantizing) it on first use."""
+    from sentence_transformers import SentenceTransformer
+
+    export_dir = Path(export_dir or EXPORT_DIR).resolve() / model_name.strip('/').replace('/', '__')
+    onnx_dir = export_dir / 'onnx'
+
+    if not (onnx_dir / 'model.onnx').exists():
+        print(f"Exporting {model_name} to ONNX at {export_dir}...")
+        SentenceTransformer(model_name, device='cpu', backend='onnx').save(str(export_dir))
+
+    file_name = 'model.onnx'
+    if quantized:
+        candidates = sorted(onnx_dir.glob('model_*int8_*.onnx'))
+        if not candidates:
+            from sentence_transformers import export_dynamic_quantized_onnx_model
+            machine = platform.machine().lower()
+            config = 'arm64' if machine in ('arm64', 'aarch64') else 'avx2'
+            print(f"Quantizing ONNX export ({config})...")
+            exported = SentenceTransformer(str(export_dir), device='cpu', backend='onnx',
+                                           model_kwargs={'file_name': 'onnx/model.onnx'})
+            export_dynamic_quantized_onnx_model(exported, config, str(export_dir))
+            candidates = sorted(onnx_dir.glob('model_*int8_*.onnx'))
+        file_name = candidates[0].name
+
+    model_kwargs = {'file_name': f'onnx/{file_name}', **_onnx_session_kwargs(threads)}
+    return SentenceTransformer(str(export_dir), device='cpu', backend='onnx', model_kwargs=model_kwargs)
+
+
+def load_encoder(model_name, device=None, backend='torch', threads=None):
+    """Load a sentence encoder; every backend exposes the same encode() interface."""
+    if backend == 'stub':
+        return StubEncoder()
+    from sentence_transformers import SentenceTransformer
+
+    if backend == 'torch':
+        return SentenceTransformer(model_name, device=device or get_device())
+    if backend == 'int8':
+        import torch
+        model = SentenceTransformer(model_name, device='cpu')
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend in ('onnx', 'onnx-int8'):
+        return _load_onnx(model_name, quantized=backend == 'onnx-int8', threads=threads)
+    raise ValueError(f"Unknown encoder backend '{backend}' (expected one of {BACKENDS})")
+
+
+def token_lengths(model, sentences):
+    """Token count of every sentence (after truncation to the model's max length)."""
+    encoded = model.tokenizer(
+        sentences,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=model.max_seq_length
+    )
+    return np.fromiter((len(ids) for ids in encoded['input_ids']), dtype=np.int32, count=len(sentences))
+
+
+def length_sorted_shards(lengths, batch_size, batches_per_shard=BATCHES_PER_SHARD):
+    """Split positions into shards of similar token length, longest shard first."""
+    order = np.argsort(lengths, kind='stable')
+    shard_size = batch_size * batches_per_shard
+    shards = [order[i:i + shard_size] for i in range(0, len(order), shard_size)]
+    return shards[::-1]
+
+
+def _init_worker(model_name, threads, backend):
+    import torch
+    torch.set_num_threads(threads)
+    global _worker_model
+    _worker_model = load_encoder(model_name, device='cpu', backend=backend, threads=threads)
+
+
+def _encode_shard(indices, sentences, batch_size):
+    vectors = _worker_model.encode(sentences, batch_size=batch_size, convert_to_numpy=True)
+    return indices, vectors.astype(np.float32)
+
+
+def iter_encode_cpu(model_name, sentences, batch_size=32, workers=1, threads_per_worker=None, model=None,
+                    backend='torch'):
+    """CPU throughput mode: length-bucketed shards encoded across a process pool.
+
+    Inputs are sorted by token length and cut into shards, shards are
+    encoded by `workers` processes (each pinned to `threads_per_worker`
+    torch threads). Yields (positions, vectors) per shard as shards finish.
+    """
+    import torch
+
+    workers = max(1, workers)
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    if model is None:
+        # Loaded in the parent first so ONNX exports are written once, before workers start
+        model = load_encoder(model_name, device='cpu', backend=backend, threads=threads)
+
+    lengths = token_lengths(model, sentences)
+    shards = length_sorted_shards(lengths, batch_size)
+
+    if workers == 1:
+        torch.set_num_threads(threads)
+        for shard in shards:
+            vectors = model.encode([sentences[i] for i in shard], batch_size=batch_size, convert_to_numpy=True)
+            yield shard, vectors.astype(np.float32)
+        return
+
+    context = mp.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(model_name, threads, backend)) as pool:
+        futures = [
+            pool.submit(_encode_shard, shard, [sentences[i] for i in shard], batch_size)
+            for shard in shards
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def collect(count, shards):
+    """Row-aligned matrix from (positions, vectors) shards."""
+    embeddings = None
+    for indices, vectors in shards:
+        if embeddings is None:
+            embeddings = np.empty((count, vectors.shape[1]), dtype=np.float32)
+        embeddings[indices] = vectors
+    return embeddings
+
+
+def encode_cpu(model_name, sentences, batch_size=32, workers=1, threads_per_worker=None, model=None, backend='torch'):
+    """iter_encode_cpu, collected into one row-aligned matrix."""
+    return collect(len(sentences),
+                   iter_encode_cpu(model_name, sentences, batch_size, workers, threads_per_worker, model, backend))
+
+
+def iter_encode(model_name, sentences, batch_size=32, workers=1, threads_per_worker=None, backend='torch'):
+    """Encode on CUDA when available (torch backend), otherwise with the CPU throughput engine.
+
+    Yields (positions, vectors) shards as they are encoded, so callers can
+    store finished rows while the rest is still encoding.
+    """
+    if backend == 'stub':
+        print(f"Using the stub encoder (backend: stub, {STUB_DIM}-d hashed word vectors, no model)")
+        model = StubEncoder()
+        shard_size = batch_size * BATCHES_PER_SHARD
+        for start in range(0, len(sentences), shard_size):
+            yield np.arange(start, min(start + shard_size, len(sentences))), model.encode(
+                sentences[start:start + shard_size])
+        return
+    device = get_device() if backend == 'torch' else 'cpu'
+    print(f"Using device: {device} (backend: {backend})")
+    if device == 'cuda':
+        model = load_encoder(model_name, device=device)
+        for shard in length_sorted_shards(token_lengths(model, sentences), batch_size):
+            vectors = model.encode([sentences[i] for i in shard], batch_size=batch_size, convert_to_numpy=True)
+            yield shard, vectors.astype(np.float32)
+        return
+    print(f"CPU encoding with {workers} worker(s), length-bucketed batches of {batch_size}")
+    yield from iter_encode_cpu(model_name, sentences, batch_size, workers, threads_per_worker, backend=backend)
+
+
+def encode_sentences(model_name, sentences, batch_size=32, workers=1, threads_per_worker=None, backend='torch'):
+    """iter_encode, collected into one row-aligned matrix."""
+    return collect(len(sentences),
+                   iter_encode(model_name, sentences, batch_size, workers, threads_per_worker, backend))
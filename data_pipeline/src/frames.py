@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pandas as pd
+
+# Stage hand-off files. The standalone scripts write CSV; the pipeline runner
+# (plotpoint.py) writes Parquet next to it under the same name. Readers take
+# whichever was written last, so both ways of running the pipeline can be mixed.
+
+
+def parquet_path(csv_path):
+    return Path(csv_path).with_suffix('.parquet')
+
+
+def latest_frame_path(csv_path):
+    """The CSV or its Parquet sibling, whichever exists and is newer (None if neither)."""
+    candidates = [p for p in (Path(csv_path), parquet_path(csv_path)) if p.exists()]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda p: p.stat().st_mtime_ns)
+
+
+def read_frame(csv_path):
+    path = latest_frame_path(csv_path) or Path(csv_path)
+    if path.suffix == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def save_frame(df, path):
+    """Write a stage frame as Parquet (object columns holding mixed types become strings)."""
+    import pyarrow as pa
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        df.to_parquet(path, index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        df.to_parquet(path, index=False)
@@ -0,0 +1,317 @@
+"""Per-span run metrics for the pipeline scripts.
+
+Wrap the main work of a script in `instrumented(name)` and each phase in
+`span(name)`. Spans nest: a span opened inside another is recorded as
+"outer/inner", so under the runner step 05's UMAP fit shows up as
+"reduce/umap". Each span records:
+  - wall time and CPU time (this process plus pool workers that exited
+    inside the span)
+  - peak RSS (on Linux, the high-water mark is reset at every span start,
+    so the peak belongs to the span; elsewhere it is the process peak so far)
+  - a row count when the caller sets one, and the resulting rows/sec
+
+When the outermost `instrumented` block exits, it writes a JSON report to
+data/output/metrics/ and prints a span table. PLOTPOINT_PROFILE="umap,encode"
+(span names or full paths, or "all") also dumps a cProfile .prof per matching
+span next to the report. A report can be read with pstats or snakeviz.
+
+    python src/instrumentation.py compare                  # latest two reports
+    python src/instrumentation.py compare BASE.json NEW.json --threshold 0.2
+"""
+import argparse
+import cProfile
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+METRICS_DIR = Path(__file__).resolve().parent / "../data/output/metrics"
+REPORT_VERSION = 1
+PROFILE_ENV = "PLOTPOINT_PROFILE"
+
+# compare: a span regresses when a metric grows by more than `threshold` (relative)
+# and by more than the absolute floor, so tiny spans do not flag on noise
+REGRESSION_THRESHOLD = 0.2
+ABSOLUTE_FLOORS = {"wall_s": 0.5, "cpu_s": 0.5, "peak_rss_mb": 50}
+COMPARED_METRICS = ["wall_s", "cpu_s", "peak_rss_mb"]
+
+_CLEAR_REFS = Path("/proc/self/clear_refs")
+_STATUS = Path("/proc/self/status")
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _status_mb(field):
+    try:
+        for line in _STATUS.read_text().splitlines():
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak():
+    """Reset the RSS high-water mark (Linux); False when that is not possible."""
+    try:
+        _CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb():
+    return _status_mb("VmRSS") or peak_rss_mb()
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class Span:
+    def __init__(self, path, rows=None):
+        self.path = path
+        self.rows = rows                 # set by the caller when the span processes rows
+        self.peak_mb = 0.0               # highest RSS seen so far in this span (children included)
+        self.profile = None
+
+
+class Recorder:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.run_id = time.strftime("%Y%m%d-%H%M%S") + f"-{name}"
+        self.spans = {}                  # path -> aggregated metrics, in first-seen order
+        self.stack = []
+        self.can_reset = _reset_peak()
+        profile = os.environ.get(PROFILE_ENV, "")
+        self.profile_names = {p.strip() for p in profile.split(",") if p.strip()}
+
+    def _peak_now(self):
+        if self.can_reset:
+            return _status_mb("VmHWM") or peak_rss_mb()
+        return peak_rss_mb()
+
+    def _wants_profile(self, path):
+        names = self.profile_names
+        return bool(names) and ("all" in names or path in names or path.rsplit("/", 1)[-1] in names)
+
+    @contextmanager
+    def span(self, name, rows=None):
+        if self.stack:
+            parent = self.stack[-1]
+            parent.peak_mb = max(parent.peak_mb, self._peak_now())
+            path = f"{parent.path}/{name}"
+        else:
+            path = name
+        current = Span(path, rows)
+        self.stack.append(current)
+        if self.can_reset:
+            _reset_peak()
+        # Entries are created on entry so the report lists spans in the order they started
+        self.spans.setdefault(path, {
+            "name": path, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0,
+            "rss_start_mb": round(current_rss_mb(), 1), "rows": None
+        })
+        # Only one cProfile profiler can be active at a time, so nested hot spans are covered by the outer one
+        if self._wants_profile(path) and not any(s.profile for s in self.stack[:-1]):
+            current.profile = cProfile.Profile()
+            current.profile.enable()
+        cpu_start, wall_start = _cpu_seconds(), time.perf_counter()
+        try:
+            yield current
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = _cpu_seconds() - cpu_start
+            if current.profile is not None:
+                current.profile.disable()
+                self._dump_profile(current)
+            peak = max(current.peak_mb, self._peak_now())
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1].peak_mb = max(self.stack[-1].peak_mb, peak)
+            self._record(path, wall, cpu, peak, current.rows)
+
+    def _record(self, path, wall, cpu, peak, rows):
+        entry = self.spans[path]
+        entry["calls"] += 1
+        entry["wall_s"] = round(entry["wall_s"] + wall, 4)
+        entry["cpu_s"] = round(entry["cpu_s"] + cpu, 4)
+        entry["peak_rss_mb"] = round(max(entry["peak_rss_mb"], peak), 1)
+        if rows is not None:
+            entry["rows"] = (entry["rows"] or 0) + int(rows)
+            entry["rows_per_s"] = round(entry["rows"] / max(entry["wall_s"], 1e-9), 1)
+
+    def _dump_profile(self, current):
+        profile_dir = METRICS_DIR.resolve() / self.run_id
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        path = profile_dir / (current.path.replace("/", ".") + ".prof")
+        current.profile.dump_stats(path)
+        print(f"Saved profile of '{current.path}' to {path}")
+
+    def report(self):
+        return {
+            "version": REPORT_VERSION,
+            "run": self.name,
+            "run_id": self.run_id,
+            "started": self.started,
+            "argv": sys.argv,
+            "host": {
+                "hostname": socket.gethostname(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "peak_rss_scope": "span" if self.can_reset else "process",
+            "spans": list(self.spans.values())
+        }
+
+
+_recorder = None
+
+
+@contextmanager
+def span(name, rows=None):
+    """Record one phase. Set `.rows` on the yielded span to report throughput.
+
+    Outside `instrumented` (e.g. when a module is imported by a benchmark)
+    spans are still measured but nothing is written.
+    """
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder("adhoc")
+    with _recorder.span(name, rows) as current:
+        yield current
+
+
+@contextmanager
+def instrumented(name, metrics_dir=None):
+    """Top-level run: everything inside is one span, and the report is written on exit.
+
+    Nested calls (a stage script's main run by the pipeline runner) just open a span.
+    """
+    global _recorder
+    if _recorder is not None and _recorder.stack:
+        with span(name) as current:
+            yield current
+        return
+    _recorder = Recorder(name)
+    try:
+        with _recorder.span(name) as current:
+            yield current
+    finally:
+        recorder, _recorder = _recorder, None
+        report = recorder.report()
+        print_spans(report["spans"])
+        out_dir = Path(metrics_dir) if metrics_dir else METRICS_DIR.resolve()
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / f"{recorder.run_id}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved metrics report to {path}")
+
+
+def print_spans(spans):
+    width = max([36] + [len(entry['name']) + 1 for entry in spans])
+    print(f"\n{'span':<{width}} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS (MB)':>14} {'rows':>9} {'rows/s':>10}")
+    for entry in spans:
+        rows = f"{entry['rows']:>9}" if entry.get("rows") is not None else f"{'-':>9}"
+        rate = f"{entry['rows_per_s']:>10,.0f}" if entry.get("rows_per_s") is not None else f"{'-':>10}"
+        print(f"{entry['name']:<{width}} {entry['wall_s']:>9.2f} {entry['cpu_s']:>9.2f} "
+              f"{entry['peak_rss_mb']:>14.0f} {rows} {rate}")
+
+
+# --- compare ---
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def latest_reports(metrics_dir, count=2):
+    """The newest `count` reports of the same run as the newest report overall."""
+    reports = sorted(Path(metrics_dir).glob("*.json"), key=lambda p: p.stat().st_mtime)
+    if not reports:
+        return []
+    # run_id is "<date>-<time>-<run name>"
+    run = reports[-1].stem.split("-", 2)[-1]
+    return [p for p in reports if p.stem.split("-", 2)[-1] == run][-count:]
+
+
+def compare_reports(base, new, threshold=REGRESSION_THRESHOLD, floors=ABSOLUTE_FLOORS):
+    """Per-span metric changes between two reports.
+
+    Returns (rows, regressions). Each row is (span, metric, base value, new
+    value, relative change). Spans present in only one report are listed with
+    None on the missing side.
+    """
+    base_spans = {s["name"]: s for s in base["spans"]}
+    new_spans = {s["name"]: s for s in new["spans"]}
+    names = list(base_spans) + [n for n in new_spans if n not in base_spans]
+    rows, regressions = [], []
+    for name in names:
+        for metric in COMPARED_METRICS:
+            old = base_spans.get(name, {}).get(metric)
+            value = new_spans.get(name, {}).get(metric)
+            change = None if not old or value is None else (value - old) / old
+            rows.append((name, metric, old, value, change))
+            if change is not None and change > threshold and value - old > floors.get(metric, 0):
+                regressions.append((name, metric, old, value, change))
+    return rows, regressions
+
+
+def print_comparison(rows, regressions):
+    flagged = {(name, metric) for name, metric, *_ in regressions}
+    print(f"{'span':<36} {'metric':<12} {'base':>10} {'new':>10} {'change':>8}")
+    for name, metric, old, value, change in rows:
+        fmt = lambda v: f"{v:>10.2f}" if v is not None else f"{'-':>10}"
+        delta = f"{change:>+8.0%}" if change is not None else f"{'-':>8}"
+        mark = "  REGRESSION" if (name, metric) in flagged else ""
+        print(f"{name:<36} {metric:<12} {fmt(old)} {fmt(value)} {delta}{mark}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare pipeline metrics reports.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    compare = commands.add_parser('compare', help="Flag spans that got slower or bigger between two runs.")
+    compare.add_argument('reports', nargs='*', metavar='report',
+                         help="BASE NEW report files (default: the latest two in data/output/metrics).")
+    compare.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                         help="Relative growth that counts as a regression.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    paths = args.reports or latest_reports(METRICS_DIR.resolve())
+    if len(paths) != 2:
+        print("Need two reports to compare (pass BASE NEW, or run the pipeline twice).")
+        return 2
+    base, new = load_report(paths[0]), load_report(paths[1])
+    print(f"base: {paths[0]} ({base['run']}, {base['started']})")
+    print(f"new:  {paths[1]} ({new['run']}, {new['started']})\n")
+    rows, regressions = compare_reports(base, new, args.threshold)
+    print_comparison(rows, regressions)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}.")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
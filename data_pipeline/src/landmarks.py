@@ -0,0 +1,90 @@
+import multiprocessing as mp
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import hdbscan
+import joblib
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+from sampling import allocate_quotas
+
+# Landmark projection for catalogs too large for a full UMAP/HDBSCAN fit
+# (step 05, --reduction landmark). Both models are fit on a landmark subset
+# stratified over k-means cells of the PCA space, so sparse regions keep their
+# share. Every other movie is placed with reducer.transform() and
+# hdbscan.approximate_predict(), in batches spread over a process pool. Arrays
+# stay float32 and are shared with the workers through a memory-mapped .npy.
+
+
+def select_landmarks(points, count, cells, seed):
+    """Sorted row indices of `count` landmarks, allocated to k-means cells in proportion to cell size."""
+    if count >= len(points):
+        return np.arange(len(points))
+    kmeans = MiniBatchKMeans(n_clusters=min(cells, count), random_state=seed, batch_size=4096, n_init=3)
+    cell = kmeans.fit_predict(points)
+    quotas = allocate_quotas(np.bincount(cell, minlength=kmeans.n_clusters), count, balance=1.0)
+    rng = np.random.default_rng(seed)
+    order = np.argsort(cell, kind='stable')
+    members = np.split(order, np.cumsum(np.bincount(cell, minlength=kmeans.n_clusters))[:-1])
+    picked = [rng.choice(rows, quota, replace=False) for rows, quota in zip(members, quotas) if quota]
+    return np.sort(np.concatenate(picked))
+
+
+def _place_batch(reducer, clusterer, points):
+    points = np.asarray(points, dtype=np.float32)
+    coords = reducer.transform(points)
+    labels, strengths = hdbscan.approximate_predict(clusterer, points)
+    return coords.astype(np.float32), labels, strengths.astype(np.float32)
+
+
+# --- Pool workers ---
+
+def _init_worker(work_dir, threads):
+    import numba
+    numba.set_num_threads(threads)
+    global _worker_points, _worker_models
+    _worker_points = np.load(Path(work_dir) / "points.npy", mmap_mode='r')
+    _worker_models = joblib.load(Path(work_dir) / "models.joblib")
+
+
+def _place_worker(start, end):
+    return (start, end) + _place_batch(*_worker_models, _worker_points[start:end])
+
+
+def place_points(reducer, clusterer, points, batch_size, workers=1):
+    """3D coordinates (float32), cluster labels and strengths of `points` under fitted models.
+
+    Batches of `batch_size` rows are placed by `workers` processes, each with
+    an equal share of the numba threads; workers=1 runs in this process.
+    """
+    n = len(points)
+    coords = np.empty((n, reducer.n_components), dtype=np.float32)
+    labels = np.empty(n, dtype=np.int64)
+    strengths = np.empty(n, dtype=np.float32)
+    batches = [(start, min(start + batch_size, n)) for start in range(0, n, batch_size)]
+
+    def place(start, end, batch_coords, batch_labels, batch_strengths):
+        coords[start:end] = batch_coords
+        labels[start:end] = batch_labels
+        strengths[start:end] = batch_strengths
+
+    workers = max(1, min(workers, len(batches)))
+    if workers == 1:
+        for start, end in batches:
+            place(start, end, *_place_batch(reducer, clusterer, points[start:end]))
+        return coords, labels, strengths
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with tempfile.TemporaryDirectory(prefix="plotpoint_landmarks_") as work_dir:
+        np.save(Path(work_dir) / "points.npy", np.asarray(points, dtype=np.float32))
+        joblib.dump((reducer, clusterer), Path(work_dir) / "models.joblib")
+        context = mp.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(work_dir, threads)) as pool:
+            futures = [pool.submit(_place_worker, start, end) for start, end in batches]
+            for future in as_completed(futures):
+                place(*future.result())
+    return coords, labels, strengths
@@ -0,0 +1,164 @@
+import numpy as np
+
+# Neighbor table layout (little-endian), row i = i-th movie of plotpoint_data_3d.json:
+#   uint32 count, uint32 k, int32[count * k] neighbor indices, float16[count * k] cosine distances
+HEADER_DTYPE = np.dtype('<u4')
+INDEX_DTYPE = np.dtype('<i4')
+DISTANCE_DTYPE = np.dtype('<f2')
+
+# Working memory of one knn_graph batch: the float32 similarity block plus
+# argpartition's int64 indices, 12 bytes per (query, candidate) pair
+KNN_BATCH_BYTES = 512 * 1024 * 1024
+KNN_MAX_BATCH = 2048
+
+# Neighbors per movie of the NN-descent graph behind approximate_knn_graph
+APPROX_GRAPH_K = 30
+
+
+def _unit_rows(embeddings):
+    unit = np.asarray(embeddings, dtype=np.float32)
+    return unit / np.maximum(np.linalg.norm(unit, axis=1, keepdims=True), 1e-12)
+
+
+def _nearest(sims, k, columns=None):
+    """Top-k columns of each row of a similarity block, nearest first.
+
+    Overwrites sims. `columns` maps block columns to movie rows (shape of
+    sims, or one row shared by all); without it the column is the row.
+    """
+    np.negative(sims, out=sims)
+    top = np.argpartition(sims, k - 1, axis=1)[:, :k]
+    top_sims = -np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_sims, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    if columns is not None:
+        top = np.take_along_axis(columns, top, axis=1) if columns.ndim == 2 else columns[top]
+    return top, 1.0 - np.take_along_axis(top_sims, order, axis=1)
+
+
+def knn_graph(embeddings, k, batch_size=None, rows=None):
+    """Exact cosine top-k neighbors (self excluded) via batched matrix multiply.
+
+    Returns (indices int32 [n, k], distances float32 [n, k]) sorted nearest
+    first, with distance = 1 - cosine similarity (Chroma's cosine space).
+    With `rows`, only those movies are queried (one table row each).
+    Batches shrink with n so a batch stays within KNN_BATCH_BYTES.
+    """
+    unit = _unit_rows(embeddings)
+    n = unit.shape[0]
+    k = min(k, n - 1)
+    rows = np.arange(n) if rows is None else np.asarray(rows, dtype=np.int64)
+    batch_size = batch_size or max(1, min(KNN_MAX_BATCH, KNN_BATCH_BYTES // (12 * n)))
+
+    indices = np.empty((len(rows), k), dtype=np.int32)
+    distances = np.empty((len(rows), k), dtype=np.float32)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        sims = unit[batch] @ unit.T
+        sims[np.arange(len(batch)), batch] = -np.inf
+        indices[start:start + len(batch)], distances[start:start + len(batch)] = _nearest(sims, k)
+    return indices, distances
+
+
+def approximate_knn_graph(embeddings, k, seed=42):
+    """Approximate cosine top-k neighbors (self excluded) via NN-descent.
+
+    Same shape and order as knn_graph, in near-linear time for large
+    catalogs. pynndescent ships with umap-learn (step 05's dependency).
+    """
+    from pynndescent import NNDescent
+
+    unit = _unit_rows(embeddings)
+    n = unit.shape[0]
+    k = min(k, n - 1)
+    # A wider graph than k + 1 converges to a much better recall
+    index = NNDescent(unit, metric='cosine', n_neighbors=max(k + 1, APPROX_GRAPH_K), random_state=seed,
+                      low_memory=True)
+    graph, dists = index.neighbor_graph
+    graph, dists = graph[:, :k + 1], dists[:, :k + 1]
+
+    # Drop each row's own entry, or its farthest one when NN-descent missed it
+    is_self = graph == np.arange(n)[:, None]
+    drop = np.where(is_self.any(axis=1), is_self.argmax(axis=1), k)
+    keep = np.ones(graph.shape, dtype=bool)
+    keep[np.arange(n), drop] = False
+    return graph[keep].reshape(n, k).astype(np.int32), dists[keep].reshape(n, k).astype(np.float32)
+
+
+def patch_knn_graph(embeddings, k, previous, old_rows, changed=(), batch_size=None):
+    """Top-k table after movies were added, removed or re-embedded, patched from the previous one.
+
+    `previous` is the previous table's indices; `old_rows[j]` is the current
+    row of its j-th movie (-1 when removed), and rows absent from old_rows are
+    new. `changed` lists current rows of kept movies whose vector changed;
+    they count as new. An unchanged movie keeps its old neighbors as
+    candidates and only the new movies are searched besides them. New
+    movies, and unchanged ones that lost a neighbor (removed or changed), are
+    searched in full. Exact when the previous table was and `changed` holds
+    every kept movie whose vector differs (see row_digests).
+    """
+    unit = _unit_rows(embeddings)
+    n = unit.shape[0]
+    k = min(k, n - 1)
+    old_rows = np.asarray(old_rows, dtype=np.int64)
+    previous = np.asarray(previous, dtype=np.int64)[:, :k]
+    is_changed = np.zeros(n, dtype=bool)
+    is_changed[np.asarray(changed, dtype=np.int64)] = True
+
+    # Changed movies are no valid old candidates: -1 marks them like removed ones
+    candidate_rows = np.where((old_rows >= 0) & ~is_changed[np.maximum(old_rows, 0)], old_rows, -1)
+    kept_old = np.flatnonzero(candidate_rows >= 0)
+    kept = old_rows[kept_old]
+    candidates = np.where(previous[kept_old] >= 0, candidate_rows[previous[kept_old]], -1)
+    is_new = np.ones(n, dtype=bool)
+    is_new[kept] = False
+    added = np.flatnonzero(is_new)
+    broken = (candidates < 0).any(axis=1) | (previous.shape[1] < k)
+
+    indices = np.empty((n, k), dtype=np.int32)
+    distances = np.empty((n, k), dtype=np.float32)
+    searched = np.concatenate([added, kept[broken]])
+    if len(searched):
+        indices[searched], distances[searched] = knn_graph(unit, k, batch_size, rows=searched)
+
+    patched, candidates = kept[~broken], candidates[~broken]
+    batch_size = batch_size or max(1, min(KNN_MAX_BATCH, KNN_BATCH_BYTES // (12 * (len(added) + k))))
+    for start in range(0, len(patched), batch_size):
+        batch, batch_candidates = patched[start:start + batch_size], candidates[start:start + batch_size]
+        old_sims = np.einsum('ij,ikj->ik', unit[batch], unit[batch_candidates])
+        sims = np.concatenate([old_sims, unit[batch] @ unit[added].T], axis=1)
+        columns = np.concatenate([batch_candidates, np.broadcast_to(added, (len(batch), len(added)))], axis=1)
+        indices[batch], distances[batch] = _nearest(sims, k, columns)
+    return indices, distances
+
+
+def row_digests(embeddings, chunk=65_536):
+    """uint64 digest of every embedding row, to find re-embedded movies between runs.
+
+    A fixed random linear combination of the rows' 32-bit words (mod 2**64):
+    any change to a vector changes its digest, barring a 2**-64 collision.
+    """
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    words = matrix.view(np.uint32).reshape(len(matrix), -1)
+    weights = np.random.default_rng(0).integers(1, 2 ** 63, words.shape[1], dtype=np.uint64) | np.uint64(1)
+    digests = np.empty(len(matrix), dtype=np.uint64)
+    for start in range(0, len(matrix), chunk):
+        digests[start:start + chunk] = (words[start:start + chunk].astype(np.uint64) * weights).sum(axis=1)
+    return digests
+
+
+def write_neighbor_table(path, indices, distances):
+    count, k = indices.shape
+    with open(path, 'wb') as f:
+        f.write(np.array([count, k], dtype=HEADER_DTYPE).tobytes())
+        f.write(indices.astype(INDEX_DTYPE).tobytes())
+        f.write(distances.astype(DISTANCE_DTYPE).tobytes())
+
+
+def read_neighbor_table(path):
+    data = np.fromfile(path, dtype=np.uint8)
+    count, k = np.frombuffer(data[:8], dtype=HEADER_DTYPE)
+    split = 8 + int(count) * int(k) * INDEX_DTYPE.itemsize
+    indices = np.frombuffer(data[8:split], dtype=INDEX_DTYPE).reshape(count, k)
+    distances = np.frombuffer(data[split:], dtype=DISTANCE_DTYPE).reshape(count, k)
+    return indices, distances
@@ -0,0 +1,92 @@
+import ast
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# List columns written by 02_normalize.py and read back by later steps
+LIST_COLUMNS = ['genres_list', 'keywords_list', 'production_list']
+
+
+@lru_cache(maxsize=500_000)
+def parse_names(raw):
+    """Parse one raw list cell into a tuple of names.
+
+    Handles TMDB-style lists of dicts ("[{'id': 18, 'name': 'Drama'}]"),
+    simple lists ("['Action', 'Comedy']" or JSON) and comma separated strings
+    ("Action, Comedy"). Results are cached on the raw string because genre and
+    company strings repeat heavily across rows.
+    """
+    text = raw.strip()
+    if not text:
+        return ()
+
+    if text.startswith('['):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            # Python repr of a list (single quotes) - fall back to literal_eval
+            try:
+                data = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                return ()
+        if not isinstance(data, list):
+            return ()
+        names = []
+        for item in data:
+            if isinstance(item, dict):
+                if 'name' in item:
+                    names.append(str(item['name']))
+            else:
+                names.append(str(item))
+        return tuple(names)
+
+    # Comma separated (or a single bare value)
+    return tuple(x.strip() for x in text.split(',') if x.strip())
+
+
+def parse_list_column(values):
+    """Parse a column of raw list cells into a Series of lists.
+
+    Every distinct raw string is parsed once (via pd.factorize) and the result
+    is broadcast back to all rows that share it. Cells that already hold
+    lists (e.g. from Parquet) are passed through.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if series.empty:
+        return pd.Series([], index=series.index, dtype=object)
+
+    first = series.dropna().head(1)
+    if not first.empty and isinstance(first.iloc[0], (list, tuple, np.ndarray)):
+        return series.map(lambda x: list(x) if isinstance(x, (list, tuple, np.ndarray)) else [])
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # Slot len(uniques) holds the empty list used for missing cells (code -1)
+    parsed = np.empty(len(uniques) + 1, dtype=object)
+    for i, raw in enumerate(uniques):
+        parsed[i] = list(parse_names(raw)) if isinstance(raw, str) else []
+    parsed[len(uniques)] = []
+    codes = np.where(codes < 0, len(uniques), codes)
+    return pd.Series(parsed[codes], index=series.index, dtype=object)
+
+
+def serialize_list_column(series):
+    """Serialize a list column to JSON strings for CSV storage."""
+    return series.map(lambda x: json.dumps(list(x), ensure_ascii=False))
+
+
+def join_head(series, n, sep=", "):
+    """Join the first n items of every list in a list column."""
+    return pd.Series([sep.join(x[:n]) for x in series], index=series.index, dtype=object)
+
+
+def get_eras(years):
+    """Vectorized decade labels ("1990s"), "Pre-1920s" or "Unknown".
+
+    Shared by 02_normalize.py (the era field) and sampling.py (era strata).
+    """
+    years = pd.to_numeric(years, errors='coerce')
+    eras = ((years // 10) * 10).astype('Int64').astype(str) + "s"
+    eras = eras.where(years >= 1920, "Pre-1920s")
+    return eras.where(years.notna(), "Unknown")
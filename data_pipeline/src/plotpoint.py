@@ -0,0 +1,498 @@
+"""PlotPoint pipeline runner: steps 01-06 as one dependency graph.
+
+Each stage is fingerprinted from its code (the stage script plus the local
+modules it uses), its config (e.g. pca_components, umap_neighbors,
+MODEL_NAME) and the content of its input files. Stages whose fingerprint
+matches the last successful run, and whose outputs are unchanged, are
+skipped. Frames are handed between stages in memory within a run and
+persisted as Parquet for later runs.
+
+    python src/plotpoint.py run                  # everything that is out of date
+    python src/plotpoint.py run reduce           # a stage and what it depends on
+    python src/plotpoint.py run --force embed    # rerun a stage (and so everything after it)
+    python src/plotpoint.py status
+"""
+import argparse
+import hashlib
+import importlib
+import inspect
+import json
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+from embedding_store import stable_ids, load_embeddings
+from frames import parquet_path, save_frame
+from instrumentation import peak_rss_mb, span, instrumented
+
+SRC_DIR = Path(__file__).resolve().parent
+STATE_FILE = "../data/output/pipeline_state.json"
+# Parquet siblings of the stage CSVs (see frames.py)
+FILTERED_FILE = str(parquet_path("../data/output/phase_a_filtered_movies.csv"))
+NORMALIZED_FILE = str(parquet_path("../data/output/phase_b_normalized.csv"))
+EMBEDDED_FILE = str(parquet_path("../data/output/phase_c_embedded.csv"))
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class PipelineError(Exception):
+    pass
+
+
+def resolve(relative):
+    """Paths in the stage scripts are relative to src/."""
+    return (SRC_DIR / relative).resolve()
+
+
+def load_module(name):
+    return importlib.import_module(name)
+
+
+# --- Fingerprints ---
+
+def file_digest(path, memo):
+    """sha1 of a file's content, reused from `memo` while size and mtime are unchanged."""
+    stat = path.stat()
+    cached = memo.get(str(path))
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    memo[str(path)] = [stat.st_size, stat.st_mtime_ns, sha.hexdigest()]
+    return sha.hexdigest()
+
+
+def code_digest(module):
+    """sha1 over the stage script and every local module it imports from."""
+    local = {module.__name__}
+    for value in vars(module).values():
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+        source = sys.modules.get(name) if isinstance(name, str) else None
+        if source is not None and Path(getattr(source, '__file__', None) or '').parent == SRC_DIR:
+            local.add(name)
+    sha = hashlib.sha1()
+    for name in sorted(local):
+        sha.update(name.encode())
+        sha.update(Path(sys.modules[name].__file__).read_bytes())
+    return sha.hexdigest()
+
+
+def check_inputs(stage, module, args):
+    """The stage's declared inputs; PipelineError naming any that do not exist."""
+    inputs = stage.inputs(module, args)
+    missing = [str(p) for p in inputs if not p.exists()]
+    if missing:
+        raise PipelineError(f"{stage.name}: missing input {', '.join(missing)}")
+    return inputs
+
+
+def stage_fingerprint(stage, module, args, memo):
+    inputs = check_inputs(stage, module, args)
+    payload = {
+        "code": code_digest(module),
+        "params": stage.params(module, args),
+        "inputs": {str(p): file_digest(p, memo) for p in inputs}
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def output_digests(stage, module, args, memo):
+    """{path: sha1} of a stage's outputs, or None if any is missing."""
+    outputs = stage.outputs(module, args)
+    if not all(p.exists() for p in outputs):
+        return None
+    return {str(p): file_digest(p, memo) for p in outputs}
+
+
+# --- Hand-off between stages ---
+
+class Context:
+    """Frames and embeddings produced earlier in this run; read from disk on first use otherwise."""
+
+    def __init__(self):
+        self.frames = {}
+        self.embeddings = None
+        self.placed = None
+
+    def frame(self, relative):
+        path = resolve(relative)
+        if path not in self.frames:
+            print(f"Loading {path.name}...")
+            with span("load") as load:
+                self.frames[path] = pd.read_parquet(path)
+                load.rows = len(self.frames[path])
+        return self.frames[path]
+
+    def keep(self, relative, df):
+        self.frames[resolve(relative)] = df
+
+    def embeddings_for(self, df):
+        if self.embeddings is None:
+            embed_module = load_module("03_generate_embeddings")
+            with span("load_embeddings", rows=len(df)):
+                self.embeddings = load_embeddings(
+                    stable_ids(df),
+                    resolve(embed_module.EMBEDDINGS_FILE),
+                    resolve(embed_module.EMBEDDING_IDS_FILE),
+                    resolve(embed_module.CHROMA_DB_PATH),
+                    embed_module.COLLECTION_NAME
+                )
+        return self.embeddings
+
+
+# --- Stages ---
+
+def run_filter(ctx, module, args):
+    input_path = Path(args.input).resolve() if args.input else resolve(module.INPUT_FILE)
+    df = module.filter_sample(input_path, args.stream, args.chunk_size, target_size=args.target_size,
+                              coverage_path=resolve(module.COVERAGE_FILE))
+    if df is None:
+        raise PipelineError("filter: no rows left to sample")
+    with span("save", rows=len(df)):
+        save_frame(df, resolve(FILTERED_FILE))
+    ctx.keep(FILTERED_FILE, df)
+
+
+def run_normalize(ctx, module, args):
+    df = module.normalize_for_export(ctx.frame(FILTERED_FILE).copy())
+    with span("save", rows=len(df)):
+        save_frame(df, resolve(NORMALIZED_FILE))
+    ctx.keep(NORMALIZED_FILE, df)
+
+
+def run_embed(ctx, module, args):
+    df = ctx.frame(NORMALIZED_FILE)
+    embeddings = module.embed(df, args.rebuild, args.backend, args.workers, args.threads_per_worker, args.views)
+    if embeddings is None:
+        raise PipelineError("embed: no embeddings produced")
+    with span("save", rows=len(df)):
+        save_frame(df, resolve(EMBEDDED_FILE))
+    ctx.keep(EMBEDDED_FILE, df)
+    ctx.embeddings = embeddings
+
+
+def run_validate(ctx, module, args):
+    df = ctx.frame(EMBEDDED_FILE)
+    coords = ctx.placed[['x', 'y', 'z']].to_numpy() if ctx.placed is not None else None
+    try:
+        module.validate(df, ctx.embeddings_for(df), coords)
+    except module.QualityRegression as e:
+        raise PipelineError(f"validate: {e}")
+
+
+def run_reduce(ctx, module, args):
+    df = ctx.frame(EMBEDDED_FILE)
+    ctx.placed = module.reduce_and_export(df.copy(), ctx.embeddings_for(df), append=args.append,
+                                          export_format=args.format, minify=args.minify, tiles=args.tiles,
+                                          reduction=args.reduction, workers=args.transform_workers,
+                                          neighbors=not args.no_neighbors)
+
+
+def run_check_clusters(ctx, module, args):
+    module.report_clusters(module.read_cluster_summary(resolve(module.CLUSTERS_FILE)))
+
+
+def reduce_outputs(module, args):
+    outputs = [resolve(module.OUTPUT_TITLES), resolve(module.OUTPUT_TITLES_MANIFEST), resolve(module.OUTPUT_CLUSTERS),
+               resolve(module.OUTPUT_MANIFEST)]
+    if not args.no_neighbors:
+        outputs.append(resolve(module.OUTPUT_NEIGHBORS))
+    if args.format in ('json', 'both'):
+        outputs.append(resolve(module.OUTPUT_JSON))
+    if args.format in ('columnar', 'both'):
+        outputs += [resolve(module.OUTPUT_POINTS), resolve(module.OUTPUT_POINTS_MANIFEST),
+                    resolve(module.OUTPUT_OVERVIEWS)]
+    if args.tiles:
+        outputs.append(resolve(module.OUTPUT_TILES_DIR) / module.TILE_MANIFEST_FILE)
+    return outputs
+
+
+def embedding_files():
+    embed_module = load_module("03_generate_embeddings")
+    return [resolve(EMBEDDED_FILE), resolve(embed_module.EMBEDDINGS_FILE), resolve(embed_module.EMBEDDING_IDS_FILE)]
+
+
+Stage = namedtuple('Stage', ['name', 'module', 'deps', 'params', 'inputs', 'outputs', 'run'])
+
+STAGES = [
+    Stage(
+        'filter', '01_filter_sample', [],
+        params=lambda m, a: {"TARGET_SIZE": a.target_size, "RANDOM_SEED": m.RANDOM_SEED,
+                             "stratum_balance": m.stratum_balance},
+        inputs=lambda m, a: [Path(a.input).resolve() if a.input else resolve(m.INPUT_FILE)],
+        outputs=lambda m, a: [resolve(FILTERED_FILE), resolve(m.COVERAGE_FILE)],
+        run=run_filter
+    ),
+    Stage(
+        'normalize', '02_normalize', ['filter'],
+        params=lambda m, a: {},
+        inputs=lambda m, a: [resolve(FILTERED_FILE)],
+        outputs=lambda m, a: [resolve(NORMALIZED_FILE)],
+        run=run_normalize
+    ),
+    Stage(
+        'embed', '03_generate_embeddings', ['normalize'],
+        params=lambda m, a: {
+            "MODEL_NAME": m.MODEL_NAME,
+            "backend": a.backend,
+            "views": m.load_weights(resolve(m.VIEW_WEIGHTS_FILE)) if a.views else None
+        },
+        inputs=lambda m, a: [resolve(NORMALIZED_FILE)],
+        outputs=lambda m, a: embedding_files(),
+        run=run_embed
+    ),
+    Stage(
+        'reduce', '05_reduce_and_cluster', ['embed'],
+        params=lambda m, a: {
+            "pca_components": m.pca_components,
+            "umap_neighbors": m.umap_neighbors,
+            "umap_min_dist": m.umap_min_dist,
+            "umap_metric": m.umap_metric,
+            "hdbscan_min_cluster_size": m.hdbscan_min_cluster_size,
+            "hdbscan_min_samples": m.hdbscan_min_samples,
+            "coordinate_scale": m.coordinate_scale,
+            "neighbors": [m.neighbor_k, m.neighbor_exact_max] if not a.no_neighbors else None,
+            "cluster_summary": [m.cluster_top_genres, m.cluster_top_keywords, m.cluster_exemplars],
+            "reduction": a.reduction,
+            "landmarks": [m.landmark_threshold, m.landmark_count, m.landmark_cells, m.pca_fit_rows]
+            if a.reduction != 'full' else None,
+            "tiles": [m.tile_lod_size, m.tile_leaf_size, m.tile_max_depth] if a.tiles else None,
+            "format": a.format,
+            "minify": a.minify,
+            "append": a.append
+        },
+        inputs=lambda m, a: embedding_files(),
+        outputs=reduce_outputs,
+        run=run_reduce
+    ),
+    Stage(
+        'validate', '04_validate', ['reduce'],
+        params=lambda m, a: {"TEST_TITLES": m.TEST_TITLES, "regression_tolerance": m.regression_tolerance},
+        inputs=lambda m, a: embedding_files() + [resolve(m.ANCHORS_FILE)]
+                            + reduce_outputs(load_module("05_reduce_and_cluster"), a),
+        outputs=lambda m, a: [resolve(m.RESULTS_FILE)],
+        run=run_validate
+    ),
+    Stage(
+        'check_clusters', '06_check_clusters', ['reduce'],
+        params=lambda m, a: {},
+        inputs=lambda m, a: [resolve(m.CLUSTERS_FILE)],
+        outputs=lambda m, a: [],
+        run=run_check_clusters
+    ),
+]
+STAGE_NAMES = [stage.name for stage in STAGES]
+
+
+def with_dependencies(names):
+    """Requested stages plus everything they depend on, in pipeline order."""
+    by_name = {stage.name: stage for stage in STAGES}
+    wanted = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in wanted:
+            wanted.add(name)
+            pending.extend(by_name[name].deps)
+    return [stage for stage in STAGES if stage.name in wanted]
+
+
+def downstream(names):
+    """Stages that (transitively) depend on any of `names`, including them."""
+    affected = set(names)
+    for stage in STAGES:
+        if affected.intersection(stage.deps):
+            affected.add(stage.name)
+    return affected
+
+
+# --- State ---
+
+def load_state(path):
+    if not path.exists():
+        return {"stages": {}, "files": {}}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    tmp.replace(path)
+
+
+def is_current(stage, module, args, state, memo):
+    """(fingerprint, up to date?) for a stage; fingerprint is None when inputs are missing."""
+    record = state["stages"].get(stage.name)
+    try:
+        fingerprint = stage_fingerprint(stage, module, args, memo)
+    except PipelineError:
+        return None, False
+    if not record or record["fingerprint"] != fingerprint:
+        return fingerprint, False
+    return fingerprint, output_digests(stage, module, args, memo) == record.get("outputs", {})
+
+
+# --- Commands ---
+
+def print_summary(rows):
+    print(f"\n{'stage':<16} {'status':<8} {'time (s)':>9} {'peak RSS (MB)':>14} {'RSS +MB':>8}")
+    for name, status, seconds, peak, grown in rows:
+        timing = f"{seconds:>9.1f}" if seconds is not None else f"{'-':>9}"
+        memory = f"{peak:>14.0f} {grown:>8.0f}" if peak is not None else f"{'-':>14} {'-':>8}"
+        print(f"{name:<16} {status:<8} {timing} {memory}")
+
+
+def run(args):
+    # One metrics report per run (data/output/metrics), with every stage as a span
+    with instrumented("plotpoint"):
+        return run_stages(args)
+
+
+def run_stages(args):
+    state_path = resolve(STATE_FILE)
+    state = load_state(state_path)
+    memo = state["files"]
+    stages = with_dependencies(args.stages or STAGE_NAMES)
+    if args.force is None:
+        forced = set()
+    else:
+        # --force with no stage names reruns everything
+        forced = downstream(args.force or STAGE_NAMES)
+    if args.rebuild:
+        forced |= downstream(['embed'])
+
+    ctx = Context()
+    rows = []
+    for stage in stages:
+        module = load_module(stage.module)
+        fingerprint, current = is_current(stage, module, args, state, memo)
+        if current and stage.name not in forced:
+            rows.append((stage.name, "skipped", None, None, None))
+            continue
+        if args.dry_run:
+            rows.append((stage.name, "stale", None, None, None))
+            forced |= downstream([stage.name])
+            continue
+
+        print(f"\n=== {stage.name} ({stage.module}.py) ===")
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            # Upstream stages of this run have written theirs by now
+            check_inputs(stage, module, args)
+            try:
+                with span(stage.name):
+                    stage.run(ctx, module, args)
+            except (FileNotFoundError, KeyError) as e:
+                # A file or column the stage needs is missing: a stage failure, not a crash
+                raise PipelineError(f"{stage.name}: {type(e).__name__}: {e}") from e
+            fingerprint = stage_fingerprint(stage, module, args, memo)
+            outputs = output_digests(stage, module, args, memo)
+            if outputs is None:
+                raise PipelineError(f"{stage.name}: expected outputs were not written")
+        except PipelineError as e:
+            rows.append((stage.name, "failed", time.perf_counter() - start, peak_rss_mb(), peak_rss_mb() - rss_before))
+            print_summary(rows)
+            print(f"\n{e}")
+            save_state(state_path, state)
+            return 1
+
+        seconds = time.perf_counter() - start
+        peak = peak_rss_mb()
+        state["stages"][stage.name] = {
+            "fingerprint": fingerprint,
+            "outputs": outputs,
+            "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seconds": round(seconds, 3),
+            "peak_rss_mb": round(peak, 1)
+        }
+        save_state(state_path, state)
+        # Anything downstream must rerun: its inputs were just rewritten
+        forced |= downstream([stage.name])
+        rows.append((stage.name, "ran", seconds, peak, peak - rss_before))
+
+    print_summary(rows)
+    return 0
+
+
+def status(args):
+    state = load_state(resolve(STATE_FILE))
+    memo = state["files"]
+    stale = set()
+    print(f"{'stage':<16} {'status':<10} {'last run':<20} {'time (s)':>9}")
+    for stage in STAGES:
+        module = load_module(stage.module)
+        record = state["stages"].get(stage.name, {})
+        fingerprint, current = is_current(stage, module, args, state, memo)
+        if fingerprint is None:
+            label = "no input"
+        elif not current or stale.intersection(stage.deps):
+            label = "stale"
+            stale.add(stage.name)
+        else:
+            label = "current"
+        seconds = f"{record['seconds']:>9.1f}" if 'seconds' in record else f"{'-':>9}"
+        print(f"{stage.name:<16} {label:<10} {record.get('completed_at', '-'):<20} {seconds}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the PlotPoint data pipeline, skipping up-to-date stages.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run stages that are out of date.")
+    run_parser.add_argument('stages', nargs='*', metavar='stage',
+                            help=f"Target stages ({', '.join(STAGE_NAMES)}; default: all). "
+                                 "Their dependencies run first if needed.")
+    run_parser.add_argument('--force', nargs='*', metavar='stage', default=None,
+                            help="Rerun these stages and everything downstream (no names: all).")
+    run_parser.add_argument('--dry-run', action='store_true', help="Only show what would run.")
+
+    status_parser = commands.add_parser('status', help="Show which stages are up to date.")
+
+    # Stage options (fingerprinted where they change the result)
+    filter_module = load_module("01_filter_sample")
+    embed_module = load_module("03_generate_embeddings")
+    reduce_module = load_module("05_reduce_and_cluster")
+    for sub in (run_parser, status_parser):
+        sub.add_argument('--input', default=None, help="Source dataset for step 01.")
+        sub.add_argument('--stream', action='store_true', help="Step 01 streaming mode.")
+        sub.add_argument('--chunk-size', type=int, default=filter_module.CHUNK_SIZE)
+        sub.add_argument('--target-size', type=int, default=filter_module.TARGET_SIZE,
+                         help="Step 01 sample size.")
+        sub.add_argument('--backend', choices=embed_module.BACKENDS, default=embed_module.ENCODER_BACKEND)
+        sub.add_argument('--workers', type=int, default=embed_module.ENCODE_WORKERS)
+        sub.add_argument('--threads-per-worker', type=int, default=embed_module.THREADS_PER_WORKER)
+        sub.add_argument('--rebuild', action='store_true', help="Rebuild the Chroma collection (forces embed).")
+        sub.add_argument('--views', action='store_true', help="Step 03 multi-view embeddings.")
+        sub.add_argument('--append', action='store_true', help="Step 05 append mode.")
+        sub.add_argument('--format', choices=reduce_module.EXPORT_FORMATS, default='both')
+        sub.add_argument('--minify', action='store_true')
+        sub.add_argument('--tiles', action='store_true')
+        sub.add_argument('--reduction', choices=reduce_module.REDUCTION_MODES, default='auto')
+        sub.add_argument('--transform-workers', type=int, default=reduce_module.transform_workers)
+        sub.add_argument('--no-neighbors', action='store_true', help="Step 05 without the neighbor table.")
+
+    args = parser.parse_args()
+    unknown = [name for name in getattr(args, 'stages', []) + (getattr(args, 'force', None) or [])
+               if name not in STAGE_NAMES]
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; choose from {', '.join(STAGE_NAMES)}")
+    return args
+
+
+def main():
+    args = parse_args()
+    return run(args) if args.command == 'run' else status(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
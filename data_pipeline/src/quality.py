@@ -0,0 +1,143 @@
+import json
+import re
+import time
+
+import numpy as np
+
+from title_index import TitleIndex
+
+# Embedding-space quality benchmark: curated anchor -> expected-neighbor sets,
+# scored by where the expected movies rank among all of an anchor's neighbors.
+# Ranks are computed exactly with batched matrix queries, in the original
+# embedding space (cosine) and in the exported 3D space (Euclidean).
+RESULTS_VERSION = 1
+RECALL_KS = (5, 10, 20)
+QUERY_BATCH_SIZE = 64
+
+_YEAR_SUFFIX = re.compile(r"^(.*?)\s*\((\d{4})\)$")
+
+
+def parse_title(text):
+    """'Dune (2021)' -> ('Dune', 2021); a title without a year suffix -> (title, None)."""
+    match = _YEAR_SUFFIX.match(text.strip())
+    if match:
+        return match.group(1), int(match.group(2))
+    return text, None
+
+
+def load_anchors(path):
+    """[(group, anchor, [expected titles])] in file order."""
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    return [
+        (group, entry["anchor"], entry["expected"])
+        for group, entries in spec["groups"].items()
+        for entry in entries
+    ]
+
+
+def title_lookup(titles, years, popularity=None):
+    """Resolver for anchor titles: exact title match (title_index), optional year, most popular first."""
+    index = TitleIndex.build(titles, popularity)
+
+    def resolve(text):
+        title, year = parse_title(text)
+        rows = [row for row in index.exact(title) if year is None or years[row] == year]
+        return rows[0] if rows else None
+
+    return resolve
+
+
+def resolve_anchors(anchors, resolve):
+    """Map anchors to row positions. Returns (cases, skipped); a case needs its anchor and one expected movie."""
+    cases, skipped = [], []
+    for group, anchor, expected in anchors:
+        anchor_row = resolve(anchor)
+        found = [(title, resolve(title)) for title in expected]
+        missing = [title for title, row in found if row is None]
+        rows = [row for _, row in found if row is not None and row != anchor_row]
+        if anchor_row is None or not rows:
+            skipped.append({"group": group, "anchor": anchor, "missing": [anchor] if anchor_row is None else missing})
+            continue
+        cases.append({"group": group, "anchor": anchor, "row": anchor_row, "expected": rows, "missing": missing})
+    return cases, skipped
+
+
+def expected_ranks(vectors, cases, metric):
+    """Rank (1 = nearest, self excluded) of each case's expected rows among all rows.
+
+    metric 'cosine' ranks by cosine similarity, 'euclidean' by distance.
+    Anchors are queried in batches with one matrix product per batch.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if metric == 'cosine':
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    else:
+        squared_norms = (vectors ** 2).sum(axis=1)
+
+    ranks = []
+    for start in range(0, len(cases), QUERY_BATCH_SIZE):
+        batch = cases[start:start + QUERY_BATCH_SIZE]
+        anchors = np.array([case["row"] for case in batch])
+        # Higher score = closer
+        scores = vectors[anchors] @ vectors.T
+        if metric != 'cosine':
+            scores = 2 * scores - squared_norms[None, :] - squared_norms[anchors][:, None]
+        scores[np.arange(len(batch)), anchors] = -np.inf
+        for case, row_scores in zip(batch, scores):
+            expected = row_scores[case["expected"]]
+            ranks.append((row_scores[None, :] > expected[:, None]).sum(axis=1) + 1)
+    return ranks
+
+
+def score_ranks(ranks, ks=RECALL_KS):
+    """recall@k (share of expected movies within the top k) and MRR (first expected hit) over cases."""
+    metrics = {f"recall@{k}": float(np.mean([(r <= k).mean() for r in ranks])) for k in ks}
+    metrics["mrr"] = float(np.mean([1.0 / r.min() for r in ranks]))
+    return metrics
+
+
+def evaluate(spaces, cases, ks=RECALL_KS):
+    """Results for each named space ({name: (vectors, metric)}): overall, per group and per anchor."""
+    results = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": len(cases),
+        "spaces": {}
+    }
+    groups = sorted({case["group"] for case in cases})
+    for name, (vectors, metric) in spaces.items():
+        ranks = expected_ranks(vectors, cases, metric)
+        results["spaces"][name] = {
+            "metric": metric,
+            "overall": score_ranks(ranks, ks),
+            "groups": {
+                group: score_ranks([r for r, case in zip(ranks, cases) if case["group"] == group], ks)
+                for group in groups
+            },
+            "anchors": {case["anchor"]: r.tolist() for case, r in zip(cases, ranks)}
+        }
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    """Metrics (overall and per group) that dropped by more than `tolerance` versus a baseline run."""
+    regressions = []
+    for space, current in results["spaces"].items():
+        previous = baseline.get("spaces", {}).get(space)
+        if previous is None:
+            continue
+        scopes = [("overall", current["overall"], previous["overall"])]
+        scopes += [(group, values, previous["groups"][group])
+                   for group, values in current["groups"].items() if group in previous["groups"]]
+        for scope, values, old in scopes:
+            for metric, value in values.items():
+                if metric in old and value < old[metric] - tolerance:
+                    regressions.append(f"{space} {scope} {metric}: {old[metric]:.3f} -> {value:.3f}")
+    return regressions
+
+
+def write_results(results, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
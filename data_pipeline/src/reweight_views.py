@@ -0,0 +1,98 @@
+"""Re-weight the multi-view embeddings of step 03 without re-encoding anything.
+
+Reads the per-field matrices written by `03_generate_embeddings.py --views`,
+combines them with new weights (see views.py), rewrites embeddings.npy and
+syncs the Chroma collection. The weights are saved, so later runs of step 03
+use them too. Rebuild the map afterwards with step 05 (or `plotpoint.py run`).
+
+    python src/reweight_views.py --weight era=0.5 production=0 overview=1.2
+    python src/reweight_views.py --reset      # back to views.DEFAULT_WEIGHTS
+"""
+import argparse
+import importlib
+import time
+from pathlib import Path
+
+from embedding_store import stable_ids, save_embedding_matrix, load_embedding_matrix
+from embedding_cache import content_hash
+from encoders import cache_key
+from frames import latest_frame_path, read_frame
+from instrumentation import span, instrumented
+from views import (VIEW_FIELDS, DEFAULT_WEIGHTS, view_texts, view_paths, load_weights, save_weights,
+                   check_weights, row_hashes, combine_views)
+
+embed_module = importlib.import_module("03_generate_embeddings")
+
+
+def parse_weight(text):
+    field, sep, value = text.partition('=')
+    if not sep or field not in VIEW_FIELDS:
+        raise argparse.ArgumentTypeError(f"expected FIELD=WEIGHT with FIELD in {', '.join(VIEW_FIELDS)}")
+    return field, float(value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--weight', type=parse_weight, nargs='+', default=[], metavar='FIELD=WEIGHT',
+                        help="New weights; fields left out keep their current weight.")
+    parser.add_argument('--reset', action='store_true', help="Start from the default weights.")
+    parser.add_argument('--backend', choices=embed_module.BACKENDS, default=embed_module.ENCODER_BACKEND,
+                        help="Backend the views were encoded with (selects the Chroma collection).")
+    parser.add_argument('--skip-chroma', action='store_true',
+                        help="Only rewrite embeddings.npy; rerun step 03 --views later to sync Chroma.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    script_dir = Path(__file__).parent
+    data_path = (script_dir / embed_module.OUTPUT_DF_WITH_REF).resolve()
+    views_dir = (script_dir / embed_module.VIEWS_DIR).resolve()
+    weights_path = (script_dir / embed_module.VIEW_WEIGHTS_FILE).resolve()
+    embeddings_path = (script_dir / embed_module.EMBEDDINGS_FILE).resolve()
+    embedding_ids_path = (script_dir / embed_module.EMBEDDING_IDS_FILE).resolve()
+    chroma_path = (script_dir / embed_module.CHROMA_DB_PATH).resolve()
+
+    if latest_frame_path(data_path) is None:
+        print("Embedded data missing. Run 03_generate_embeddings.py --views first.")
+        return
+
+    weights = dict(DEFAULT_WEIGHTS) if args.reset else load_weights(weights_path)
+    weights = check_weights({**weights, **dict(args.weight)})
+
+    with instrumented("reweight_views"):
+        with span("load") as load:
+            df = read_frame(data_path)
+            ids = stable_ids(df)
+            views = {field: load_embedding_matrix(*view_paths(views_dir, field), ids) for field in VIEW_FIELDS}
+            load.rows = len(ids)
+        missing = [field for field, matrix in views.items() if matrix is None]
+        if missing:
+            print(f"No view matrices for {', '.join(missing)} covering the current catalog. "
+                  "Run 03_generate_embeddings.py --views first.")
+            return
+
+        start = time.perf_counter()
+        with span("combine", rows=len(ids)):
+            embeddings = combine_views(views, weights)
+        print(f"Combined {len(VIEW_FIELDS)} views of {len(ids)} movies in {time.perf_counter() - start:.2f}s "
+              f"({', '.join(f'{f}={w:g}' for f, w in weights.items())})")
+
+        model_key = cache_key(embed_module.MODEL_NAME, args.backend)
+        with span("export_matrix", rows=len(ids)):
+            save_embedding_matrix(embeddings, ids, embeddings_path, embedding_ids_path, model_key)
+        save_weights(weights_path, weights)
+        print(f"Saved embedding matrix to {embeddings_path} and weights to {weights_path}")
+
+        if not args.skip_chroma:
+            field_hashes = {
+                field: [content_hash(text) if text else None for text in texts]
+                for field, texts in view_texts(df).items()
+            }
+            embed_module.sync_collection(df, ids, embeddings, row_hashes(field_hashes, weights),
+                                         model_key, chroma_path)
+        print("Rebuild the map with 05_reduce_and_cluster.py (or plotpoint.py run reduce).")
+
+
+if __name__ == "__main__":
+    main()
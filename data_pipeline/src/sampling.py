@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from parsing import parse_list_column, get_eras
+
+# Stratified, popularity-weighted sampling for step 01. Candidates are grouped
+# into strata by original language, era and primary genre. Within a stratum,
+# rows are ranked with weighted reservoir keys (Efraimidis-Spirakis:
+# log(u) / popularity, highest first), so a row's chance of making the cut grows
+# with its popularity without always taking the same top titles.
+#
+# Each row's u comes from a hash of its id and the seed. This makes the sample
+# depend only on the candidates and the seed, not on chunk size or file order.
+# Chunks are folded in one at a time. Each stratum keeps at most `target_size`
+# candidates, the most it can be allocated. Quotas are set once the stream ends
+# (see allocate_quotas).
+STRATA = ['original_language', 'era', 'genre']
+STRATUM_BALANCE = 0.5
+
+
+def stratum_labels(df):
+    """Language, era and primary genre of every row, as a DataFrame of strings."""
+    years = pd.to_datetime(df['release_date'], errors='coerce').dt.year
+    genres = parse_list_column(df['genres']).str[0]
+    labels = pd.DataFrame({
+        'original_language': df['original_language'].fillna('unknown').astype(str),
+        'era': get_eras(years).astype(str),
+        'genre': genres.fillna('Unknown').astype(str)
+    }, index=df.index)
+    # '|' joins the labels into one stratum key
+    return labels.apply(lambda column: column.str.replace('|', '/', regex=False))
+
+
+def row_hashes(ids, seed):
+    """Deterministic 64-bit hash of every id, different for every seed."""
+    hash_key = f"{seed:016d}"[-16:]
+    return pd.util.hash_pandas_object(pd.Series(ids).astype(str), index=False, hash_key=hash_key).to_numpy()
+
+
+def reservoir_keys(hashes, weights):
+    """Weighted reservoir keys log(u) / w, with u in (0, 1) taken from the hashes."""
+    u = ((hashes >> np.uint64(11)).astype(np.float64) + 0.5) * 2.0 ** -53
+    return np.log(u) / np.clip(np.nan_to_num(np.asarray(weights, dtype=np.float64)), 1e-9, None)
+
+
+def allocate_quotas(sizes, target_size, balance=STRATUM_BALANCE):
+    """Split target_size across strata in proportion to size ** balance.
+
+    balance=1 is proportional allocation (the sample mirrors the catalog mix),
+    balance=0 gives every stratum the same share, and values in between lift
+    small strata (rare languages, early eras) without flattening the mix.
+    Strata smaller than their share are taken whole and the rest is shared
+    again. Fractions are settled by largest remainder, ties broken by stratum
+    order, so the result is deterministic.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    quotas = np.zeros(len(sizes), dtype=np.int64)
+    active = sizes > 0
+    remaining = min(int(target_size), int(sizes.sum()))
+    weights = sizes.astype(np.float64) ** balance
+    while remaining > 0 and active.any():
+        share = np.where(active, remaining * weights / weights[active].sum(), 0.0)
+        full = active & (share >= sizes)
+        if full.any():
+            quotas[full] = sizes[full]
+            remaining -= int(sizes[full].sum())
+            active &= ~full
+            continue
+        base = np.floor(share).astype(np.int64)
+        leftover = remaining - int(base.sum())
+        order = np.lexsort((np.arange(len(sizes)), -(share - base)))
+        order = order[active[order]][:leftover]
+        base[order] += 1
+        quotas += base
+        break
+    return quotas
+
+
+class StratifiedReservoir:
+    def __init__(self, target_size, seed, balance=STRATUM_BALANCE, weight_column='popularity'):
+        self.target_size = target_size
+        self.seed = seed
+        self.balance = balance
+        self.weight_column = weight_column
+        self.kept = None                           # candidates still in the running, with their keys
+        self.counts = pd.Series(dtype=np.int64)     # candidates seen per stratum
+        self.seen = np.empty(0, dtype=np.uint64)    # id hashes seen so far
+        self.duplicates = 0
+
+    def add(self, df):
+        """Fold a chunk of filtered candidates into the per-stratum reservoirs."""
+        hashes = row_hashes(df['id'], self.seed)
+        # Duplicate ids share a key and would be drawn together; keep the first occurrence
+        first = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, self.seen)
+        self.duplicates += int(len(df) - first.sum())
+        df, hashes = df[first], hashes[first]
+        if df.empty:
+            return
+        self.seen = np.union1d(self.seen, hashes)
+        labels = stratum_labels(df)
+        chunk = df.copy()
+        chunk['_hash'] = hashes
+        chunk['_key'] = reservoir_keys(hashes, df[self.weight_column])
+        chunk['_stratum'] = labels[STRATA[0]].str.cat([labels[c] for c in STRATA[1:]], sep='|')
+        self.counts = self.counts.add(chunk['_stratum'].value_counts(), fill_value=0).astype(np.int64)
+        pool = chunk if self.kept is None else pd.concat([self.kept, chunk], ignore_index=True)
+        self.kept = self._head(pool, self.target_size)
+
+    @staticmethod
+    def _head(pool, limit):
+        """The `limit` highest-key rows of every stratum, best first (hash breaks ties)."""
+        strata = pd.factorize(pool['_stratum'], sort=True)[0]
+        order = np.lexsort((pool['_hash'].to_numpy(), -pool['_key'].to_numpy(), strata))
+        pool = pool.iloc[order]
+        rank = pool.groupby('_stratum', sort=False).cumcount().to_numpy()
+        if np.isscalar(limit):
+            keep = rank < limit
+        else:
+            keep = rank < pool['_stratum'].map(limit).fillna(0).to_numpy()
+        return pool[keep].reset_index(drop=True)
+
+    def quotas(self):
+        """Rows to draw from each stratum (Series indexed by stratum, sorted)."""
+        counts = self.counts.sort_index()
+        return pd.Series(allocate_quotas(counts.to_numpy(), self.target_size, self.balance),
+                         index=counts.index, dtype=np.int64)
+
+    def sample(self):
+        """The sampled rows, ordered by reservoir key (a popularity-weighted shuffle)."""
+        if self.kept is None:
+            return pd.DataFrame()
+        picked = self._head(self.kept, self.quotas())
+        picked = picked.iloc[np.lexsort((picked['_hash'].to_numpy(), -picked['_key'].to_numpy()))]
+        return picked.drop(columns=[c for c in picked.columns if c.startswith('_')]).reset_index(drop=True)
+
+    def coverage(self):
+        """Candidates and sampled rows per stratum."""
+        report = pd.DataFrame({'candidates': self.counts.sort_index(), 'sampled': self.quotas()})
+        parts = report.index.to_series().str.split('|', n=len(STRATA) - 1, expand=True)
+        parts.columns = STRATA
+        report = pd.concat([parts, report], axis=1).reset_index(drop=True)
+        report['coverage'] = report['sampled'] / report['candidates']
+        return report
+
+
+def summarize_coverage(report, top=8):
+    """Candidate vs sample share of the largest values of each stratum dimension."""
+    lines = [f"Strata covered: {(report['sampled'] > 0).sum()} / {len(report)}"]
+    for column in STRATA:
+        totals = report.groupby(column)[['candidates', 'sampled']].sum()
+        shares = totals / totals.sum()
+        covered = (totals['sampled'] > 0).sum()
+        lines.append(f"{column} ({covered} / {len(totals)} values sampled): "
+                     + ", ".join(f"{name} {row.candidates:.0%}->{row.sampled:.0%}"
+                                 for name, row in shares.sort_values('candidates', ascending=False).head(top).iterrows()))
+    return "\n".join(lines)
@@ -0,0 +1,319 @@
+"""Local semantic search over the plotpoint_movies Chroma collection.
+
+Encodes free-text queries ("slow-burn space horror") with the model the
+collection was built with and returns the nearest movies. Result ids are the
+`id` field of plotpoint_data_3d.json (and the columnar export), so the web app
+can fly to them.
+
+    python src/search_service.py --port 8765
+    curl 'http://localhost:8765/search?q=slow-burn+space+horror&k=10'
+
+The model is loaded once at startup. Concurrent requests are gathered into
+micro-batches (up to --max-batch queries, waiting at most --batch-window ms)
+that share one encode call and one collection query. Query embeddings are kept
+in an LRU cache, so repeated queries skip the encoder.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import chromadb
+
+from encoders import load_encoder
+
+CHROMA_DB_PATH = "../data/output/chroma_db"
+COLLECTION_NAME = "plotpoint_movies"
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_BATCH = 32
+BATCH_WINDOW_MS = 5
+CACHE_SIZE = 4096
+DEFAULT_K = 20
+MAX_K = 100
+MAX_QUERY_LENGTH = 500
+
+
+def normalize_query(text):
+    return " ".join(text.split())[:MAX_QUERY_LENGTH]
+
+
+def split_model_key(model_key):
+    """'all-mpnet-base-v2@onnx-int8' -> ('all-mpnet-base-v2', 'onnx-int8') (see encoders.cache_key)."""
+    model_name, _, backend = model_key.partition('@')
+    return model_name, backend or 'torch'
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query text -> embedding."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        vector = self.entries.get(text)
+        if vector is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(text)
+        self.hits += 1
+        return vector
+
+    def put(self, text, vector):
+        self.entries[text] = vector
+        self.entries.move_to_end(text)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+class SearchEngine:
+    """Micro-batching front end for the encoder and the collection.
+
+    `search` enqueues a request; a single batcher task drains the queue into
+    batches and runs each batch (encode cache misses, then one collection
+    query) on a dedicated thread, so the event loop keeps accepting requests.
+    """
+
+    def __init__(self, model, collection, max_batch=MAX_BATCH, batch_window_ms=BATCH_WINDOW_MS,
+                 cache_size=CACHE_SIZE):
+        self.model = model
+        self.collection = collection
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        self.cache = QueryEmbeddingCache(cache_size)
+        self.queue = asyncio.Queue()
+        # One thread: the model and the Chroma client are used by one batch at a time
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.queries = 0
+        self.encoded = 0
+
+    async def search(self, text, k):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, k, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await loop.run_in_executor(self.executor, self.run_batch,
+                                                     [(text, k) for text, k, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def run_batch(self, requests):
+        """[(text, k)] -> [(hits, cached)] with one encode call for the distinct uncached texts."""
+        vectors = {}
+        for text, _ in requests:
+            if text not in vectors:
+                vectors[text] = self.cache.get(text)
+        misses = [text for text, vector in vectors.items() if vector is None]
+        if misses:
+            encoded = self.model.encode(misses, batch_size=len(misses), convert_to_numpy=True)
+            for text, vector in zip(misses, np.asarray(encoded, dtype=np.float32)):
+                vectors[text] = vector
+                self.cache.put(text, vector)
+
+        n_results = min(max(k for _, k in requests), self.collection.count())
+        found = self.collection.query(
+            query_embeddings=[vectors[text].tolist() for text, _ in requests],
+            n_results=n_results,
+            include=['metadatas', 'distances']
+        )
+        self.batches += 1
+        self.queries += len(requests)
+        self.encoded += len(misses)
+
+        results = []
+        for i, (text, k) in enumerate(requests):
+            hits = [
+                {"id": item_id, "title": (meta or {}).get('title'), "distance": round(float(dist), 4)}
+                for item_id, meta, dist in zip(found['ids'][i][:k], found['metadatas'][i][:k],
+                                               found['distances'][i][:k])
+            ]
+            results.append((hits, text not in misses))
+        return results
+
+    def stats(self):
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0,
+            "encoded": self.encoded,
+            "cache_entries": len(self.cache.entries),
+            "cache_hit_rate": self.cache.hits / lookups if lookups else 0
+        }
+
+
+# --- HTTP (a minimal HTTP/1.1 server on asyncio streams, GET only) ---
+
+STATUS_TEXT = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def encode_response(status, payload=None, keep_alive=True):
+    body = json.dumps(payload, ensure_ascii=False).encode() if payload is not None else b""
+    headers = [
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(body)}",
+        # The web app is served from another origin (Vite dev server or static hosting)
+        "Access-Control-Allow-Origin: *",
+        "Access-Control-Allow-Methods: GET, OPTIONS",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+
+async def read_request(reader):
+    """(method, target, headers) of the next request on the connection, or None at EOF."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0) or 0)
+    if length:
+        await reader.readexactly(length)
+    return method, target, headers
+
+
+async def route(engine, method, target):
+    if method == 'OPTIONS':
+        return 204, None
+    if method != 'GET':
+        return 405, {"error": "only GET is supported"}
+
+    url = urlsplit(target)
+    params = parse_qs(url.query)
+    if url.path == '/health':
+        return 200, {"status": "ok", "movies": engine.collection.count()}
+    if url.path == '/stats':
+        return 200, engine.stats()
+    if url.path != '/search':
+        return 404, {"error": f"unknown path {url.path}"}
+
+    text = normalize_query(params.get('q', [''])[0])
+    if not text:
+        return 400, {"error": "missing query parameter q"}
+    try:
+        k = min(max(int(params.get('k', [DEFAULT_K])[0]), 1), MAX_K)
+    except ValueError:
+        return 400, {"error": "k must be an integer"}
+
+    start = time.perf_counter()
+    hits, cached = await engine.search(text, k)
+    return 200, {"query": text, "results": hits, "cached": cached,
+                 "ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def connection_handler(engine):
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = await route(engine, method, target)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                writer.write(encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+def open_engine(chroma_path, max_batch, batch_window_ms, cache_size, device=None):
+    """Open the collection and load the encoder it was built with."""
+    client = chromadb.PersistentClient(path=str(chroma_path))
+    collection = client.get_collection(name=COLLECTION_NAME)
+    model_key = (collection.metadata or {}).get('embedding_model')
+    if model_key is None:
+        raise SystemExit(f"Collection '{COLLECTION_NAME}' does not record its embedding model; "
+                         "rerun 03_generate_embeddings.py --rebuild.")
+    model_name, backend = split_model_key(model_key)
+    print(f"Loading {model_name} ({backend}) for {collection.count()} movies...")
+    model = load_encoder(model_name, device=device, backend=backend)
+    # Warm up so the first request does not pay for lazy initialization
+    model.encode(["warm up"], convert_to_numpy=True)
+    return SearchEngine(model, collection, max_batch, batch_window_ms, cache_size)
+
+
+async def serve(engine, host, port):
+    batcher = asyncio.create_task(engine.run())
+    server = await asyncio.start_server(connection_handler(engine), host, port)
+    print(f"Serving semantic search on http://{host}:{port}/search?q=...")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batcher.cancel()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve semantic search over the PlotPoint collection.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help="Queries per encode call.")
+    parser.add_argument('--batch-window', type=float, default=BATCH_WINDOW_MS,
+                        help="Milliseconds to wait for more queries before running a batch.")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="Query embeddings kept (LRU).")
+    parser.add_argument('--device', default=None, help="Encoder device (default: CUDA when available).")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    chroma_path = (Path(__file__).parent / CHROMA_DB_PATH).resolve()
+    if not chroma_path.exists():
+        print("ChromaDB missing. Run 03_generate_embeddings.py first.")
+        return
+    engine = open_engine(chroma_path, args.max_batch, args.batch_window, args.cache_size, args.device)
+    try:
+        asyncio.run(serve(engine, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
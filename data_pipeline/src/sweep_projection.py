@@ -0,0 +1,253 @@
+"""Sweep PCA/UMAP/HDBSCAN settings of 05_reduce_and_cluster.py and rank them.
+
+Shared work is done once in this process: PCA is fit once at the largest
+requested size (smaller sizes are its leading components), and one exact
+cosine kNN graph is built per PCA size at the largest `n_neighbors` (smaller
+values use its leading columns), then handed to every UMAP run as
+`precomputed_knn`. UMAP and HDBSCAN runs are independent (HDBSCAN clusters the
+PCA space), so they run as separate tasks on a process pool and every grid
+point combines one of each.
+
+Each configuration is scored with cheap metrics:
+  - recall: overlap of each movie's top-k neighbors in the 3D layout with its
+    top-k in the original embedding space (what the web app shows as "similar")
+  - trust: sklearn trustworthiness of the layout on a fixed sample
+  - noise: fraction of movies HDBSCAN leaves unclustered, and cluster count
+and ranked by score = (recall + trust) / 2 * (1 - noise).
+
+    python src/sweep_projection.py --pca 30 50 --neighbors 10 15 30 --min-dist 0.0 0.1 \\
+        --min-cluster-size 10 15 25 --min-samples 5 10 --workers 4
+"""
+import argparse
+import csv
+import importlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+from embedding_store import stable_ids, load_embeddings
+from frames import latest_frame_path, read_frame
+from neighbors import knn_graph
+
+OUTPUT_CSV = "../data/output/sweep_results.csv"
+OUTPUT_JSON = "../data/output/sweep_results.json"
+RECALL_K = 10
+TRUST_SAMPLE = 2000
+RANDOM_SEED = 42
+
+SORT_KEYS = ['score', 'recall', 'trust', 'noise', 'clusters']
+
+
+# --- Pool workers (arrays are shared through memory-mapped .npy files) ---
+
+def _load(work_dir, name):
+    return np.load(Path(work_dir) / f"{name}.npy", mmap_mode='r')
+
+
+def _run_umap(work_dir, pca_dims, n_neighbors, min_dist, metric, trust_rows):
+    import umap
+    from sklearn.manifold import trustworthiness
+    from sklearn.neighbors import NearestNeighbors
+
+    # Seeded runs are single-threaded and no run needs transform(); UMAP warns about both
+    warnings.filterwarnings('ignore', category=UserWarning, module='umap')
+    start = time.perf_counter()
+    points = np.array(_load(work_dir, "pca")[:, :pca_dims])
+    knn_indices = np.array(_load(work_dir, f"knn_indices_{pca_dims}")[:, :n_neighbors])
+    knn_dists = np.array(_load(work_dir, f"knn_dists_{pca_dims}")[:, :n_neighbors])
+    reducer = umap.UMAP(
+        n_neighbors=n_neighbors,
+        min_dist=min_dist,
+        n_components=3,
+        metric=metric,
+        random_state=RANDOM_SEED,
+        precomputed_knn=(knn_indices, knn_dists, None)
+    )
+    layout = reducer.fit_transform(points)
+
+    reference = _load(work_dir, "reference_knn")
+    k = reference.shape[1]
+    _, layout_knn = NearestNeighbors(n_neighbors=k + 1).fit(layout).kneighbors(layout)
+    # Drop each point itself (ties can put a duplicate first, so filter rather than slice)
+    rows = np.arange(len(layout))[:, None]
+    layout_knn = np.where(layout_knn == rows, -1, layout_knn)
+    hits = (layout_knn[:, :, None] == reference[:, None, :]).any(axis=1).sum()
+    recall = hits / reference.size
+
+    raw_sample = np.asarray(_load(work_dir, "trust_sample"))
+    trust = trustworthiness(raw_sample, layout[trust_rows], n_neighbors=k, metric='cosine')
+    return {"recall": float(recall), "trust": float(trust), "umap_seconds": time.perf_counter() - start}
+
+
+def _run_hdbscan(work_dir, pca_dims, min_cluster_size, min_samples):
+    import hdbscan
+
+    start = time.perf_counter()
+    points = np.array(_load(work_dir, "pca")[:, :pca_dims])
+    labels = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, min_samples=min_samples).fit_predict(points)
+    return {
+        "clusters": int(labels.max() + 1),
+        "noise": float(np.mean(labels == -1)),
+        "hdbscan_seconds": time.perf_counter() - start
+    }
+
+
+# --- Shared precomputation ---
+
+def prepare(work_dir, embeddings, pca_sizes, max_neighbors, recall_k, trust_rows):
+    """Write the arrays every task reads: PCA (once), kNN graphs, reference neighbors."""
+    work_dir = Path(work_dir)
+    largest = min(max(pca_sizes), embeddings.shape[1], embeddings.shape[0])
+    print(f"Fitting PCA once ({largest}D)...")
+    pca_result = PCA(n_components=largest, random_state=RANDOM_SEED).fit_transform(embeddings)
+    np.save(work_dir / "pca.npy", pca_result.astype(np.float32))
+
+    for dims in pca_sizes:
+        print(f"Building {max_neighbors}-NN graph on PCA {dims}D...")
+        indices, distances = knn_graph(pca_result[:, :dims], max_neighbors - 1)
+        # UMAP's own kNN graphs list each point as its own nearest neighbor
+        rows = np.arange(len(indices), dtype=indices.dtype)[:, None]
+        np.save(work_dir / f"knn_indices_{dims}.npy", np.hstack([rows, indices]))
+        np.save(work_dir / f"knn_dists_{dims}.npy",
+                np.hstack([np.zeros_like(rows, dtype=np.float32), np.maximum(distances, 0)]))
+
+    print(f"Building reference {recall_k}-NN in the original embedding space...")
+    reference, _ = knn_graph(embeddings, recall_k)
+    np.save(work_dir / "reference_knn.npy", reference)
+    np.save(work_dir / "trust_sample.npy", np.asarray(embeddings[trust_rows], dtype=np.float32))
+
+
+def rank(results, sort_key):
+    for row in results:
+        row["score"] = (row["recall"] + row["trust"]) / 2 * (1 - row["noise"])
+    # Lower is better only for noise; cluster count is informational and sorts descending
+    descending = sort_key != 'noise'
+    return sorted(results, key=lambda row: row[sort_key], reverse=descending)
+
+
+def print_table(results, top):
+    header = (f"{'#':>3} {'pca':>4} {'nn':>4} {'min_dist':>8} {'mcs':>4} {'ms':>4} "
+              f"{'clusters':>8} {'noise':>6} {'recall':>6} {'trust':>6} {'score':>6}")
+    print(header)
+    print("-" * len(header))
+    for i, row in enumerate(results[:top], 1):
+        print(f"{i:>3} {row['pca_components']:>4} {row['umap_neighbors']:>4} {row['umap_min_dist']:>8} "
+              f"{row['hdbscan_min_cluster_size']:>4} {row['hdbscan_min_samples']:>4} {row['clusters']:>8} "
+              f"{row['noise']:>6.3f} {row['recall']:>6.3f} {row['trust']:>6.3f} {row['score']:>6.3f}")
+
+
+def write_results(results, csv_path, json_path):
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def parse_args(defaults):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pca', type=int, nargs='+', default=[defaults.pca_components])
+    parser.add_argument('--neighbors', type=int, nargs='+', default=[defaults.umap_neighbors])
+    parser.add_argument('--min-dist', type=float, nargs='+', default=[defaults.umap_min_dist])
+    parser.add_argument('--min-cluster-size', type=int, nargs='+', default=[defaults.hdbscan_min_cluster_size])
+    parser.add_argument('--min-samples', type=int, nargs='+', default=[defaults.hdbscan_min_samples])
+    parser.add_argument('--sample', type=int, default=0, help="Sweep on a random subset of movies (0 = all).")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--k', type=int, default=RECALL_K, help="Neighbors for recall and trustworthiness.")
+    parser.add_argument('--trust-sample', type=int, default=TRUST_SAMPLE,
+                        help="Movies used for trustworthiness (it is quadratic in this).")
+    parser.add_argument('--sort', choices=SORT_KEYS, default='score')
+    parser.add_argument('--top', type=int, default=20, help="Rows of the ranked table to print.")
+    return parser.parse_args()
+
+
+def main():
+    reduce_module = importlib.import_module("05_reduce_and_cluster")
+    args = parse_args(reduce_module)
+    script_dir = Path(__file__).parent
+    data_path = (script_dir / reduce_module.DATA_FILE).resolve()
+    embeddings_path = (script_dir / reduce_module.EMBEDDINGS_FILE).resolve()
+    chroma_path = (script_dir / reduce_module.CHROMA_DB_PATH).resolve()
+
+    if latest_frame_path(data_path) is None or not (embeddings_path.exists() or chroma_path.exists()):
+        print("Data or embeddings missing.")
+        return 1
+
+    ids = stable_ids(read_frame(data_path))
+    embeddings = load_embeddings(ids, embeddings_path, (script_dir / reduce_module.EMBEDDING_IDS_FILE).resolve(),
+                                 chroma_path, reduce_module.COLLECTION_NAME)
+    rng = np.random.default_rng(RANDOM_SEED)
+    if args.sample and args.sample < len(embeddings):
+        embeddings = embeddings[np.sort(rng.choice(len(embeddings), args.sample, replace=False))]
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = len(embeddings)
+    trust_rows = np.sort(rng.choice(n, min(args.trust_sample, n), replace=False))
+
+    pca_sizes = sorted(set(args.pca))
+    umap_grid = list(itertools.product(pca_sizes, sorted(set(args.neighbors)), sorted(set(args.min_dist))))
+    hdbscan_grid = list(itertools.product(pca_sizes, sorted(set(args.min_cluster_size)), sorted(set(args.min_samples))))
+    print(f"Sweeping {n} movies: {len(umap_grid)} UMAP x {len(hdbscan_grid) // len(pca_sizes)} HDBSCAN runs "
+          f"per PCA size, {args.workers} worker(s)")
+
+    start = time.perf_counter()
+    umap_scores, hdbscan_scores = {}, {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepare(work_dir, embeddings, pca_sizes, max(args.neighbors), args.k, trust_rows)
+
+        # Workers share the machine, so keep numba from starting a thread per core in each
+        os.environ.setdefault('NUMBA_NUM_THREADS', str(max(1, (os.cpu_count() or 1) // args.workers)))
+        context = mp.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+            futures = {pool.submit(_run_umap, work_dir, *config, reduce_module.umap_metric, trust_rows):
+                       ('umap', config) for config in umap_grid}
+            futures.update({pool.submit(_run_hdbscan, work_dir, *config): ('hdbscan', config)
+                            for config in hdbscan_grid})
+            for done, future in enumerate(as_completed(futures), 1):
+                kind, config = futures[future]
+                (umap_scores if kind == 'umap' else hdbscan_scores)[config] = future.result()
+                print(f"  [{done}/{len(futures)}] {kind} {config}")
+
+    results = []
+    for (dims, n_neighbors, min_dist), layout in umap_scores.items():
+        for (cluster_dims, min_cluster_size, min_samples), clusters in hdbscan_scores.items():
+            if cluster_dims != dims:
+                continue
+            results.append({
+                "pca_components": dims,
+                "umap_neighbors": n_neighbors,
+                "umap_min_dist": min_dist,
+                "hdbscan_min_cluster_size": min_cluster_size,
+                "hdbscan_min_samples": min_samples,
+                **clusters,
+                **layout
+            })
+    results = rank(results, args.sort)
+
+    print(f"\nSwept {len(results)} configurations in {time.perf_counter() - start:.1f}s "
+          f"(ranked by {args.sort}):\n")
+    print_table(results, args.top)
+    csv_path, json_path = (script_dir / OUTPUT_CSV).resolve(), (script_dir / OUTPUT_JSON).resolve()
+    write_results(results, csv_path, json_path)
+    print(f"\nFull results written to {csv_path} and {json_path.name}")
+
+    best = results[0]
+    print("\nTo use the top configuration, set in 05_reduce_and_cluster.py:")
+    for key in ("pca_components", "umap_neighbors", "umap_min_dist", "hdbscan_min_cluster_size", "hdbscan_min_samples"):
+        print(f"  {key} = {best[key]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Octree tile set over the normalized 3D coordinates. Every node stores a
+# level-of-detail subset: the most popular movies of its cell not already shown
+# by an ancestor. Loading the root gives an overview of the whole universe and
+# each level down adds detail, so a client only fetches the nodes near the camera.
+# Leaves (cells with few movies left, or at max depth) store everything remaining.
+MANIFEST_VERSION = 1
+
+
+def cube_bounds(coords, margin=1e-3):
+    """Cubic bounds around the points so every octant is itself a cube."""
+    lo, hi = coords.min(axis=0), coords.max(axis=0)
+    center, half = (lo + hi) / 2, (hi - lo).max() / 2 * (1 + margin) + margin
+    return center - half, center + half
+
+
+def build_octree(coords, priority, lod_size, leaf_size, max_depth):
+    """Partition rows into octree nodes.
+
+    Returns a list of nodes sorted by id; each has `id` (octant path from the
+    root, "r" for the root), `level`, `bounds`, `count` (movies in the
+    subtree), `rows` (movies stored in this node, most popular first) and
+    `children`. The result only depends on the inputs: ties in priority are
+    broken by row position.
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    order = np.lexsort((np.arange(len(coords)), -np.asarray(priority, dtype=np.float64)))
+    nodes = []
+
+    def visit(node_id, rows, lo, hi, level):
+        # `rows` stays in priority order, so a node's LOD subset is just its head
+        split = len(rows) > leaf_size and level < max_depth
+        own, rest = (rows[:lod_size], rows[lod_size:]) if split else (rows, rows[:0])
+        node = {
+            "id": node_id,
+            "level": level,
+            "bounds": [lo.tolist(), hi.tolist()],
+            "count": int(len(rows)),
+            "rows": own,
+            "children": []
+        }
+        nodes.append(node)
+        if len(rest) == 0:
+            return
+
+        center = (lo + hi) / 2
+        octant = ((coords[rest] >= center) * np.array([1, 2, 4])).sum(axis=1)
+        for o in range(8):
+            child_rows = rest[octant == o]
+            if len(child_rows) == 0:
+                continue
+            upper = np.array([o & 1, o & 2, o & 4], dtype=bool)
+            child_lo = np.where(upper, center, lo)
+            child_hi = np.where(upper, hi, center)
+            child_id = f"{node_id}{o}" if level else str(o)
+            node["children"].append(child_id)
+            visit(child_id, child_rows, child_lo, child_hi, level + 1)
+
+    lo, hi = cube_bounds(coords)
+    visit("r", order, lo, hi, 0)
+    return sorted(nodes, key=lambda node: (node["level"], node["id"]))
+
+
+def write_tile_manifest(path, nodes, count, lod_size, leaf_size, max_depth):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "count": int(count),
+        "lod_size": lod_size,
+        "leaf_size": leaf_size,
+        "max_depth": max_depth,
+        "nodes": [
+            {
+                "id": node["id"],
+                "level": node["level"],
+                "bounds": node["bounds"],
+                "count": node["count"],
+                "points": int(len(node["rows"])),
+                "children": node["children"],
+                "file": f"{node['id']}.bin"
+            }
+            for node in nodes
+        ]
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+
+def load_tile_manifest(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def distance_to_box(point, bounds):
+    lo, hi = np.asarray(bounds[0]), np.asarray(bounds[1])
+    return float(np.linalg.norm(np.maximum(np.maximum(lo - point, point - hi), 0)))
+
+
+def select_tiles(manifest, camera, point_budget, detail=2.0):
+    """Nodes to load for a camera position, coarse to fine.
+
+    A node is refined (its children loaded) while the camera is within
+    `detail` cell sizes of it and the point budget allows; the root is always
+    loaded. This is the traversal a client runs before fetching tiles.
+    """
+    nodes = {node["id"]: node for node in manifest["nodes"]}
+    camera = np.asarray(camera, dtype=np.float64)
+    selected, loaded = [], 0
+    frontier = [(0.0, "r")]
+    while frontier:
+        frontier.sort()
+        _, node_id = frontier.pop(0)
+        node = nodes[node_id]
+        if selected and loaded + node["points"] > point_budget:
+            continue
+        selected.append(node_id)
+        loaded += node["points"]
+        size = node["bounds"][1][0] - node["bounds"][0][0]
+        for child_id in node["children"]:
+            child = nodes[child_id]
+            distance = distance_to_box(camera, child["bounds"])
+            if distance <= detail * size:
+                frontier.append((distance, child_id))
+    return selected
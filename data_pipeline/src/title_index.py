@@ -0,0 +1,163 @@
+import bisect
+import unicodedata
+
+import numpy as np
+
+from columnar import write_columnar, read_columnar
+
+# Title lookup index, exported next to the web payload (plotpoint_titles.bin/.json)
+# in the columnar format and loaded by the Python tools and the web app
+# (web_app/src/utils/titleIndex.js). Titles are normalized (lowercase, accents
+# and punctuation removed) into unique keys sorted by codepoint, which give:
+#   - exact lookups (a dict / Map built from the keys on load)
+#   - prefix lookups for autocomplete (binary search over the sorted keys)
+#   - fuzzy lookups (trigram inverted index, ranked by trigram similarity)
+# Every key lists its rows (export row order) most popular first.
+FUZZY_MIN_SCORE = 0.25
+# Prefix ranges wider than this are answered by walking titles in popularity order
+PREFIX_SORT_LIMIT = 256
+# Sorts after every other codepoint: the upper bound of a prefix range
+MAX_CODEPOINT = "\U0010ffff"
+
+
+def normalize_title(title):
+    """'Amélie' -> 'amelie', 'Your Name.' -> 'your name'.
+
+    Same spec as normalizeTitle in titleIndex.js: NFKD, lowercase, drop marks
+    (category M), then every run of characters other than letters and numbers
+    (categories L and N) becomes one space, trimmed. Both are checked against
+    tests/fixtures/tricky_titles.json.
+    """
+    text = unicodedata.normalize('NFKD', str(title)).lower()
+    kept = (c for c in text if unicodedata.category(c)[0] != 'M')
+    text = "".join(c if unicodedata.category(c)[0] in 'LN' else " " for c in kept)
+    return " ".join(text.split())
+
+
+def trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    def __init__(self, keys, key_offsets, rows, key_rank, grams, gram_offsets, postings, gram_counts):
+        self.keys = keys                   # sorted unique normalized titles
+        self.key_offsets = key_offsets     # rows of key i: rows[key_offsets[i]:key_offsets[i + 1]]
+        self.rows = rows
+        self.key_rank = key_rank           # popularity rank of each key's best row (0 = most popular)
+        self.grams = grams                 # sorted trigrams
+        self.gram_offsets = gram_offsets   # keys containing trigram j: postings[gram_offsets[j]:gram_offsets[j + 1]]
+        self.postings = postings
+        self.gram_counts = gram_counts     # distinct trigrams per key
+        self.by_rank = np.empty_like(key_rank)
+        self.by_rank[key_rank] = np.arange(len(key_rank), dtype=key_rank.dtype)
+        self.key_ids = {key: i for i, key in enumerate(keys)}
+        self.gram_ids = {gram: j for j, gram in enumerate(grams)}
+
+    @classmethod
+    def build(cls, titles, popularity=None):
+        n = len(titles)
+        popularity = np.zeros(n) if popularity is None else np.nan_to_num(np.asarray(popularity, dtype=np.float64))
+        # Rows most popular first (ties by row), so every key's rows and ranks come out in that order
+        order = np.lexsort((np.arange(n), -popularity))
+        normalized = [normalize_title(titles[row]) for row in order]
+
+        rows_by_key = {}
+        for row, key in zip(order.tolist(), normalized):
+            rows_by_key.setdefault(key, []).append(row)
+        keys = sorted(rows_by_key)
+        first_seen = {key: rank for rank, key in enumerate(dict.fromkeys(normalized))}
+
+        lengths = np.array([len(rows_by_key[key]) for key in keys], dtype=np.int64)
+        key_offsets = np.zeros(len(keys) + 1, dtype=np.uint32)
+        np.cumsum(lengths, out=key_offsets[1:])
+        rows = np.fromiter((row for key in keys for row in rows_by_key[key]), dtype=np.uint32, count=n)
+        key_rank = np.array([first_seen[key] for key in keys], dtype=np.uint32)
+
+        postings_by_gram = {}
+        gram_counts = np.empty(len(keys), dtype=np.uint16)
+        for i, key in enumerate(keys):
+            key_grams = trigrams(key)
+            gram_counts[i] = min(len(key_grams), 0xffff)
+            for gram in key_grams:
+                postings_by_gram.setdefault(gram, []).append(i)
+        grams = sorted(postings_by_gram)
+        gram_lengths = np.array([len(postings_by_gram[g]) for g in grams], dtype=np.int64)
+        gram_offsets = np.zeros(len(grams) + 1, dtype=np.uint32)
+        np.cumsum(gram_lengths, out=gram_offsets[1:])
+        postings = np.fromiter((i for g in grams for i in postings_by_gram[g]), dtype=np.uint32,
+                               count=int(gram_offsets[-1]))
+        return cls(keys, key_offsets, rows, key_rank, grams, gram_offsets, postings, gram_counts)
+
+    def save(self, bin_path, manifest_path):
+        write_columnar(
+            bin_path, manifest_path, len(self.rows),
+            columns={
+                "key_offsets": self.key_offsets,
+                "rows": self.rows,
+                "key_rank": self.key_rank,
+                "gram_offsets": self.gram_offsets,
+                "postings": self.postings,
+                "gram_counts": self.gram_counts
+            },
+            strings={"keys": self.keys, "grams": self.grams}
+        )
+
+    @classmethod
+    def load(cls, bin_path, manifest_path):
+        table = read_columnar(bin_path, manifest_path)
+        return cls(table["keys"], table["key_offsets"], table["rows"], table["key_rank"], table["grams"],
+                   table["gram_offsets"], table["postings"], table["gram_counts"])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def key_rows(self, key_id):
+        return self.rows[self.key_offsets[key_id]:self.key_offsets[key_id + 1]].tolist()
+
+    def exact(self, title):
+        """Rows whose normalized title equals `title`'s, most popular first."""
+        key_id = self.key_ids.get(normalize_title(title))
+        return [] if key_id is None else self.key_rows(key_id)
+
+    def prefix(self, text, limit=10):
+        """Rows whose normalized title starts with `text`, most popular titles first."""
+        query = normalize_title(text)
+        if not query:
+            return []
+        lo = bisect.bisect_left(self.keys, query)
+        hi = bisect.bisect_left(self.keys, query + MAX_CODEPOINT, lo)
+        if hi - lo <= PREFIX_SORT_LIMIT:
+            top = lo + np.argsort(self.key_rank[lo:hi], kind='stable')[:limit]
+        else:
+            # Key ids are positions in sorted order, so a key matches when lo <= id < hi;
+            # a wide range is dense, so the most popular matches come up within a few chunks
+            top = []
+            for start in range(0, len(self.by_rank), 4096):
+                chunk = self.by_rank[start:start + 4096]
+                top.extend(chunk[(chunk >= lo) & (chunk < hi)][:limit - len(top)].tolist())
+                if len(top) >= limit:
+                    break
+        found = [row for key_id in top for row in self.key_rows(int(key_id))]
+        return found[:limit]
+
+    def fuzzy(self, text, limit=10, min_score=FUZZY_MIN_SCORE):
+        """[(row, score)] for titles sharing enough trigrams with `text` (Jaccard similarity), best first."""
+        grams = trigrams(normalize_title(text))
+        gram_ids = [self.gram_ids[g] for g in grams if g in self.gram_ids]
+        if not gram_ids:
+            return []
+        hits = np.concatenate([self.postings[self.gram_offsets[j]:self.gram_offsets[j + 1]] for j in gram_ids])
+        common = np.bincount(hits, minlength=len(self.keys))
+        key_ids = np.flatnonzero(common)
+        common = common[key_ids]
+        scores = common / (len(grams) + self.gram_counts[key_ids].astype(np.float64) - common)
+        keep = scores >= min_score
+        key_ids, scores = key_ids[keep], scores[keep]
+        if len(key_ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            key_ids, scores = key_ids[top], scores[top]
+        # Best score first, more popular title on ties
+        order = np.lexsort((self.key_rank[key_ids], -scores))
+        found = [(row, float(scores[i])) for i in order for row in self.key_rows(int(key_ids[i]))]
+        return found[:limit]
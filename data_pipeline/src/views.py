@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from embedding_cache import content_hash
+from parsing import parse_list_column, join_head
+
+# Multi-view embeddings (03_generate_embeddings.py --views). Instead of one text
+# blob per movie, every field below is encoded on its own and cached by content
+# hash, so each distinct genre list, era or overview is encoded once. The
+# per-field matrices are kept next to embeddings.npy, and the movie vector is a
+# weighted sum of the unit field vectors, renormalized. Changing a weight only
+# recombines those matrices (reweight_views.py): no model inference.
+VIEW_FIELDS = ['title', 'genres', 'themes', 'overview', 'era', 'language', 'production', 'runtime']
+DEFAULT_WEIGHTS = {
+    "title": 0.3,
+    "genres": 0.5,
+    "themes": 0.6,
+    "overview": 1.0,
+    "era": 0.2,
+    "language": 0.2,
+    "production": 0.2,
+    "runtime": 0.1
+}
+COMBINE_CHUNK = 50_000
+
+
+def _labeled(label, values):
+    """'Label: value' per row, or '' where the value is empty (the field is then left out)."""
+    values = values.where(values.notna(), "").astype(str)
+    return (label + ": " + values).where(values.str.strip() != "", "").tolist()
+
+
+def view_texts(df):
+    """Field -> row-aligned list of texts, labeled like the single-blob input of step 02."""
+    return {
+        "title": _labeled("Title", df['title']),
+        "genres": _labeled("Genres", join_head(parse_list_column(df['genres_list']), 3)),
+        "themes": _labeled("Themes", join_head(parse_list_column(df['keywords_list']), 8)),
+        "overview": _labeled("Summary", df['overview']),
+        "era": _labeled("Era", df['era']),
+        "language": _labeled("Language", df['original_language']),
+        "production": _labeled("Production", df['top_production']),
+        "runtime": _labeled("Runtime", df['runtime_bucket'])
+    }
+
+
+def view_paths(views_dir, field):
+    """Matrix and id index of one field (embedding_store.save_embedding_matrix layout)."""
+    return Path(views_dir) / f"{field}.npy", Path(views_dir) / f"{field}.json"
+
+
+def load_weights(path):
+    """DEFAULT_WEIGHTS overridden by the weights saved by reweight_views.py, if any."""
+    weights = dict(DEFAULT_WEIGHTS)
+    if Path(path).exists():
+        with open(path, encoding='utf-8') as f:
+            weights.update(json.load(f)['weights'])
+    return check_weights(weights)
+
+
+def check_weights(weights):
+    unknown = sorted(set(weights) - set(VIEW_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown view field(s): {', '.join(unknown)} (fields: {', '.join(VIEW_FIELDS)})")
+    if any(w < 0 for w in weights.values()) or not any(weights.values()):
+        raise ValueError("View weights must be non-negative and not all zero")
+    return {field: float(weights.get(field, 0.0)) for field in VIEW_FIELDS}
+
+
+def save_weights(path, weights):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"weights": check_weights(weights)}, f, indent=2)
+
+
+def row_hashes(field_hashes, weights):
+    """Content hash of every combined vector: the field hashes plus the weights.
+
+    Used as the Chroma content hash, so a reweight rewrites exactly the rows
+    whose combined vector changed.
+    """
+    spec = json.dumps(weights, sort_keys=True)
+    columns = [field_hashes[field] for field in VIEW_FIELDS]
+    return [content_hash(spec + "|" + "|".join(h or "" for h in row)) for row in zip(*columns)]
+
+
+def combine_views(views, weights, chunk=COMBINE_CHUNK):
+    """Weighted sum of unit field vectors, L2-normalized, as float32 [n, dim].
+
+    `views` maps field -> row-aligned matrix (memory-mapped is fine; all-zero
+    rows mark movies without that field, whose weight then goes to the other
+    fields). Works in chunks of `chunk` rows, so only the result is held in memory.
+    """
+    fields = [field for field in VIEW_FIELDS if weights.get(field, 0) > 0]
+    n, dim = views[fields[0]].shape
+    combined = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, chunk):
+        end = min(start + chunk, n)
+        acc = np.zeros((end - start, dim), dtype=np.float32)
+        for field in fields:
+            block = np.asarray(views[field][start:end], dtype=np.float32)
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            acc += (weights[field] / np.maximum(norms, 1e-12)) * block
+        combined[start:end] = acc / np.maximum(np.linalg.norm(acc, axis=1, keepdims=True), 1e-12)
+    return combined
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Pipeline modules live flat in src/ (run as scripts from there), so tests import them the same way
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
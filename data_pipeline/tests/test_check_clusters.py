@@ -0,0 +1,23 @@
+import importlib
+
+check_step = importlib.import_module("06_check_clusters")
+
+
+def test_report_clusters_empty_catalog(capsys):
+    check_step.report_clusters({'movies': 0, 'noise': 0, 'clusters': []})
+    out = capsys.readouterr().out
+    assert 'Total movies: 0' in out
+    assert 'No movies' in out
+    assert 'Clustered' not in out
+
+
+def test_report_clusters_shares(capsys):
+    summary = {
+        'movies': 4,
+        'noise': 1,
+        'clusters': [{'cluster': 0, 'size': 3, 'genres': [{'term': 'Drama'}], 'keywords': []}],
+    }
+    check_step.report_clusters(summary)
+    out = capsys.readouterr().out
+    assert 'Cluster 0: 3 movies (75.0%)  [Drama | -]' in out
+    assert 'Noise: 1 (25.0%)' in out
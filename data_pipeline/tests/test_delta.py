@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+import pytest
+
+from delta import apply_delta, columns_from_records, diff_records, order_runs, record_digests, write_version
+
+
+def make_records(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "id": str(1000 + i),
+        "title": f"Movie {i}",
+        "x": float(rng.normal()), "y": float(rng.normal()), "z": float(rng.normal()),
+        "cluster": int(rng.integers(-1, 5)),
+        "cluster_confidence": float(rng.random()),
+        "genres": ["Drama", "Comedy"][:int(rng.integers(0, 3))]
+    } for i in range(n)]
+
+
+def next_version(records, seed=1):
+    """Records after an update: removals, additions, content and placement changes, reordering."""
+    rng = np.random.default_rng(seed)
+    records = [dict(r) for i, r in enumerate(records) if i % 7 != 3]
+    for r in records[::5]:
+        r["title"] += " (Director's Cut)"
+    for r in records[1::6]:
+        r["x"] += 1.5
+        r["cluster"] = 4
+    records += make_records(20, seed=seed + 10)
+    for i, r in enumerate(records[-20:]):
+        r["id"] = f"new-{seed}-{i}"
+    order = rng.permutation(len(records))
+    return [records[i] for i in order]
+
+
+class Export:
+    """write_version over a tmp output dir, the way step 05 calls it."""
+
+    def __init__(self, root, history=10):
+        self.root = root
+        self.manifest_path = root / "plotpoint_manifest.json"
+        self.deltas_dir = root / "deltas"
+        self.records_path = root / "versions" / "records.npz"
+        self.history = history
+
+    def write(self, records):
+        content, placement = record_digests([columns_from_records(records)])
+        export_path = self.root / "plotpoint_data_3d.json"
+        export_path.write_text(json.dumps(records), encoding="utf-8")
+        return write_version(self.manifest_path, self.deltas_dir, self.records_path, [r["id"] for r in records],
+                             content, placement, lambda rows: [records[i] for i in rows], [export_path],
+                             self.history)
+
+    def delta(self, entry):
+        return json.loads((self.root / entry["file"]).read_text(encoding="utf-8"))
+
+
+def test_order_runs():
+    assert order_runs([]) == []
+    assert order_runs([0, 1, 2, 7, 8, 3]) == [[0, 3], [7, 2], [3, 1]]
+
+
+def test_diff_records():
+    old_ids, new_ids = ["a", "b", "c", "d"], ["d", "b", "e", "a"]
+    old_content, old_placement = np.array([1, 2, 3, 4], np.uint64), np.array([1, 2, 3, 4], np.uint64)
+    new_content, new_placement = np.array([4, 9, 5, 1], np.uint64), np.array([8, 2, 5, 1], np.uint64)
+    diff = diff_records(old_ids, old_content, old_placement, new_ids, new_content, new_placement)
+    # "b" changed content, "d" only moved, "a" is unchanged; "e" is appended after the 4 old rows
+    assert diff == {
+        "removed": ["c"],
+        "added": [2],
+        "updated": [1],
+        "moved": [0],
+        "order": [[3, 1], [1, 1], [4, 1], [0, 1]]
+    }
+
+
+def test_applying_the_delta_gives_the_full_export(tmp_path):
+    export = Export(tmp_path)
+    v1 = make_records(200)
+    first = export.write(v1)
+    assert first["version"] == 1 and first["deltas"] == [] and first["count"] == 200
+    assert set(first["files"]) == {"plotpoint_data_3d.json"}
+
+    v2 = next_version(v1)
+    second = export.write(v2)
+    assert second["version"] == 2
+    entry = second["deltas"][-1]
+    delta = export.delta(entry)
+    assert (entry["from"], entry["to"]) == (1, 2)
+    assert entry["added"] == 20 and entry["removed"] == len(v1) - (len(v2) - 20)
+    assert entry["updated"] > 0 and entry["moved"] > 0
+    assert apply_delta(v1, delta) == v2
+
+
+def test_delta_chain_and_history(tmp_path):
+    export = Export(tmp_path, history=2)
+    versions = [make_records(150)]
+    export.write(versions[0])
+    for seed in range(1, 4):
+        versions.append(next_version(versions[-1], seed))
+        manifest = export.write(versions[-1])
+    assert manifest["version"] == 4
+    assert [(d["from"], d["to"]) for d in manifest["deltas"]] == [(2, 3), (3, 4)]
+    assert not (tmp_path / "deltas" / "delta_1_2.json").exists()
+
+    records = versions[1]
+    for entry in manifest["deltas"]:
+        records = apply_delta(records, export.delta(entry))
+    assert records == versions[-1]
+
+
+def test_unchanged_records_keep_the_version(tmp_path):
+    export = Export(tmp_path)
+    records = make_records(50)
+    first = export.write(records)
+    again = export.write([dict(r) for r in records])
+    assert again["version"] == first["version"] and again["hash"] == first["hash"]
+    assert again["created"] == first["created"] and again["deltas"] == []
+
+
+def test_apply_delta_checks_the_base(tmp_path):
+    export = Export(tmp_path)
+    v1 = make_records(30)
+    export.write(v1)
+    delta = export.delta(export.write(next_version(v1))["deltas"][-1])
+    with pytest.raises(ValueError, match="expects 30 records"):
+        apply_delta(v1[:-1], delta)
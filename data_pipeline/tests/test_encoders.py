@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from encoders import BACKENDS, STUB_DIM, cache_key, collect, iter_encode_cpu, length_sorted_shards, load_encoder
+
+
+class FakeModel:
+    """Stands in for a SentenceTransformer: one token per word, vector = [row id, token count]."""
+    max_seq_length = 16
+
+    def tokenizer(self, sentences, add_special_tokens=True, truncation=True, max_length=None):
+        return {'input_ids': [sentence.split()[:max_length] for sentence in sentences]}
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True):
+        return np.array([[float(s.split()[0]), len(s.split())] for s in sentences], dtype=np.float64)
+
+
+def test_length_sorted_shards_cover_every_position_once():
+    lengths = np.random.default_rng(0).integers(1, 100, 1000)
+    shards = length_sorted_shards(lengths, batch_size=16, batches_per_shard=4)
+    positions = np.concatenate(shards)
+    assert sorted(positions.tolist()) == list(range(1000))
+    assert all(len(shard) <= 64 for shard in shards)
+    # Longest shard first, and shards do not overlap in length
+    assert lengths[shards[0]].min() >= lengths[shards[1]].max()
+    assert lengths[shards[-1]].max() <= lengths[shards[-2]].min()
+
+
+def test_collect_is_row_aligned():
+    shards = [(np.array([2, 0]), np.array([[2.0], [0.0]])), (np.array([1]), np.array([[1.0]]))]
+    embeddings = collect(3, shards)
+    assert embeddings.dtype == np.float32
+    assert embeddings[:, 0].tolist() == [0.0, 1.0, 2.0]
+
+
+def test_iter_encode_cpu_single_worker():
+    rng = np.random.default_rng(1)
+    sentences = [" ".join([str(i)] + ["w"] * int(rng.integers(0, 30))) for i in range(100)]
+    shards = list(iter_encode_cpu("fake", sentences, batch_size=4, workers=1, threads_per_worker=1,
+                                  model=FakeModel()))
+    embeddings = collect(len(sentences), shards)
+    assert embeddings[:, 0].tolist() == list(range(100))
+    assert all(vectors.dtype == np.float32 for _, vectors in shards)
+    # Shards run from the longest (truncated) inputs to the shortest
+    lengths = [np.minimum(vectors[:, 1], FakeModel.max_seq_length) for _, vectors in shards]
+    assert all(a.min() >= b.max() for a, b in zip(lengths, lengths[1:]))
+
+
+def test_cache_key_per_backend():
+    assert cache_key("all-mpnet-base-v2") == "all-mpnet-base-v2"
+    assert cache_key("all-mpnet-base-v2", "torch") == "all-mpnet-base-v2"
+    assert cache_key("all-mpnet-base-v2", "onnx-int8") == "all-mpnet-base-v2@onnx-int8"
+    assert len({cache_key("m", backend) for backend in BACKENDS}) == len(BACKENDS)
+
+
+def test_load_encoder_stub_needs_no_model():
+    model = load_encoder("not-a-model", backend="stub")
+    vectors = model.encode(["space opera heroes", "space opera heroes", "quiet love story"])
+    assert vectors.shape == (3, STUB_DIM) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    assert np.array_equal(vectors[0], vectors[1])
+
+
+def test_load_encoder_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown encoder backend"):
+        load_encoder("all-mpnet-base-v2", backend="fp16")
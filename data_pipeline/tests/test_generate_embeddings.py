@@ -0,0 +1,111 @@
+import importlib
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from embedding_cache import EmbeddingCache, content_hash
+from encoders import STUB_DIM
+
+embed_step = importlib.import_module("03_generate_embeddings")
+
+
+class FakeCollection:
+    """Records upserts and deletes; fails the upsert numbered `fail_at` when set."""
+
+    def __init__(self, fail_at=None):
+        self.upserts = []
+        self.deleted = []
+        self.fail_at = fail_at
+        self.threads = set()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.threads.add(threading.current_thread().name)
+        if self.fail_at is not None and len(self.upserts) == self.fail_at:
+            raise RuntimeError("chroma is down")
+        self.upserts.append((list(ids), np.array(embeddings), list(documents), list(metadatas)))
+
+    def delete(self, ids):
+        self.deleted.append(list(ids))
+
+
+def frame(n):
+    return pd.DataFrame({
+        'embedding_input': [f"Text {i}" for i in range(n)],
+        'title': [f"Movie {i}" for i in range(n)],
+        'era': ["1990s"] * n,
+        'genres_list': [["Drama"]] * n
+    })
+
+
+def writer_for(collection, n, changed=None, removed=(), batch_size=4):
+    df = frame(n)
+    ids = [str(i) for i in range(n)]
+    hashes = [content_hash(text) for text in df['embedding_input']]
+    changed = [True] * n if changed is None else changed
+    return embed_step.ChromaWriter(collection, df, ids, hashes, changed, list(removed), batch_size)
+
+
+def test_chroma_writer_batches_rows_in_submission_order():
+    collection = FakeCollection()
+    n = 11
+    embeddings = np.arange(n, dtype=np.float32)[:, None] * np.ones((1, 3), dtype=np.float32)
+    changed = [i != 5 for i in range(n)]
+    writer = writer_for(collection, n, changed, removed=["old-1", "old-2", "old-3", "old-4", "old-5"])
+    # Rows arrive shard by shard, in any order; unchanged rows are never written
+    for rows in ([9, 2, 5], [0, 10, 7, 3], [1, 8, 4, 6]):
+        writer.submit(rows, embeddings)
+    assert writer.finish() == 10
+
+    written = [i for ids, _, _, _ in collection.upserts for i in ids]
+    assert written == ["9", "2", "0", "10", "7", "3", "1", "8", "4", "6"]
+    assert [len(ids) for ids, _, _, _ in collection.upserts] == [4, 4, 2]
+    for ids, vectors, documents, metadatas in collection.upserts:
+        rows = [int(i) for i in ids]
+        assert np.array_equal(vectors[:, 0], rows)
+        assert documents == [f"Text {i}" for i in rows]
+        assert [m["title"] for m in metadatas] == [f"Movie {i}" for i in rows]
+        assert all(m["content_hash"] == content_hash(d) for m, d in zip(metadatas, documents))
+    assert collection.threads == {"chroma-writer"}
+    assert collection.deleted == [["old-1", "old-2", "old-3", "old-4"], ["old-5"]]
+
+
+def test_chroma_writer_copies_vectors_on_submit():
+    collection = FakeCollection()
+    embeddings = np.zeros((4, 2), dtype=np.float32)
+    writer = writer_for(collection, 4, batch_size=2)
+    writer.submit([0, 1], embeddings)
+    embeddings[:] = 7.0
+    writer.submit([2, 3], embeddings)
+    writer.finish()
+    assert collection.upserts[0][1].tolist() == [[0.0, 0.0], [0.0, 0.0]]
+    assert collection.upserts[1][1].tolist() == [[7.0, 7.0], [7.0, 7.0]]
+
+
+def test_chroma_writer_raises_a_failed_upsert():
+    collection = FakeCollection(fail_at=0)
+    writer = writer_for(collection, 8, batch_size=2, removed=["old"])
+    # Raised by the next submit once the writer has failed, or by finish at the latest
+    with pytest.raises(RuntimeError, match="chroma is down"):
+        for start in range(0, 8, 2):
+            writer.submit(range(start, start + 2), np.zeros((8, 2), dtype=np.float32))
+        writer.finish()
+    writer.cancel()
+    # Nothing is deleted after a failure
+    assert collection.deleted == []
+
+
+def test_encode_with_cache_reports_rows_as_they_finish(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", "stub-test")
+    sentences = ["space opera heroes", "quiet love story", "space opera heroes", "haunted house"]
+    hashes = [content_hash(s) for s in sentences]
+    cache.put_many([hashes[1]], np.full((1, STUB_DIM), 0.5, dtype=np.float32))
+    ready = []
+    embeddings = embed_step.encode_with_cache(sentences, hashes, cache, backend='stub',
+                                              on_ready=lambda rows, matrix: ready.append(sorted(rows)))
+    cache.close()
+    # Cache hits first, then the encoded shard; the repeated text is encoded once and fills both rows
+    assert ready == [[1], [0, 2, 3]]
+    assert np.allclose(embeddings[1], 0.5)
+    assert np.array_equal(embeddings[0], embeddings[2])
@@ -0,0 +1,44 @@
+import hdbscan
+import numpy as np
+import pytest
+from sklearn.decomposition import PCA
+
+from landmarks import place_points, select_landmarks
+
+
+def blobs(seed=0):
+    """A large, a medium and a small cluster in 8-d."""
+    rng = np.random.default_rng(seed)
+    sizes, centers = [3000, 800, 200], rng.normal(scale=20, size=(3, 8))
+    return np.concatenate([rng.normal(center, 1.0, size=(size, 8)) for size, center in zip(sizes, centers)]).astype(
+        np.float32)
+
+
+def test_select_landmarks():
+    points = blobs()
+    landmarks = select_landmarks(points, 500, cells=16, seed=42)
+    assert len(landmarks) == 500
+    assert np.array_equal(landmarks, np.unique(landmarks))
+    assert np.array_equal(landmarks, select_landmarks(points, 500, cells=16, seed=42))
+    # Cells get landmarks in proportion to their size, so the small cluster keeps its share
+    small = np.sum(landmarks >= 3800)
+    assert 15 <= small <= 35
+
+
+def test_select_landmarks_small_catalog():
+    assert np.array_equal(select_landmarks(blobs()[:100], 500, cells=16, seed=42), np.arange(100))
+
+
+@pytest.mark.parametrize("batch_size,workers", [(4000, 1), (333, 1), (1000, 2)])
+def test_place_points_matches_one_batch(batch_size, workers):
+    points = blobs()
+    fit_rows = select_landmarks(points, 600, cells=16, seed=0)
+    reducer = PCA(n_components=3, random_state=0).fit(points[fit_rows])
+    clusterer = hdbscan.HDBSCAN(min_cluster_size=15, prediction_data=True).fit(points[fit_rows])
+
+    coords, labels, strengths = place_points(reducer, clusterer, points, batch_size, workers)
+    assert coords.shape == (len(points), 3) and coords.dtype == np.float32
+    assert np.allclose(coords, reducer.transform(points), atol=1e-4)
+    expected_labels, expected_strengths = hdbscan.approximate_predict(clusterer, points)
+    assert np.array_equal(labels, expected_labels)
+    assert np.allclose(strengths, expected_strengths, atol=1e-6)
@@ -0,0 +1,108 @@
+import importlib
+
+import numpy as np
+import pytest
+from sklearn.neighbors import NearestNeighbors
+
+from neighbors import (approximate_knn_graph, knn_graph, patch_knn_graph, read_neighbor_table, row_digests,
+                       write_neighbor_table)
+
+
+def embeddings(n, dim=24, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def sklearn_knn(vectors, k):
+    distances, indices = NearestNeighbors(n_neighbors=k + 1, metric='cosine').fit(vectors).kneighbors(vectors)
+    return indices[:, 1:], distances[:, 1:]
+
+
+@pytest.mark.parametrize("batch_size", [None, 7])
+def test_knn_graph_matches_sklearn(batch_size):
+    vectors = embeddings(500)
+    indices, distances = knn_graph(vectors, 10, batch_size=batch_size)
+    expected_indices, expected_distances = sklearn_knn(vectors, 10)
+    assert indices.shape == (500, 10) and indices.dtype == np.int32
+    assert np.array_equal(indices, expected_indices)
+    assert np.allclose(distances, expected_distances, atol=1e-5)
+    assert not (indices == np.arange(500)[:, None]).any()
+
+
+def test_knn_graph_rows_and_small_catalogs():
+    vectors = embeddings(50)
+    indices, distances = knn_graph(vectors, 5)
+    rows = np.array([3, 17, 42])
+    sub_indices, sub_distances = knn_graph(vectors, 5, rows=rows)
+    assert np.array_equal(sub_indices, indices[rows])
+    assert np.allclose(sub_distances, distances[rows])
+    # k is capped at n - 1
+    assert knn_graph(vectors[:4], 10)[0].shape == (4, 3)
+
+
+def test_neighbor_table_round_trip(tmp_path):
+    indices, distances = knn_graph(embeddings(100), 8)
+    path = tmp_path / "neighbors.bin"
+    write_neighbor_table(path, indices, distances)
+    read_indices, read_distances = read_neighbor_table(path)
+    assert path.stat().st_size == 8 + 100 * 8 * (4 + 2)
+    assert np.array_equal(read_indices, indices)
+    assert read_distances.dtype == np.float16
+    assert np.allclose(read_distances, distances, atol=1e-3)
+
+
+def test_patch_knn_graph_matches_full_search():
+    rng = np.random.default_rng(1)
+    vectors = embeddings(900)
+    previous, _ = knn_graph(vectors[:600], 10)
+    # 60 movies removed, 300 added, kept movies shuffled
+    kept = rng.permutation(np.setdiff1d(np.arange(600), rng.choice(600, 60, replace=False)))
+    current = np.concatenate([vectors[kept], vectors[600:]])
+    old_rows = np.full(600, -1)
+    old_rows[kept] = np.arange(len(kept))
+    indices, distances = patch_knn_graph(current, 10, previous, old_rows)
+    expected_indices, expected_distances = knn_graph(current, 10)
+    assert np.array_equal(indices, expected_indices)
+    assert np.allclose(distances, expected_distances, atol=1e-5)
+
+
+def test_patch_knn_graph_with_changed_rows():
+    vectors = embeddings(400)
+    previous, _ = knn_graph(vectors, 10)
+    # A kept movie is re-embedded next to another one: it must show up in that movie's list and get a new list
+    current = vectors.copy()
+    current[17] = vectors[250] + 0.01
+    changed = np.flatnonzero(row_digests(current) != row_digests(vectors))
+    assert changed.tolist() == [17]
+    indices, distances = patch_knn_graph(current, 10, previous, np.arange(400), changed)
+    expected_indices, expected_distances = knn_graph(current, 10)
+    assert indices[250, 0] == 17 and indices[17, 0] == 250
+    assert np.array_equal(indices, expected_indices)
+    assert np.allclose(distances, expected_distances, atol=1e-5)
+
+
+def test_export_neighbors_patches_appends(tmp_path):
+    reduce_step = importlib.import_module("05_reduce_and_cluster")
+    table_path, state_path = tmp_path / "neighbors.bin", tmp_path / "versions" / "neighbors.npz"
+    vectors = embeddings(300)
+    ids = [str(i) for i in range(300)]
+    reduce_step.export_neighbors(vectors, ids, table_path, state_path)
+
+    # Append run: two movies removed, 20 added, one re-embedded
+    current = np.concatenate([vectors[2:], embeddings(20, seed=5)])
+    current[40] = embeddings(1, seed=9)[0]
+    current_ids = ids[2:] + [f"new-{i}" for i in range(20)]
+    reduce_step.export_neighbors(current, current_ids, table_path, state_path, patch=True)
+    indices, _ = read_neighbor_table(table_path)
+    assert np.array_equal(indices, knn_graph(current, reduce_step.neighbor_k)[0])
+
+
+def test_approximate_knn_graph_recall():
+    pytest.importorskip("pynndescent")
+    vectors = embeddings(1500, dim=16)
+    indices, distances = approximate_knn_graph(vectors, 10)
+    expected, _ = knn_graph(vectors, 10)
+    assert indices.shape == (1500, 10) and indices.dtype == np.int32
+    assert not (indices == np.arange(1500)[:, None]).any()
+    assert np.all(np.diff(distances, axis=1) >= -1e-6)
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(indices, expected)])
+    assert recall > 0.9
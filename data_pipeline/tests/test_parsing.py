@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from parsing import parse_list_column, serialize_list_column, join_head
+
+
+def test_parse_list_column_formats():
+    values = pd.Series([
+        "[{'id': 18, 'name': 'Drama'}, {'id': 35, 'name': 'Comedy'}]",
+        '["Action", "Comedy"]',
+        "['Action', 'Comedy']",
+        "Action, Comedy",
+        "Drama",
+        "",
+        None,
+        np.nan,
+        "[not a list",
+    ], index=range(10, 19))
+    parsed = parse_list_column(values)
+    assert parsed.index.equals(values.index)
+    assert parsed.tolist() == [
+        ["Drama", "Comedy"],
+        ["Action", "Comedy"],
+        ["Action", "Comedy"],
+        ["Action", "Comedy"],
+        ["Drama"],
+        [],
+        [],
+        [],
+        [],
+    ]
+
+
+def test_parse_list_column_passes_lists_through():
+    values = pd.Series([["A"], np.array(["B", "C"]), None])
+    assert parse_list_column(values).tolist() == [["A"], ["B", "C"], []]
+
+
+def test_parse_list_column_empty():
+    assert parse_list_column(pd.Series([], dtype=object)).empty
+
+
+def test_serialize_round_trip():
+    lists = pd.Series([["Amélie", "Drama"], []])
+    assert parse_list_column(serialize_list_column(lists)).tolist() == lists.tolist()
+
+
+def test_join_head():
+    assert join_head(pd.Series([["a", "b", "c"], []]), 2).tolist() == ["a, b", ""]
@@ -0,0 +1,89 @@
+import sys
+import types
+from argparse import Namespace
+
+import pytest
+
+import plotpoint
+from plotpoint import PipelineError, Stage
+
+
+def test_with_dependencies_and_downstream():
+    assert [s.name for s in plotpoint.with_dependencies(['normalize'])] == ['filter', 'normalize']
+    assert [s.name for s in plotpoint.with_dependencies(['validate'])] == ['filter', 'normalize', 'embed', 'reduce',
+                                                                         'validate']
+    assert plotpoint.downstream(['reduce']) == {'reduce', 'validate', 'check_clusters'}
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """Two stages on tmp files: 'upper' reads source.txt, 'count' reads upper's output."""
+    source = tmp_path / "source.txt"
+    source.write_text("plot point", encoding="utf-8")
+    upper_out, count_out = tmp_path / "upper.txt", tmp_path / "count.txt"
+    runs = []
+
+    def run_upper(ctx, module, args):
+        runs.append('upper')
+        upper_out.write_text(source.read_text(encoding="utf-8").upper(), encoding="utf-8")
+
+    def run_count(ctx, module, args):
+        runs.append('count')
+        if args.fail:
+            raise args.fail
+        count_out.write_text(str(len(upper_out.read_text(encoding="utf-8"))), encoding="utf-8")
+
+    stages = [
+        Stage('upper', 'fake_upper', [], params=lambda m, a: {}, inputs=lambda m, a: [source],
+              outputs=lambda m, a: [upper_out], run=run_upper),
+        Stage('count', 'fake_count', ['upper'], params=lambda m, a: {}, inputs=lambda m, a: [upper_out],
+              outputs=lambda m, a: [count_out], run=run_count),
+    ]
+    for name in ('fake_upper', 'fake_count'):
+        module = types.ModuleType(name)
+        module.__file__ = __file__
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setattr(plotpoint, 'STAGES', stages)
+    monkeypatch.setattr(plotpoint, 'STAGE_NAMES', ['upper', 'count'])
+    monkeypatch.setattr(plotpoint, 'STATE_FILE', str(tmp_path / "state.json"))
+    return Namespace(source=source, runs=runs)
+
+
+def run_args(**overrides):
+    return Namespace(**{"stages": [], "force": None, "rebuild": False, "dry_run": False, "fail": None, **overrides})
+
+
+def test_run_skips_current_stages(pipeline):
+    assert plotpoint.run_stages(run_args()) == 0
+    assert pipeline.runs == ['upper', 'count']
+    assert plotpoint.run_stages(run_args()) == 0
+    assert pipeline.runs == ['upper', 'count']
+
+    # Changed input: the stage and everything downstream run again
+    pipeline.source.write_text("plot points", encoding="utf-8")
+    assert plotpoint.run_stages(run_args()) == 0
+    assert pipeline.runs == ['upper', 'count'] * 2
+
+    assert plotpoint.run_stages(run_args(force=['count'])) == 0
+    assert pipeline.runs == ['upper', 'count'] * 2 + ['count']
+
+
+def test_missing_input_fails_the_stage(pipeline, capsys):
+    pipeline.source.unlink()
+    assert plotpoint.run_stages(run_args()) == 1
+    assert pipeline.runs == []
+    assert f"upper: missing input {pipeline.source}" in capsys.readouterr().out
+
+    stage = plotpoint.STAGES[0]
+    assert plotpoint.is_current(stage, None, run_args(), {"stages": {}}, {}) == (None, False)
+    with pytest.raises(PipelineError, match="missing input"):
+        plotpoint.check_inputs(stage, None, run_args())
+
+
+@pytest.mark.parametrize("error", [KeyError('overview'), FileNotFoundError('embeddings.npy')])
+def test_stage_errors_become_failures(pipeline, capsys, error):
+    assert plotpoint.run_stages(run_args(fail=error)) == 1
+    out = capsys.readouterr().out
+    assert f"count: {type(error).__name__}" in out
+    state = plotpoint.load_state(plotpoint.resolve(plotpoint.STATE_FILE))
+    assert list(state["stages"]) == ['upper']
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parsing import get_eras
+from sampling import StratifiedReservoir, allocate_quotas
+
+LANGUAGES = ['en', 'fr', 'ja', 'hi', 'ko']
+GENRES = ['Drama', 'Comedy', 'Action', 'Horror']
+
+
+def candidates(n, seed=0):
+    rng = np.random.default_rng(seed)
+    years = rng.integers(1910, 2024, n)
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'title': [f"Movie {i}" for i in range(n)],
+        'release_date': [f"{year}-01-01" for year in years],
+        'original_language': rng.choice(LANGUAGES, n, p=[0.6, 0.15, 0.1, 0.1, 0.05]),
+        'genres': [f'["{genre}"]' for genre in rng.choice(GENRES, n)],
+        'popularity': rng.lognormal(0, 1.5, n)
+    })
+
+
+def draw(df, target_size, seed=42, chunk_size=None):
+    reservoir = StratifiedReservoir(target_size, seed)
+    chunk_size = chunk_size or len(df)
+    for start in range(0, len(df), chunk_size):
+        reservoir.add(df.iloc[start:start + chunk_size])
+    return reservoir
+
+
+def test_sample_size_and_columns():
+    df = candidates(2000)
+    sample = draw(df, 300).sample()
+    assert len(sample) == 300
+    assert list(sample.columns) == list(df.columns)
+    assert sample['id'].is_unique
+
+
+def test_sample_takes_everything_below_target():
+    df = candidates(200)
+    assert sorted(draw(df, 500).sample()['id']) == sorted(df['id'])
+
+
+def test_sample_independent_of_chunking_and_order():
+    df = candidates(3000)
+    whole = draw(df, 400).sample()
+    chunked = draw(df, 400, chunk_size=250).sample()
+    shuffled = draw(df.sample(frac=1, random_state=1), 400, chunk_size=700).sample()
+    pd.testing.assert_frame_equal(whole, chunked)
+    assert whole['id'].tolist() == shuffled['id'].tolist()
+
+
+def test_seed_changes_the_sample():
+    df = candidates(3000)
+    assert set(draw(df, 400, seed=1).sample()['id']) != set(draw(df, 400, seed=2).sample()['id'])
+
+
+def test_duplicate_ids_kept_once():
+    df = candidates(500)
+    reservoir = draw(pd.concat([df, df.head(50)]), 1000, chunk_size=200)
+    assert reservoir.duplicates == 50
+    assert len(reservoir.sample()) == 500
+
+
+def test_coverage_matches_quotas():
+    reservoir = draw(candidates(3000), 400)
+    report = reservoir.coverage()
+    assert report['sampled'].sum() == 400
+    assert report['candidates'].sum() == 3000
+    assert (report['sampled'] <= report['candidates']).all()
+
+
+@pytest.mark.parametrize("balance", [0.0, 0.5, 1.0])
+def test_allocate_quotas_totals(balance):
+    sizes = [1000, 200, 30, 5, 0]
+    quotas = allocate_quotas(sizes, 300, balance)
+    assert quotas.sum() == 300
+    assert (quotas <= sizes).all()
+    assert quotas[-1] == 0
+
+
+def test_allocate_quotas_balance():
+    sizes = [900, 100]
+    assert allocate_quotas(sizes, 100, balance=1.0).tolist() == [90, 10]
+    assert allocate_quotas(sizes, 100, balance=0.0).tolist() == [50, 50]
+    # Strata smaller than their share are taken whole, the rest goes to the others
+    assert allocate_quotas([900, 10], 100, balance=0.0).tolist() == [90, 10]
+    assert allocate_quotas(sizes, 5000).tolist() == sizes
+
+
+def test_get_eras():
+    eras = get_eras(pd.Series([1995, 2000.0, 1919, None, "2011"]))
+    assert eras.tolist() == ["1990s", "2000s", "Pre-1920s", "Unknown", "2010s"]
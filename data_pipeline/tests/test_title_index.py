@@ -0,0 +1,125 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from title_index import TitleIndex, normalize_title
+
+TESTS_DIR = Path(__file__).resolve().parent
+TITLE_INDEX_JS = TESTS_DIR / "../../web_app/src/utils/titleIndex.js"
+TRICKY_TITLES = json.loads((TESTS_DIR / "fixtures" / "tricky_titles.json").read_text(encoding="utf-8"))
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+def run_node(script, payload):
+    """Run an ES module script with the web app's titleIndex.js as `T` and `payload` as `input`; returns its JSON output."""
+    source = ("import fs from 'fs'\nimport { pathToFileURL } from 'url'\n"
+              f"const T = await import(pathToFileURL({json.dumps(str(TITLE_INDEX_JS.resolve()))}).href)\n"
+              "const input = JSON.parse(fs.readFileSync(0, 'utf8'))\n" + script)
+    out = subprocess.run(["node", "--input-type=module", "-e", source], input=json.dumps(payload),
+                         capture_output=True, text=True, encoding="utf-8", check=True)
+    return json.loads(out.stdout)
+
+
+@pytest.mark.parametrize("case", TRICKY_TITLES, ids=lambda case: case["key"] or "<empty>")
+def test_normalize_title_fixture(case):
+    assert normalize_title(case["title"]) == case["key"]
+
+
+@requires_node
+def test_normalize_title_matches_js():
+    titles = [case["title"] for case in TRICKY_TITLES]
+    keys = run_node("console.log(JSON.stringify(input.map(T.normalizeTitle)))", titles)
+    assert keys == [case["key"] for case in TRICKY_TITLES]
+
+
+@requires_node
+def test_key_order_matches_js():
+    # Python sorts keys by codepoint; the web app's binary search must use the same order
+    keys = sorted({case["key"] for case in TRICKY_TITLES} | {"zz", "zz\U00020000"})
+    shuffled = keys[::-1]
+    js_sorted = run_node("console.log(JSON.stringify([...input].sort(T.compareKeys)))", shuffled)
+    assert js_sorted == keys
+
+
+def catalog():
+    """Fixture titles plus a wide 'star' prefix range (past PREFIX_SORT_LIMIT) and duplicate titles."""
+    titles = [case["title"] for case in TRICKY_TITLES]
+    titles += [f"Star Voyage {i}" for i in range(300)] + ["Star Wars", "Star Wars", "Stardust", "Amelie"]
+    popularity = [float((i * 37) % 101) for i in range(len(titles))]
+    popularity[titles.index("Star Wars")] = 500.0
+    return titles, popularity
+
+
+def queries():
+    return {
+        "exact": ["Amelie", "AMÉLIE!", "star wars", "Schindlers List", "schindler s list", "ＡＫＩＲＡ", "missing"],
+        "prefix": ["am", "star", "star w", "𠀀", "schindler’", "", "zzz", "1 2"],
+        "fuzzy": ["amelei", "star wras", "schindlers list", "nausicaa valley", "akria"]
+    }
+
+
+def test_exact_prefix_fuzzy():
+    titles, popularity = catalog()
+    index = TitleIndex.build(titles, popularity)
+    assert len(index) == len(titles)
+    assert index.keys == sorted(index.keys)
+
+    amelie = [i for i, title in enumerate(titles) if normalize_title(title) == "amelie"]
+    assert sorted(index.exact("AMÉLIE!")) == sorted(amelie)
+    assert index.exact("missing") == []
+    # Duplicates are all returned, most popular first
+    wars = index.exact("Star Wars")
+    assert len(wars) == 2 and popularity[wars[0]] >= popularity[wars[1]]
+
+    assert index.prefix("") == []
+    assert [titles[row] for row in index.prefix("star", limit=1)] == ["Star Wars"]
+    starred = index.prefix("star", limit=50)
+    assert len(starred) == 50 and all(normalize_title(titles[row]).startswith("star") for row in starred)
+    # Titles by their most popular row, each title's rows together
+    best = {}
+    for row in starred:
+        best.setdefault(normalize_title(titles[row]), popularity[row])
+    assert list(best.values()) == sorted(best.values(), reverse=True)
+    assert [titles[row] for row in index.prefix("𠀀")] == ["𠀀 Legend"]
+
+    rows, scores = zip(*index.fuzzy("star wras"))
+    assert titles[rows[0]] == "Star Wars" and list(scores) == sorted(scores, reverse=True)
+    assert titles[index.fuzzy("amelei")[0][0]] in ("Amélie", "Amelie")
+    assert index.fuzzy("qqqqqq") == []
+
+
+def test_save_load_round_trip(tmp_path):
+    titles, popularity = catalog()
+    index = TitleIndex.build(titles, popularity)
+    index.save(tmp_path / "titles.bin", tmp_path / "titles.json")
+    loaded = TitleIndex.load(tmp_path / "titles.bin", tmp_path / "titles.json")
+    for op, texts in queries().items():
+        for text in texts:
+            assert getattr(loaded, op)(text) == getattr(index, op)(text)
+
+
+@requires_node
+def test_lookups_match_js(tmp_path):
+    titles, popularity = catalog()
+    index = TitleIndex.build(titles, popularity)
+    index.save(tmp_path / "titles.bin", tmp_path / "titles.json")
+    script = """
+const manifest = JSON.parse(fs.readFileSync(input.dir + '/titles.json', 'utf8'))
+const bin = fs.readFileSync(input.dir + '/titles.bin')
+const index = new T.TitleIndex(manifest, bin.buffer.slice(bin.byteOffset, bin.byteOffset + bin.byteLength))
+const out = {}
+for (const [op, texts] of Object.entries(input.queries)) out[op] = texts.map(text => index[op](text))
+console.log(JSON.stringify(out))
+"""
+    js = run_node(script, {"dir": str(tmp_path), "queries": queries()})
+    for op, texts in queries().items():
+        for text, js_result in zip(texts, js[op]):
+            python_result = getattr(index, op)(text)
+            if op == "fuzzy":
+                assert [(hit["row"], pytest.approx(hit["score"])) for hit in js_result] == python_result, text
+            else:
+                assert js_result == python_result, text
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from views import DEFAULT_WEIGHTS, VIEW_FIELDS, check_weights, combine_views, load_weights, row_hashes, save_weights
+
+
+def field_views(n=50, dim=6, seed=0):
+    rng = np.random.default_rng(seed)
+    return {field: rng.normal(size=(n, dim)).astype(np.float32) for field in VIEW_FIELDS}
+
+
+def reference(views, weights, rows):
+    acc = sum(weights[f] * views[f][rows] / np.linalg.norm(views[f][rows], axis=1, keepdims=True)
+              for f in VIEW_FIELDS if weights[f] > 0)
+    return acc / np.linalg.norm(acc, axis=1, keepdims=True)
+
+
+def test_check_weights_fills_missing_fields():
+    weights = check_weights({"overview": 1, "genres": 0.5})
+    assert list(weights) == VIEW_FIELDS
+    assert weights["overview"] == 1.0 and weights["title"] == 0.0
+
+
+@pytest.mark.parametrize("weights", [{"plot": 1.0}, {"overview": -1.0}, {"overview": 0.0}, {}])
+def test_check_weights_rejects(weights):
+    with pytest.raises(ValueError):
+        check_weights(weights)
+
+
+def test_weights_round_trip(tmp_path):
+    path = tmp_path / "weights.json"
+    assert load_weights(path) == check_weights(DEFAULT_WEIGHTS)
+    # Saved weights are complete: fields left out are stored as 0, not taken from the defaults
+    save_weights(path, {"overview": 2.0, "title": 1.0})
+    assert load_weights(path) == check_weights({"overview": 2.0, "title": 1.0})
+
+
+@pytest.mark.parametrize("chunk", [7, 1000])
+def test_combine_views(chunk):
+    views = field_views()
+    weights = check_weights(DEFAULT_WEIGHTS)
+    combined = combine_views(views, weights, chunk=chunk)
+    assert combined.shape == (50, 6) and combined.dtype == np.float32
+    assert np.allclose(combined, reference(views, weights, np.arange(50)), atol=1e-5)
+    assert np.allclose(np.linalg.norm(combined, axis=1), 1.0, atol=1e-5)
+
+
+def test_combine_views_missing_field_and_single_weight():
+    views = field_views()
+    views["overview"][3] = 0.0
+    weights = check_weights(DEFAULT_WEIGHTS)
+    without = dict(weights, overview=0.0)
+    # A movie without an overview is the combination of its other fields
+    assert np.allclose(combine_views(views, weights)[3], reference(views, without, [3])[0], atol=1e-5)
+
+    only_overview = combine_views(views, check_weights({"overview": 1.0}))
+    expected = views["overview"] / np.maximum(np.linalg.norm(views["overview"], axis=1, keepdims=True), 1e-12)
+    assert np.allclose(only_overview, expected, atol=1e-5)
+
+
+def test_row_hashes_follow_fields_and_weights():
+    field_hashes = {field: ["a", "b", None] for field in VIEW_FIELDS}
+    weights = check_weights(DEFAULT_WEIGHTS)
+    hashes = row_hashes(field_hashes, weights)
+    assert len(set(hashes)) == 3
+    assert row_hashes(field_hashes, weights) == hashes
+    assert row_hashes(field_hashes, dict(weights, era=0.9)) != hashes
+    changed = dict(field_hashes, title=["a", "x", None])
+    assert [old == new for old, new in zip(hashes, row_hashes(changed, weights))] == [True, False, True]
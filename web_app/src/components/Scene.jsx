@@ -3,6 +3,9 @@ import { useFrame, useThree } from '@react-three/fiber'
 import { Html, Line } from '@react-three/drei'
 import * as THREE from 'three'
 import { buildMovieTree } from '../utils/KDTree'
+import { parseNeighborTable, neighborsOf } from '../utils/neighbors'
+import { loadColumnarMovies } from '../utils/columnar'
+import { loadManifest, loadCachedMovies, saveCachedMovies } from '../utils/delta'
 
 // Muted color based on movie properties
 function getPointColor(movie) {
@@ -24,14 +27,42 @@ function getPointColor(movie) {
 
 export default function Scene({ onMoviesLoaded, onHover, onSelect, cameraTarget, selectedMovie, controlsRef }) {
   const [data, setData] = useState([])
+  const [neighborTable, setNeighborTable] = useState(null)
   const [hoveredId, setHoveredId] = useState(null)
   const { camera } = useThree()
   
-  // Load data
+  // Load data: the local copy brought up to date with deltas when the export has a
+  // manifest, else the columnar payload, else plotpoint_data_3d.json for older exports.
+  // The neighbor table is optional; without it we fall back to the KD-Tree.
   useEffect(() => {
-    fetch('/plotpoint_data_3d.json')
-      .then(res => res.json())
-      .then(movies => {
+    const neighbors = fetch('/plotpoint_neighbors.bin')
+      .then(res => (res.ok ? res.arrayBuffer() : null))
+      .then(buffer => (buffer ? parseNeighborTable(buffer) : null))
+      .catch(() => null)
+
+    const manifest = loadManifest()
+    const fullExport = () => loadColumnarMovies()
+      .then(({ movies, overviews }) => {
+        // Overview text arrives after the points are on screen; panels read it on next render.
+        // Only a complete catalog is cached: without overviews the next visit fetches it again.
+        overviews.then(texts => {
+          if (!texts) return
+          texts.forEach((text, i) => { if (movies[i]) movies[i].overview = text })
+          manifest.then(m => saveCachedMovies(m, movies))
+        })
+        return movies
+      })
+      .catch(() => fetch('/plotpoint_data_3d.json').then(res => res.json())
+        .then(movies => { manifest.then(m => saveCachedMovies(m, movies)); return movies }))
+
+    const catalog = manifest
+      .then(m => loadCachedMovies(m))
+      .catch(() => null)
+      .then(movies => movies ?? fullExport())
+
+    Promise.all([catalog, neighbors])
+      .then(([movies, table]) => {
+        setNeighborTable(table && table.count === movies.length ? table : null)
         setData(movies)
         onMoviesLoaded?.(movies)
       })
@@ -73,17 +104,26 @@ export default function Scene({ onMoviesLoaded, onHover, onSelect, cameraTarget,
     onSelect?.(movie)
   }
 
-  // Build spatial index once when data loads
+  const indexById = useMemo(() => new Map(data.map((movie, i) => [movie.id, i])), [data])
+
+  // Spatial index is only needed when no precomputed neighbor table was shipped
   const kdTree = useMemo(() => {
-    if (data.length === 0) return null
+    if (data.length === 0 || neighborTable) return null
     console.log('Building KD-Tree for', data.length, 'movies')
     return buildMovieTree(data)
-  }, [data])
+  }, [data, neighborTable])
 
-  // Find nearest 5 neighbors using KD-Tree (O(log n) instead of O(n))
+  // Find nearest 5 neighbors: one table lookup, or KD-Tree search (O(log n)) as fallback
   const nearestNeighbors = useMemo(() => {
-    if (!selectedMovie || !kdTree) return []
-    
+    if (!selectedMovie) return []
+
+    if (neighborTable) {
+      const index = indexById.get(selectedMovie.id)
+      if (index === undefined) return []
+      return neighborsOf(neighborTable, index, 5).map(n => data[n.index])
+    }
+
+    if (!kdTree) return []
     const results = kdTree.kNearest(
       [selectedMovie.x, selectedMovie.y, selectedMovie.z],
       5,
@@ -91,7 +131,7 @@ export default function Scene({ onMoviesLoaded, onHover, onSelect, cameraTarget,
     )
     
     return results.map(r => r.data)
-  }, [selectedMovie, kdTree])
+  }, [selectedMovie, neighborTable, indexById, data, kdTree])
 
   const neighborIds = useMemo(() => new Set(nearestNeighbors.map(m => m.id)), [nearestNeighbors])
 
@@ -1,16 +1,58 @@
-import { useState, useMemo } from 'react'
+import { useState, useMemo, useEffect } from 'react'
+import { searchByMeaning } from '../utils/semanticSearch'
+import { loadTitleIndex } from '../utils/titleIndex'
+
+const MEANING_DEBOUNCE_MS = 250
 
 export default function Search({ movies, onSearch }) {
   const [query, setQuery] = useState('')
   const [isFocused, setIsFocused] = useState(false)
+  const [meaningHits, setMeaningHits] = useState([])
+  const [titleIndex, setTitleIndex] = useState(null)
+
+  useEffect(() => {
+    loadTitleIndex().then(setTitleIndex)
+  }, [])
+
+  const moviesById = useMemo(() => new Map(movies.map(m => [m.id, m])), [movies])
 
   const results = useMemo(() => {
     if (!query || query.length < 2) return []
+    // Title index: autocomplete by prefix, then fuzzy matches for typos and inner words
+    if (titleIndex && titleIndex.count === movies.length) {
+      const rows = new Set(titleIndex.prefix(query, 6))
+      for (const { row } of titleIndex.fuzzy(query, 6)) rows.add(row)
+      return [...rows].slice(0, 6).map(row => movies[row])
+    }
     const q = query.toLowerCase()
     return movies
       .filter(m => m.title.toLowerCase().includes(q))
       .slice(0, 6)
-  }, [query, movies])
+  }, [query, movies, titleIndex])
+
+  // Free-text matches by plot and theme from the local search service (if running)
+  useEffect(() => {
+    if (query.trim().length < 3) {
+      setMeaningHits([])
+      return
+    }
+    const controller = new AbortController()
+    const timer = setTimeout(async () => {
+      const hits = await searchByMeaning(query, 6, controller.signal)
+      if (!controller.signal.aborted) setMeaningHits(hits)
+    }, MEANING_DEBOUNCE_MS)
+    return () => {
+      clearTimeout(timer)
+      controller.abort()
+    }
+  }, [query])
+
+  const meaningResults = useMemo(() => {
+    const shown = new Set(results.map(m => m.id))
+    return meaningHits
+      .map(hit => moviesById.get(hit.id))
+      .filter(m => m && !shown.has(m.id))
+  }, [meaningHits, moviesById, results])
 
   const handleSelect = (movie) => {
     onSearch(movie)
@@ -18,7 +60,35 @@ export default function Search({ movies, onSearch }) {
     setIsFocused(false)
   }
 
-  const showResults = isFocused && results.length > 0
+  const showResults = isFocused && (results.length > 0 || meaningResults.length > 0)
+
+  const renderResult = (movie) => (
+    <div
+      key={movie.id}
+      onClick={() => handleSelect(movie)}
+      style={{
+        padding: '10px 12px',
+        cursor: 'pointer',
+        borderBottom: '1px solid rgba(180, 175, 165, 0.08)',
+        transition: 'background 0.2s'
+      }}
+      onMouseEnter={(e) => e.target.style.background = 'rgba(180, 175, 165, 0.08)'}
+      onMouseLeave={(e) => e.target.style.background = 'transparent'}
+    >
+      <div style={{ 
+        fontSize: '0.85rem',
+        color: '#c8c8c0'
+      }}>{movie.title}</div>
+      <div style={{ 
+        fontSize: '0.7rem', 
+        opacity: 0.5, 
+        marginTop: 2,
+        color: '#a0a098'
+      }}>
+        {movie.year}
+      </div>
+    </div>
+  )
 
   return (
     <div style={{
@@ -56,33 +126,19 @@ export default function Search({ movies, onSearch }) {
           borderRadius: 4,
           overflow: 'hidden'
         }}>
-          {results.map((movie) => (
-            <div
-              key={movie.id}
-              onClick={() => handleSelect(movie)}
-              style={{
-                padding: '10px 12px',
-                cursor: 'pointer',
-                borderBottom: '1px solid rgba(180, 175, 165, 0.08)',
-                transition: 'background 0.2s'
-              }}
-              onMouseEnter={(e) => e.target.style.background = 'rgba(180, 175, 165, 0.08)'}
-              onMouseLeave={(e) => e.target.style.background = 'transparent'}
-            >
-              <div style={{ 
-                fontSize: '0.85rem',
-                color: '#c8c8c0'
-              }}>{movie.title}</div>
-              <div style={{ 
-                fontSize: '0.7rem', 
-                opacity: 0.5, 
-                marginTop: 2,
-                color: '#a0a098'
-              }}>
-                {movie.year}
-              </div>
+          {results.map(renderResult)}
+          {meaningResults.length > 0 && (
+            <div style={{
+              padding: '8px 12px 4px',
+              fontSize: '0.65rem',
+              letterSpacing: '0.08em',
+              opacity: 0.4,
+              color: '#a0a098'
+            }}>
+              by meaning
             </div>
-          ))}
+          )}
+          {meaningResults.map(renderResult)}
         </div>
       )}
     </div>
@@ -0,0 +1,104 @@
+/**
+ * Columnar movie payload exported by the data pipeline:
+ *   plotpoint_points.json  - manifest (column dtypes/offsets, dictionaries, string columns)
+ *   plotpoint_points.bin   - little-endian typed arrays, 8-byte aligned
+ *   plotpoint_overviews.json - overview text in row order, loaded after the points
+ *
+ * Decodes into the same movie objects as plotpoint_data_3d.json, so the rest
+ * of the app does not care which format was served.
+ */
+
+const TYPED_ARRAYS = {
+  int8: Int8Array,
+  uint8: Uint8Array,
+  int16: Int16Array,
+  uint16: Uint16Array,
+  int32: Int32Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array
+}
+
+function view(buffer, spec) {
+  const TypedArray = TYPED_ARRAYS[spec.dtype]
+  if (!TypedArray) throw new Error(`Unsupported column dtype ${spec.dtype}`)
+  return new TypedArray(buffer, spec.offset, spec.length)
+}
+
+/**
+ * Per-column row readers: (row) => value
+ * @param {Object} manifest - parsed plotpoint_points.json
+ * @param {ArrayBuffer} buffer - contents of plotpoint_points.bin
+ */
+function columnReaders(manifest, buffer) {
+  const readers = {}
+  for (const [name, spec] of Object.entries(manifest.columns)) {
+    const values = view(buffer, spec)
+    if (spec.offsets) {
+      const offsets = view(buffer, spec.offsets)
+      readers[name] = row => {
+        const cell = []
+        for (let i = offsets[row]; i < offsets[row + 1]; i++) cell.push(spec.dictionary[values[i]])
+        return cell
+      }
+    } else if (spec.dictionary) {
+      readers[name] = row => spec.dictionary[values[row]]
+    } else if (spec.null !== undefined) {
+      readers[name] = row => (values[row] === spec.null ? null : values[row])
+    } else {
+      readers[name] = row => values[row]
+    }
+  }
+  for (const [name, values] of Object.entries(manifest.strings)) {
+    readers[name] = row => values[row]
+  }
+  return readers
+}
+
+/**
+ * Zero-copy typed arrays of a table's plain numeric columns, by name
+ * (for tables that are not row records, e.g. the title index).
+ */
+export function columnArrays(manifest, buffer) {
+  const arrays = {}
+  for (const [name, spec] of Object.entries(manifest.columns)) {
+    if (!spec.dictionary) arrays[name] = view(buffer, spec)
+  }
+  return arrays
+}
+
+/**
+ * @param {Object} manifest - parsed plotpoint_points.json
+ * @param {ArrayBuffer} buffer - contents of plotpoint_points.bin
+ * @returns {Array} - movie objects (without overview)
+ */
+export function decodeColumnar(manifest, buffer) {
+  if (buffer.byteLength !== manifest.byte_length) {
+    throw new Error('Columnar payload does not match its manifest')
+  }
+  const readers = Object.entries(columnReaders(manifest, buffer))
+  const movies = new Array(manifest.count)
+  for (let row = 0; row < manifest.count; row++) {
+    const movie = {}
+    for (const [name, read] of readers) movie[name] = read(row)
+    movies[row] = movie
+  }
+  return movies
+}
+
+/**
+ * Fetch and decode the columnar payload.
+ * @returns {Promise<{movies: Array, overviews: Promise<Array|null>}>} - overviews resolve later,
+ *   to null when the overview shard could not be loaded
+ */
+export async function loadColumnarMovies() {
+  const [manifest, buffer] = await Promise.all([
+    fetch('/plotpoint_points.json').then(res => res.json()),
+    fetch('/plotpoint_points.bin').then(res => res.arrayBuffer())
+  ])
+  const movies = decodeColumnar(manifest, buffer)
+  const overviews = fetch('/plotpoint_overviews.json')
+    .then(res => (res.ok ? res.json() : null))
+    .catch(() => null)
+  return { movies, overviews }
+}
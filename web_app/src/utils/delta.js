@@ -0,0 +1,103 @@
+/**
+ * Incremental catalog updates (data pipeline: src/delta.py).
+ *
+ * plotpoint_manifest.json names the current export version and hash and the
+ * chain of recent deltas. A returning visitor keeps the decoded movies of the
+ * version it last saw in IndexedDB. When the manifest moves on, it fetches
+ * only the deltas from that version up, instead of the whole export. Each
+ * delta lists removed ids, added and updated records, moved records (id plus
+ * placement) and the new row order, so the row-indexed neighbor table and title
+ * index still line up.
+ */
+
+const DB_NAME = 'plotpoint'
+const STORE = 'catalog'
+const KEY = 'movies'
+
+/**
+ * Movies of version delta.to from the movies of version delta.from.
+ * Must match delta.apply_delta in the pipeline.
+ */
+export function applyDelta(movies, delta) {
+  if (movies.length !== delta.from_count) {
+    throw new Error(`Delta ${delta.from}->${delta.to} expects ${delta.from_count} movies, got ${movies.length}`)
+  }
+  const base = movies.slice()
+  const position = new Map(base.map((movie, i) => [movie.id, i]))
+  for (const record of delta.updated) base[position.get(record.id)] = record
+  for (const change of delta.moved) {
+    const i = position.get(change.id)
+    base[i] = { ...base[i], ...change }
+  }
+  const pool = base.concat(delta.added)
+  const result = []
+  for (const [start, length] of delta.order) {
+    for (let code = start; code < start + length; code++) result.push(pool[code])
+  }
+  if (result.length !== delta.count) {
+    throw new Error(`Delta ${delta.from}->${delta.to} produced ${result.length} movies, expected ${delta.count}`)
+  }
+  return result
+}
+
+function openDb() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, 1)
+    request.onupgradeneeded = () => request.result.createObjectStore(STORE)
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => reject(request.error)
+  })
+}
+
+async function withStore(mode, action) {
+  const db = await openDb()
+  return new Promise((resolve, reject) => {
+    const request = action(db.transaction(STORE, mode).objectStore(STORE))
+    request.onsuccess = () => resolve(request.result)
+    request.onerror = () => reject(request.error)
+  }).finally(() => db.close())
+}
+
+/** The manifest, or null for exports without one. */
+export async function loadManifest() {
+  try {
+    const res = await fetch('/plotpoint_manifest.json', { cache: 'no-cache' })
+    return res.ok ? await res.json() : null
+  } catch {
+    return null
+  }
+}
+
+/**
+ * Movies of the manifest's version from the local copy plus deltas.
+ * Null when there is no usable local copy (the caller then loads the full export).
+ */
+export async function loadCachedMovies(manifest) {
+  if (!manifest || typeof indexedDB === 'undefined') return null
+  const cached = await withStore('readonly', store => store.get(KEY)).catch(() => null)
+  if (!cached) return null
+  if (cached.hash === manifest.hash) return cached.movies
+
+  // The chain has to start at the cached version and end at the current one
+  const start = manifest.deltas.findIndex(entry => entry.from === cached.version)
+  if (start < 0) return null
+  const chain = manifest.deltas.slice(start)
+  if (chain[chain.length - 1].to !== manifest.version) return null
+  const full = manifest.files['plotpoint_points.bin'] || manifest.files['plotpoint_data_3d.json']
+  if (full && chain.reduce((sum, entry) => sum + entry.bytes, 0) > full.bytes) return null
+
+  let movies = cached.movies
+  for (const entry of chain) {
+    const delta = await fetch(`/${entry.file}`).then(res => res.json())
+    movies = applyDelta(movies, delta)
+  }
+  await saveCachedMovies(manifest, movies)
+  return movies
+}
+
+/** Keep the movies of the manifest's version for the next visit. */
+export function saveCachedMovies(manifest, movies) {
+  if (!manifest || typeof indexedDB === 'undefined') return Promise.resolve()
+  const entry = { version: manifest.version, hash: manifest.hash, movies }
+  return withStore('readwrite', store => store.put(entry, KEY)).catch(() => {})
+}
@@ -0,0 +1,54 @@
+/**
+ * Precomputed neighbor table exported by the data pipeline (plotpoint_neighbors.bin)
+ * Neighbors are computed in the original embedding space, so a lookup is both
+ * more faithful than a 3D search and needs no spatial index on the client.
+ *
+ * Layout (little-endian):
+ *   uint32 count, uint32 k,
+ *   int32[count * k] neighbor indices (into the movies array), nearest first
+ *   float16[count * k] cosine distances
+ */
+
+function halfToFloat(h) {
+  const sign = h & 0x8000 ? -1 : 1
+  const exponent = (h >> 10) & 0x1f
+  const fraction = h & 0x03ff
+  if (exponent === 0) return sign * Math.pow(2, -14) * (fraction / 1024)
+  if (exponent === 0x1f) return fraction ? NaN : sign * Infinity
+  return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024)
+}
+
+/**
+ * @param {ArrayBuffer} buffer - contents of plotpoint_neighbors.bin
+ * @returns {{count: number, k: number, indices: Int32Array, distances: Uint16Array} | null}
+ */
+export function parseNeighborTable(buffer) {
+  if (buffer.byteLength < 8) return null
+  const view = new DataView(buffer)
+  const count = view.getUint32(0, true)
+  const k = view.getUint32(4, true)
+  // Anything else (e.g. a dev server's index.html fallback) is not a neighbor table
+  if (buffer.byteLength !== 8 + count * k * 6) return null
+  const indices = new Int32Array(buffer, 8, count * k)
+  const distances = new Uint16Array(buffer, 8 + count * k * 4, count * k)
+  return { count, k, indices, distances }
+}
+
+/**
+ * Nearest neighbors of one movie
+ * @param {Object} table - result of parseNeighborTable
+ * @param {number} index - position of the movie in the movies array
+ * @param {number} n - number of neighbors to return (at most table.k)
+ * @returns {Array} - array of { index, distance } sorted by distance
+ */
+export function neighborsOf(table, index, n) {
+  const results = []
+  const base = index * table.k
+  for (let i = 0; i < Math.min(n, table.k); i++) {
+    results.push({
+      index: table.indices[base + i],
+      distance: halfToFloat(table.distances[base + i])
+    })
+  }
+  return results
+}
@@ -0,0 +1,23 @@
+/**
+ * Client for the pipeline's local semantic search service (data_pipeline/src/search_service.py).
+ * The service returns movie ids from the same export the app loads, so results
+ * map straight onto movies. When it is not running, search stays title-only.
+ */
+
+const SEARCH_URL = import.meta.env?.VITE_SEARCH_URL || 'http://localhost:8765'
+
+/**
+ * @param {string} query - free text, e.g. "slow-burn space horror"
+ * @param {number} k - results wanted
+ * @param {AbortSignal} signal
+ * @returns {Promise<Array<{id: string, title: string, distance: number}>>} [] when the service is unavailable
+ */
+export async function searchByMeaning(query, k = 6, signal) {
+  try {
+    const res = await fetch(`${SEARCH_URL}/search?q=${encodeURIComponent(query)}&k=${k}`, { signal })
+    if (!res.ok) return []
+    return (await res.json()).results
+  } catch {
+    return []
+  }
+}
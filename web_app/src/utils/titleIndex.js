@@ -0,0 +1,157 @@
+/**
+ * Title lookup index exported by the data pipeline (data_pipeline/src/title_index.py):
+ *   plotpoint_titles.json - columnar manifest, with the normalized titles ("keys", sorted by codepoint) and trigrams
+ *   plotpoint_titles.bin  - key -> rows offsets, rows, key popularity ranks, trigram postings
+ *
+ * Lookups return row indices into the movies array, most popular first:
+ *   exact  - normalized title equality (Map)
+ *   prefix - autocomplete via binary search over the sorted keys
+ *   fuzzy  - trigram similarity, for typos and partial words
+ */
+import { columnArrays } from './columnar.js'
+
+const FUZZY_MIN_SCORE = 0.25
+// Prefix ranges wider than this are answered by walking titles in popularity order
+const PREFIX_SORT_LIMIT = 256
+// Sorts after every other codepoint: the upper bound of a prefix range
+const MAX_CODEPOINT = '\u{10FFFF}'
+
+/**
+ * 'Amélie' -> 'amelie', 'Your Name.' -> 'your name'.
+ * Same spec as normalize_title in title_index.py: NFKD, lowercase, drop marks (\p{M}), then every
+ * run of characters other than letters and numbers (\p{L}, \p{N}) becomes one space, trimmed.
+ * Both are checked against data_pipeline/tests/fixtures/tricky_titles.json.
+ */
+export function normalizeTitle(title) {
+  return String(title)
+    .normalize('NFKD')
+    .toLowerCase()
+    .replace(/\p{M}/gu, '')
+    .replace(/[^\p{L}\p{N}]+/gu, ' ')
+    .trim()
+}
+
+/**
+ * Codepoint order, the order of the exported keys (Python's sorted()).
+ * Plain < compares UTF-16 code units, which puts astral characters before U+E000-U+FFFF.
+ */
+export function compareKeys(a, b) {
+  const n = Math.min(a.length, b.length)
+  for (let i = 0; i < n; i++) {
+    const x = a.charCodeAt(i)
+    const y = b.charCodeAt(i)
+    if (x === y) continue
+    const xSurrogate = x >= 0xd800 && x <= 0xdfff
+    const ySurrogate = y >= 0xd800 && y <= 0xdfff
+    if (xSurrogate !== ySurrogate) return xSurrogate ? 1 : -1
+    return x - y
+  }
+  return a.length - b.length
+}
+
+// Trigrams of codepoints (not UTF-16 code units), as in title_index.py
+function trigrams(key) {
+  const padded = Array.from(` ${key} `)
+  const grams = new Set()
+  for (let i = 0; i + 3 <= padded.length; i++) grams.add(padded.slice(i, i + 3).join(''))
+  return grams
+}
+
+function lowerBound(keys, value) {
+  let lo = 0
+  let hi = keys.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (compareKeys(keys[mid], value) < 0) lo = mid + 1
+    else hi = mid
+  }
+  return lo
+}
+
+export class TitleIndex {
+  constructor(manifest, buffer) {
+    const arrays = columnArrays(manifest, buffer)
+    this.count = manifest.count
+    this.keys = manifest.strings.keys
+    this.keyOffsets = arrays.key_offsets
+    this.rows = arrays.rows
+    this.keyRank = arrays.key_rank
+    this.gramOffsets = arrays.gram_offsets
+    this.postings = arrays.postings
+    this.gramCounts = arrays.gram_counts
+    this.byRank = new Uint32Array(this.keyRank.length)
+    for (let i = 0; i < this.keyRank.length; i++) this.byRank[this.keyRank[i]] = i
+    // Shared trigram counts for fuzzy(), reset after every query
+    this.common = new Uint16Array(this.keys.length)
+    this.keyIds = new Map(this.keys.map((key, i) => [key, i]))
+    this.gramIds = new Map(manifest.strings.grams.map((gram, j) => [gram, j]))
+  }
+
+  keyRows(keyId) {
+    return Array.from(this.rows.subarray(this.keyOffsets[keyId], this.keyOffsets[keyId + 1]))
+  }
+
+  exact(title) {
+    const keyId = this.keyIds.get(normalizeTitle(title))
+    return keyId === undefined ? [] : this.keyRows(keyId)
+  }
+
+  prefix(text, limit = 10) {
+    const query = normalizeTitle(text)
+    if (!query) return []
+    const lo = lowerBound(this.keys, query)
+    const hi = lowerBound(this.keys, query + MAX_CODEPOINT)
+    const keyIds = []
+    if (hi - lo <= PREFIX_SORT_LIMIT) {
+      for (let i = lo; i < hi; i++) keyIds.push(i)
+      keyIds.sort((a, b) => this.keyRank[a] - this.keyRank[b])
+    } else {
+      // Key ids are positions in sorted order; a wide range is dense, so this stops early
+      for (let r = 0; r < this.byRank.length && keyIds.length < limit; r++) {
+        const keyId = this.byRank[r]
+        if (keyId >= lo && keyId < hi) keyIds.push(keyId)
+      }
+    }
+    return keyIds.slice(0, limit).flatMap(i => this.keyRows(i)).slice(0, limit)
+  }
+
+  /** @returns {Array<{row: number, score: number}>} best match first */
+  fuzzy(text, limit = 10, minScore = FUZZY_MIN_SCORE) {
+    const grams = trigrams(normalizeTitle(text))
+    const common = this.common
+    const candidates = []
+    for (const gram of grams) {
+      const j = this.gramIds.get(gram)
+      if (j === undefined) continue
+      for (let p = this.gramOffsets[j]; p < this.gramOffsets[j + 1]; p++) {
+        const keyId = this.postings[p]
+        if (common[keyId]++ === 0) candidates.push(keyId)
+      }
+    }
+    const scored = []
+    for (const keyId of candidates) {
+      const shared = common[keyId]
+      common[keyId] = 0
+      const score = shared / (grams.size + this.gramCounts[keyId] - shared)
+      if (score >= minScore) scored.push({ keyId, score })
+    }
+    scored.sort((a, b) => b.score - a.score || this.keyRank[a.keyId] - this.keyRank[b.keyId])
+    return scored
+      .slice(0, limit)
+      .flatMap(({ keyId, score }) => this.keyRows(keyId).map(row => ({ row, score })))
+      .slice(0, limit)
+  }
+}
+
+/** Fetch the exported index; null when it is not deployed. */
+export async function loadTitleIndex() {
+  try {
+    const [manifest, buffer] = await Promise.all([
+      fetch('/plotpoint_titles.json').then(res => res.json()),
+      fetch('/plotpoint_titles.bin').then(res => res.arrayBuffer())
+    ])
+    return new TitleIndex(manifest, buffer)
+  } catch {
+    return null
+  }
+}